@@ -10,7 +10,6 @@ from flask_debugtoolbar import DebugToolbarExtension
 import logging, os
 from logging.handlers import RotatingFileHandler
 from apscheduler.schedulers.background import BackgroundScheduler
-from dotenv import load_dotenv
 
 convention = {
     "ix": 'ix_%(column_0_label)s',
@@ -30,7 +29,7 @@ apscheduler = BackgroundScheduler(timezone="UTC")
 
 def create_app(config_class=Config):
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_object(config_class)
 
     bootstrap.init_app(app)
     db.init_app(app)
@@ -53,16 +52,31 @@ def create_app(config_class=Config):
     from app import audit
     audit.register_audit_listeners()
 
-    @app.context_processor
-    def inject_logo():
-        static_path = os.path.join(app.root_path, 'static')
-        clip_png_files = [f for f in os.listdir(static_path) if f.lower().endswith('.png') and 'clip' in f.lower()] if os.path.exists(static_path) else []
+    from app import search
+    search.register_search_listeners()
+
+    from app import taxonomy
+    taxonomy.register_taxonomy_listeners()
+
+    from app import stats
+    stats.register_counter_listeners()
 
-        load_dotenv(override=True)
-        LOGO_FILENAME = os.environ.get('LOGO_FILENAME', 'random')
+    from app.dash import tables
+    tables.register_table_listeners()
 
-        if (LOGO_FILENAME == 'random' or LOGO_FILENAME == '') and clip_png_files:
-            LOGO_FILENAME = random.choice(clip_png_files)
+    from app.runtime import settings, register_reload_signal
+    register_reload_signal()
+
+    @app.before_request
+    def reload_runtime_settings():
+        settings.reload_if_requested()
+
+    @app.context_processor
+    def inject_logo():
+        # the logo list is read at startup, requests only pick from it
+        LOGO_FILENAME = settings.logo_filename
+        if (LOGO_FILENAME == 'random' or LOGO_FILENAME == '') and settings.clip_logos:
+            LOGO_FILENAME = random.choice(settings.clip_logos)
 
         return dict(LOGO_FILENAME=LOGO_FILENAME)
 
@@ -1,9 +1,39 @@
-import json
-from sqlalchemy import event, insert
+import json, os, time, zlib
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from flask import current_app
+from sqlalchemy import event, insert, inspect, select
+from sqlalchemy.orm import joinedload
 from sqlalchemy.orm.attributes import get_history
 from app import db
+from app.audit_writer import AuditWriter
 from app.models import *
 
+# entries shown in the history of a row on its edit page
+HISTORY_LIMIT = 50
+ACTIONS = ('insert', 'update', 'delete', 'ingest')
+# table_name of the summary rows written by ingestion_audit
+INGESTION_TABLE = 'ingestion'
+# encoded JSON lines past this many bytes are split in two, well under the 16 MB columns
+ENCODED_MAX_BYTES = 8 * 1024 * 1024
+# columns diffed into the activity log, models left out diff every column
+TRACKED_COLUMNS = {
+    'clip': ('twitch_id', 'url', 'embed_url', 'broadcaster_id', 'broadcaster_name', 'creator_id', 'creator_name',
+             'video_id', 'game_id', 'language', 'title', 'title_override', 'view_count', 'created_at', 'thumbnail_url',
+             'duration', 'vod_offset', 'is_featured', 'notes', 'updated_at', 'category_id', 'status_id', 'layout_id',
+             'updated_by'),
+    # the tokens and login bookkeeping stay out of the log
+    'user': ('twitch_id', 'login', 'display_name', 'profile_image_url', 'contributions', 'notes', 'login_enabled',
+             'updated_at', 'rank_id', 'updated_by')
+}
+# an update changing nothing but these, such as a view count refresh, is not logged
+QUIET_COLUMNS = {
+    'clip': {'view_count', 'thumbnail_url', 'updated_at'},
+    'user': {'twitch_id', 'login', 'display_name', 'profile_image_url', 'contributions'}
+}
+# tracked columns of each mapper, filled in once by register_audit_listeners
+audit_columns = {}
+
 def get_current_user_id():
     from flask_login import current_user
     try:
@@ -11,93 +41,278 @@ def get_current_user_id():
     except AttributeError:
         return None
 
-def activity_log_listener(mapper, connection, target, action):
+def tracked_columns(mapper):
+    table = mapper.local_table.name
+    if table in TRACKED_COLUMNS:
+        return TRACKED_COLUMNS[table]
+    # search_text is derived from the other clip columns and tags
+    return tuple(column.key for column in mapper.columns if column.key != 'search_text')
+
+def tag_changes(target, key):
+    history = get_history(target, key)
+    if not history.has_changes():
+        return None
+    old = [tag.id for tag in history.deleted] + [tag.id for tag in getattr(target, key) if tag not in history.added]
+    return {
+        'old': sorted(set(old)),
+        'new': sorted(tag.id for tag in getattr(target, key))
+    }
+
+def row_changes(mapper, target, action):
+    """Old and new values of the tracked columns of one flushed object that changed."""
     changes = {}
-    for attr in target.__mapper__.columns:
-        hist = get_history(target, attr.key)
+    # unloaded columns can't have changed, loading them fails once the row is deleted
+    unloaded = inspect(target).unloaded
+    for key in audit_columns[mapper]:
+        if key in unloaded:
+            continue
+        hist = get_history(target, key)
         if hist.has_changes():
-            changes[attr.key] = {
+            changes[key] = {
                 'old': hist.deleted[0] if hist.deleted else None,
                 'new': hist.added[0] if hist.added else None
             }
 
-    # For Clip updates, also capture theme and subject relationship changes
-    if action == 'update' and target.__tablename__ == 'clip':
-        themes_hist = get_history(target, 'themes')
-        if themes_hist.has_changes():
-            new_themes = [t.id for t in target.themes]
-            
-            old_themes = [t.id for t in themes_hist.deleted] + \
-                         [t.id for t in target.themes if t not in themes_hist.added]
-            old_themes = sorted(set(old_themes))
-            new_themes = sorted(new_themes)
-            changes['themes'] = {
-                'old': old_themes,
-                'new': new_themes
-            }
-        
-        subjects_hist = get_history(target, 'subjects')
-        if subjects_hist.has_changes():
-            new_subjects = [s.id for s in target.subjects]
-            
-            old_subjects = [s.id for s in subjects_hist.deleted] + \
-                           [s.id for s in target.subjects if s not in subjects_hist.added]
-            old_subjects = sorted(set(old_subjects))
-            new_subjects = sorted(new_subjects)
-            changes['subjects'] = {
-                'old': old_subjects,
-                'new': new_subjects
-            }
+    if action == 'update' and mapper.local_table.name == 'clip':
+        for key in ('themes', 'subjects'):
+            tags = tag_changes(target, key)
+            if tags:
+                changes[key] = tags
+        # ingestion passes the Twitch ids as strings, compare as strings to drop the ones that didn't change
+        for key in ('broadcaster_id', 'creator_id'):
+            if key in changes and str(changes[key]['old']) == str(changes[key]['new']):
+                del changes[key]
+    return changes
 
-    # Only log User updates if certain fields changed
-    if (
-        action == 'update'
-        and target.__tablename__ == 'user'
-        and not set(changes.keys()) & {'notes', 'login_enabled', 'updated_at', 'rank_id', 'updated_by'}
-    ):
-        return
+def is_quiet(table, action, changes):
+    # updates that only touch quiet columns are left out
+    return action == 'update' and not changes.keys() - QUIET_COLUMNS.get(table, set())
 
-    # Only log Clip updates if meaningful changes happened
-    if action == 'update' and target.__tablename__ == 'clip':
-        # Remove 'broadcaster_id' and 'creator_id' from changes if not actually changed
-        for key in ['broadcaster_id', 'creator_id']:
-            if key in changes:
-                old = changes[key]['old']
-                new = changes[key]['new']
-                # Compare as strings to avoid type mismatch (e.g., int vs str)
-                if str(old) == str(new):
-                    del changes[key]
-        # If only 'view_count', 'thumbnail_url', and 'updated_at' remains, skip logging
-        if set(changes.keys()) <= {'view_count', 'thumbnail_url', 'updated_at'}:
-            return
-    
-    if action == 'update' and not changes:
-        return
-    
-    log = insert(ActivityLog).values(
-        table_name=target.__tablename__,
-        row_id=str(getattr(target, 'id', None)),
-        row_name=str(getattr(target, 'name', None)),
-        row_twitch_id=str(getattr(target, 'twitch_id', None)),
-        action=action,
-        admin_id=get_current_user_id(),
-        changes= json.dumps(changes, default=str) if changes else None
-    )
-    connection.execute(log)
+def activity_record(table, target, action, changes):
+    return {
+        'table_name': table,
+        'row_id': str(getattr(target, 'id', None)),
+        'row_name': str(getattr(target, 'name', None)),
+        'row_twitch_id': str(getattr(target, 'twitch_id', None)),
+        'timestamp': datetime.now(timezone.utc),
+        'action': action,
+        'changes': json.dumps(changes, default=str) if changes else None
+    }
+
+def activity_log_listener(mapper, target, action):
+    table = mapper.local_table.name
+    changes = row_changes(mapper, target, action)
+    session = inspect(target).session
+    run = session.info.get('ingestion_run')
+    if run is not None:
+        run.add(table, target, action, changes, is_quiet(table, action, changes))
+    elif not is_quiet(table, action, changes):
+        # kept on the session until the flush ends, see after_flush_listener
+        session.info.setdefault('activity_records', []).append(activity_record(table, target, action, changes))
 
 def after_insert_listener(mapper, connection, target):
-    activity_log_listener(mapper, connection, target, 'insert')
+    activity_log_listener(mapper, target, 'insert')
 
 def after_update_listener(mapper, connection, target):
-    activity_log_listener(mapper, connection, target, 'update')
+    activity_log_listener(mapper, target, 'update')
 
 def after_delete_listener(mapper, connection, target):
-    activity_log_listener(mapper, connection, target, 'delete')
+    activity_log_listener(mapper, target, 'delete')
+
+def get_audit_writer():
+    if 'audit_writer' not in current_app.extensions:
+        config = current_app.config
+        current_app.extensions['audit_writer'] = AuditWriter(
+            db.engine, os.path.join(current_app.instance_path, 'audit_spill'), current_app.logger,
+            max_queue=config.get('AUDIT_QUEUE_SIZE', 10000),
+            batch_size=config.get('AUDIT_BATCH_SIZE', 500),
+            put_timeout=config.get('AUDIT_QUEUE_TIMEOUT', 1.0)
+        )
+    return current_app.extensions['audit_writer']
+
+def after_flush_listener(session, flush_context):
+    records = session.info.pop('activity_records', None)
+    if not records:
+        return
+    admin_id = get_current_user_id()
+    for record in records:
+        record['admin_id'] = admin_id
+    if current_app.config.get('AUDIT_WRITER') == 'async':
+        # handed to the writer thread once the transaction commits
+        session.info.setdefault('activity_committed', []).extend(records)
+    else:
+        # one executemany for the whole flush, PyMySQL sends it as multi-row INSERTs
+        session.connection().execute(insert(ActivityLog), records)
+
+def after_commit_listener(session):
+    records = session.info.pop('activity_committed', None)
+    if records:
+        get_audit_writer().submit(records)
+    if 'ingestion_run' in session.info:
+        session.info['ingestion_run'].commit()
+
+def after_rollback_listener(session, previous_transaction):
+    session.info.pop('activity_records', None)
+    session.info.pop('activity_committed', None)
+    if 'ingestion_run' in session.info:
+        session.info['ingestion_run'].rollback()
 
 def register_audit_listeners():
     for mapper in db.Model.registry.mappers:
         cls = mapper.class_
-        if hasattr(cls, '__tablename__'):
+        if hasattr(cls, '__tablename__') and not event.contains(cls, 'after_insert', after_insert_listener):
+            audit_columns[mapper] = tracked_columns(mapper)
             event.listen(cls, 'after_insert', after_insert_listener)
             event.listen(cls, 'after_update', after_update_listener)
-            event.listen(cls, 'after_delete', after_delete_listener)
\ No newline at end of file
+            event.listen(cls, 'after_delete', after_delete_listener)
+    if not event.contains(db.session, 'after_flush', after_flush_listener):
+        event.listen(db.session, 'after_flush', after_flush_listener)
+        event.listen(db.session, 'after_commit', after_commit_listener)
+        event.listen(db.session, 'after_soft_rollback', after_rollback_listener)
+
+class IngestionRun:
+    """What one scheduler job changed, counted instead of logged row by row.
+
+    Changes count once their transaction commits. The diffs that would have
+    been activity rows of their own are kept for the ActivityDetail of the run.
+    """
+
+    def __init__(self, job):
+        self.job = job
+        self.started_at = time.monotonic()
+        # {'insert': {'clip': 3}, 'update': {'clip': 40, 'user': 2}}
+        self.counts = {}
+        # updates per changed column, quiet ones included
+        self.fields = {}
+        self.diffs = []
+        self.pending = []
+
+    def add(self, table, target, action, changes, quiet):
+        if action == 'update' and not changes:
+            return
+        diff = None if quiet else {
+            'table_name': table,
+            'row_id': getattr(target, 'id', None),
+            'row_twitch_id': getattr(target, 'twitch_id', None),
+            'action': action,
+            'changes': changes
+        }
+        self.pending.append((table, action, list(changes) if action == 'update' else [], diff))
+
+    def commit(self):
+        for table, action, fields, diff in self.pending:
+            per_table = self.counts.setdefault(action, {})
+            per_table[table] = per_table.get(table, 0) + 1
+            for field in fields:
+                self.fields[field] = self.fields.get(field, 0) + 1
+            if diff:
+                self.diffs.append(diff)
+        self.pending = []
+
+    def rollback(self):
+        self.pending = []
+
+    def summary(self):
+        return {
+            **self.counts,
+            'fields': dict(sorted(self.fields.items(), key=lambda item: -item[1])),
+            'diffs': len(self.diffs),
+            'duration_seconds': round(time.monotonic() - self.started_at, 3)
+        }
+
+def encode_lines(items):
+    # JSON lines, zlib compressed unless AUDIT_DETAIL_COMPRESSION is off, returns the encoding and the data
+    data = '\n'.join(json.dumps(item, default=str) for item in items).encode()
+    if current_app.config.get('AUDIT_DETAIL_COMPRESSION', True):
+        return 'zlib', zlib.compress(data)
+    return 'json', data
+
+def encode_chunks(items):
+    """encode_lines of consecutive slices of items, halved until each fits ENCODED_MAX_BYTES.
+
+    Returns (items, encoding, data) of every slice in order.
+    """
+    encoding, data = encode_lines(items)
+    if len(data) > ENCODED_MAX_BYTES and len(items) > 1:
+        half = len(items) // 2
+        return encode_chunks(items[:half]) + encode_chunks(items[half:])
+    return [(items, encoding, data)]
+
+def decode_lines(encoding, data):
+    if encoding == 'zlib':
+        data = zlib.decompress(data)
+    return [json.loads(line) for line in data.decode().splitlines()]
+
+def write_ingestion_summary(run):
+    connection = db.session.connection()
+    activity_id = connection.execute(insert(ActivityLog).values(
+        table_name=INGESTION_TABLE,
+        # a run is no single row
+        row_id=0,
+        row_name=run.job,
+        action='ingest',
+        timestamp=datetime.now(timezone.utc),
+        changes=json.dumps(run.summary())
+    )).inserted_primary_key[0]
+    if run.diffs:
+        # large runs take several detail rows, read back in id order
+        connection.execute(insert(ActivityDetail), [
+            {'activity_id': activity_id, 'encoding': encoding, 'data': data}
+            for diffs, encoding, data in encode_chunks(run.diffs)
+        ])
+    db.session.commit()
+
+@contextmanager
+def ingestion_audit(job):
+    """Log the changes committed inside as one activity row of the job instead of a row each.
+
+    Runs that changed nothing leave no row. The per-row diffs are stored
+    compressed in ActivityDetail, see get_ingestion_diffs.
+    """
+    run = IngestionRun(job)
+    db.session.info['ingestion_run'] = run
+    completed = False
+    try:
+        yield run
+        completed = True
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        db.session.info.pop('ingestion_run', None)
+        if run.counts:
+            try:
+                write_ingestion_summary(run)
+            except Exception:
+                current_app.logger.exception('Could not write the ingestion summary of %s', job)
+                db.session.rollback()
+                # after a failed job its own error goes on instead
+                if completed:
+                    raise
+
+def get_ingestion_diffs(activity_id):
+    diffs = []
+    for detail in db.session.scalars(select(ActivityDetail).where(ActivityDetail.activity_id == activity_id)
+                                     .order_by(ActivityDetail.id)):
+        diffs += decode_lines(detail.encoding, detail.data)
+    return diffs
+
+def audited_tables():
+    # every mapped table writes to the activity log, read from the models instead of scanning the log
+    return sorted([mapper.local_table.name for mapper in db.Model.registry.mappers] + [INGESTION_TABLE])
+
+def decode_changes(activities):
+    # the templates show the changes as a dict of old and new values
+    for activity in activities:
+        activity.changes_json = json.loads(activity.changes) if activity.changes else None
+    return activities
+
+def get_row_history(table_name, row_id, limit=HISTORY_LIMIT):
+    """Latest activity of one row, newest first, read through the (table_name, row_id) index."""
+    return decode_changes(db.session.scalars(
+        select(ActivityLog)
+        .where(ActivityLog.table_name == table_name, ActivityLog.row_id == row_id)
+        .options(joinedload(ActivityLog.admin))
+        .order_by(ActivityLog.id.desc())
+        .limit(limit)
+    ).all())
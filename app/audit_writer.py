@@ -0,0 +1,224 @@
+import atexit, glob, json, os, queue, threading, time, uuid
+from datetime import datetime
+from sqlalchemy import insert
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from app.models import ActivityLog
+
+# put on the queue by close(), the writer stops once everything before it is written
+STOP = object()
+# seconds after which a claimed spill file is taken back even if the process that claimed it is alive
+CLAIM_TIMEOUT = 300
+
+class AuditWriter:
+    """Background thread writing activity log rows outside the request's transaction, one per process.
+
+    Committed rows wait on a bounded queue and are inserted in batches. A full
+    queue makes the committing thread wait up to put_timeout seconds before its
+    rows go to a spill file instead. Batches that fail while the database is
+    unavailable go to the same spill files, which are written back once an insert
+    succeeds again. Rows the database rejects are kept in .rejected files.
+    """
+
+    def __init__(self, engine, spill_dir, logger, max_queue=10000, batch_size=500, put_timeout=1.0,
+                 retry_interval=5.0):
+        self.engine = engine
+        self.spill_dir = spill_dir
+        self.logger = logger
+        self.batch_size = batch_size
+        self.put_timeout = put_timeout
+        self.retry_interval = retry_interval
+        # items are (enqueued at, row), the age of the head is the lag
+        self.queue = queue.Queue(max_queue)
+        self.thread = None
+        self.lock = threading.Lock()
+        self.written = 0
+        self.batches = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.reclaimed = 0
+        self.overflowed = 0
+        self.last_batch_lag = None
+        self.last_error = None
+        atexit.register(self.close)
+
+    def start(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.reclaim()
+                self.thread = threading.Thread(target=self.run, name='audit-writer', daemon=True)
+                self.thread.start()
+
+    def submit(self, records):
+        self.start()
+        now = time.monotonic()
+        for index, record in enumerate(records):
+            try:
+                self.queue.put((now, record), timeout=self.put_timeout)
+            except queue.Full:
+                # the writer can't keep up, keep the rest on disk rather than holding the request any longer
+                self.overflowed += len(records) - index
+                self.spill(records[index:])
+                return
+
+    def run(self):
+        stopping = False
+        while not stopping:
+            try:
+                items = [self.queue.get(timeout=self.retry_interval)]
+            except queue.Empty:
+                self.replay()
+                continue
+            while len(items) < self.batch_size:
+                try:
+                    items.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if STOP in items:
+                stopping = True
+                items.remove(STOP)
+            try:
+                if items:
+                    self.write(items)
+            except Exception:
+                # e.g. the spill directory isn't writable, the thread keeps going for the next batch
+                self.logger.exception(f'Activity log writer lost {len(items)} row(s)')
+            finally:
+                for _ in range(len(items) + stopping):
+                    self.queue.task_done()
+
+    def write(self, items):
+        records = [record for enqueued_at, record in items]
+        try:
+            self.insert(records)
+        except (OperationalError, InterfaceError) as e:
+            self.last_error = str(e.orig)
+            self.logger.warning(f'Activity log unavailable, {len(records)} row(s) spilled: {e.orig}')
+            self.spill(records)
+            return
+        except DBAPIError as e:
+            self.last_error = str(e.orig)
+            self.logger.error(f'Activity log refused {len(records)} row(s), kept in {self.spill_dir}: {e.orig}')
+            self.spill(records, 'rejected')
+            return
+        self.written += len(records)
+        self.batches += 1
+        self.last_batch_lag = round(time.monotonic() - items[0][0], 3)
+        self.replay()
+
+    def insert(self, records):
+        with self.engine.begin() as connection:
+            connection.execute(insert(ActivityLog), records)
+
+    def spill(self, records, extension='jsonl'):
+        # one file per batch, written then renamed so a replay never reads half of one
+        os.makedirs(self.spill_dir, exist_ok=True)
+        name = f'{time.time_ns()}-{uuid.uuid4().hex}.{extension}'
+        temp_path = os.path.join(self.spill_dir, f'.{name}')
+        with open(temp_path, 'w') as f:
+            for record in records:
+                f.write(json.dumps({**record, 'timestamp': record['timestamp'].isoformat()}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, os.path.join(self.spill_dir, name))
+        self.spilled += len(records)
+
+    def reclaim(self):
+        """Put back spill files claimed by a replay that never finished, the process died or hung."""
+        for claimed_path in glob.glob(os.path.join(self.spill_dir, '*.jsonl.*.claimed')):
+            path, pid, _ = claimed_path.rsplit('.', 2)
+            try:
+                stale = not pid_alive(int(pid)) or time.time() - os.path.getmtime(claimed_path) > CLAIM_TIMEOUT
+                if stale:
+                    os.rename(claimed_path, path)
+            except (FileNotFoundError, ValueError):
+                # replayed or reclaimed by someone else meanwhile
+                continue
+            if stale:
+                self.logger.warning(f'Activity log spill file {os.path.basename(path)} reclaimed from process {pid}')
+                self.reclaimed += 1
+
+    def replay(self):
+        """Insert the spilled rows, oldest file first, until one fails."""
+        self.reclaim()
+        for path in sorted(glob.glob(os.path.join(self.spill_dir, '*.jsonl'))):
+            # renamed first so another worker replaying at the same time skips the file
+            claimed_path = f'{path}.{os.getpid()}.claimed'
+            try:
+                os.rename(path, claimed_path)
+                # the claim's age counts from now, not from when the file was spilled
+                os.utime(claimed_path)
+            except FileNotFoundError:
+                continue
+            with open(claimed_path) as f:
+                records = [json.loads(line) for line in f]
+            for record in records:
+                record['timestamp'] = datetime.fromisoformat(record['timestamp'])
+            try:
+                self.insert(records)
+            except (OperationalError, InterfaceError) as e:
+                self.last_error = str(e.orig)
+                os.rename(claimed_path, path)
+                return
+            except DBAPIError as e:
+                self.last_error = str(e.orig)
+                os.rename(claimed_path, path.replace('.jsonl', '.rejected'))
+                continue
+            os.remove(claimed_path)
+            self.replayed += len(records)
+
+    def pending_files(self):
+        # claimed files are pending until their replay removes them
+        return len(glob.glob(os.path.join(self.spill_dir, '*.jsonl'))) + \
+            len(glob.glob(os.path.join(self.spill_dir, '*.jsonl.*.claimed')))
+
+    def drain(self):
+        # blocks until every submitted row is written or spilled
+        self.queue.join()
+
+    def close(self, timeout=10.0):
+        """Write what is queued and stop the thread, rows still queued after timeout seconds are spilled."""
+        if self.thread is not None and self.thread.is_alive():
+            try:
+                self.queue.put(STOP, timeout=timeout)
+                self.thread.join(timeout)
+            except queue.Full:
+                pass
+        left = []
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not STOP:
+                left.append(item[1])
+            self.queue.task_done()
+        if left:
+            self.spill(left)
+
+    def stats(self):
+        with self.queue.mutex:
+            head = self.queue.queue[0] if self.queue.queue else None
+        return {
+            'queued': self.queue.qsize(),
+            'max_queue': self.queue.maxsize,
+            'lag_seconds': round(time.monotonic() - head[0], 3) if head and head is not STOP else 0,
+            'last_batch_lag_seconds': self.last_batch_lag,
+            'written': self.written,
+            'batches': self.batches,
+            'overflowed': self.overflowed,
+            'spilled': self.spilled,
+            'replayed': self.replayed,
+            'reclaimed': self.reclaimed,
+            'spill_files': self.pending_files(),
+            'last_error': self.last_error
+        }
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # exists, owned by another user
+        return True
+    return True
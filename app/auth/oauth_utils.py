@@ -1,12 +1,9 @@
-import os, requests
+import requests
 from datetime import datetime, timezone, timedelta
-from dotenv import load_dotenv
 from app import db
 from app.models import User
+from app.runtime import settings
 
-load_dotenv(override=True)
-TWITCH_CLIENT_ID = os.environ.get('TWITCH_CLIENT_ID')
-TWITCH_CLIENT_SECRET = os.environ.get('TWITCH_CLIENT_SECRET')
 TWITCH_TOKEN_URL = 'https://id.twitch.tv/oauth2/token'
 TWITCH_VALIDATE_URL = 'https://id.twitch.tv/oauth2/validate'
 
@@ -66,8 +63,8 @@ def refresh_user_access_token(user, force_refresh=False):
     
     # Token needs refresh
     params = {
-        'client_id': TWITCH_CLIENT_ID,
-        'client_secret': TWITCH_CLIENT_SECRET,
+        'client_id': settings.twitch_client_id,
+        'client_secret': settings.twitch_client_secret,
         'grant_type': 'refresh_token',
         'refresh_token': user.refresh_token
     }
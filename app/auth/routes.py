@@ -1,22 +1,18 @@
-import os, secrets, requests
+import secrets, requests
 from datetime import datetime, timezone, timedelta
 from urllib.parse import urlencode
-from dotenv import load_dotenv
 from flask import redirect, url_for, flash, abort, session, request
 from flask_login import login_user, logout_user, current_user
 from app import db
 from app.auth import bp
 from app.models import User
+from app.runtime import settings
 from app.auth.oauth_utils import (
     refresh_user_access_token,
     ExpiredAccessTokenError,
     require_scopes
 )
 
-load_dotenv(override=True)
-TWITCH_CLIENT_ID = os.environ.get('TWITCH_CLIENT_ID')
-TWITCH_CLIENT_SECRET = os.environ.get('TWITCH_CLIENT_SECRET')
-TWITCH_OAUTH_REDIRECT_URI = os.environ.get('TWITCH_OAUTH_REDIRECT_URI')
 TWITCH_CLIENT_ACCESS_TOKEN = ''
 TWITCH_AUTHORIZE_URL = 'https://id.twitch.tv/oauth2/authorize'
 TWITCH_SCOPES = []
@@ -25,7 +21,6 @@ TWITCH_USERINFO_URL = 'https://api.twitch.tv/helix/users'
 TWITCH_CLIP_URL = 'https://api.twitch.tv/helix/clips'
 TWITCH_VALIDATE_URL = 'https://id.twitch.tv/oauth2/validate'
 TWITCH_REVOKE_URL = 'https://id.twitch.tv/oauth2/revoke'
-SUPERADMIN_NAMES = os.environ.get('SUPERADMIN_NAMES').lower().split(',')
 
 @bp.before_app_request
 def check_user_token():
@@ -60,8 +55,8 @@ def oauth2_authorize():
 
     # create a query string with all the OAuth2 parameters
     qs = urlencode({
-        'client_id': TWITCH_CLIENT_ID,
-        'redirect_uri': f'{TWITCH_OAUTH_REDIRECT_URI}/callback',
+        'client_id': settings.twitch_client_id,
+        'redirect_uri': f'{settings.twitch_oauth_redirect_uri}/callback',
         'response_type': 'code',
         'scope': ' '.join(TWITCH_SCOPES),
         'state': session['oauth2_state'],
@@ -93,11 +88,11 @@ def oauth2_callback():
 
     # exchange the authorization code for an access token
     response = requests.post(TWITCH_TOKEN_URL, data={
-        'client_id': TWITCH_CLIENT_ID,
-        'client_secret': TWITCH_CLIENT_SECRET,
+        'client_id': settings.twitch_client_id,
+        'client_secret': settings.twitch_client_secret,
         'code': request.args['code'],
         'grant_type': 'authorization_code',
-        'redirect_uri': f'{TWITCH_OAUTH_REDIRECT_URI}/callback',
+        'redirect_uri': f'{settings.twitch_oauth_redirect_uri}/callback',
     }, headers={'Accept': 'application/json'})
 
     if response.status_code != 200:
@@ -116,7 +111,7 @@ def oauth2_callback():
     response = requests.get(TWITCH_USERINFO_URL, headers={
         'Authorization': 'Bearer ' + oauth2_token,
         'Accept': 'application/json',
-        'Client-Id': TWITCH_CLIENT_ID
+        'Client-Id': settings.twitch_client_id
     })
 
     if response.status_code != 200:
@@ -136,7 +131,7 @@ def oauth2_callback():
 
     if user is None:
         rank_id = 1
-        if user_display_name.lower() in SUPERADMIN_NAMES:
+        if user_display_name.lower() in settings.superadmin_names:
             rank_id = 4
         user = User(
             twitch_id=user_id, 
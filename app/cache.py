@@ -0,0 +1,81 @@
+import os, threading, time, uuid
+from collections import OrderedDict
+from flask import current_app
+
+class Generation:
+    """Version token shared by every process of the app through a small file.
+
+    Gunicorn workers and the scheduler each hold their own caches, bump() after
+    a write so all of them notice their copy is stale on the next read.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def path(self):
+        return os.path.join(current_app.instance_path, f'{self.name}.generation')
+
+    def current(self):
+        try:
+            with open(self.path()) as f:
+                return f.read()
+        except FileNotFoundError:
+            return ''
+
+    def bump(self):
+        os.makedirs(current_app.instance_path, exist_ok=True)
+        path = self.path()
+        # write then rename so readers never see a partial token, threads of a worker each use their own file
+        temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}'
+        with open(temp_path, 'w') as f:
+            f.write(uuid.uuid4().hex)
+        os.replace(temp_path, path)
+
+# bumped whenever upvote counts change, they don't touch Clip.updated_at
+likes_generation = Generation('likes')
+
+class TTLCache:
+    """Per-process cache whose entries expire ttl seconds after they were stored.
+
+    The least recently used entries are dropped past max_entries. Hits and misses
+    are counted so the dashboard can show how well it works.
+    """
+
+    def __init__(self, ttl, max_entries=1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get_or_set(self, key, factory):
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return entry[1]
+            self.misses += 1
+        # built outside the lock, two requests missing together both build and the last one is kept
+        value = factory()
+        with self.lock:
+            self.entries[key] = (now + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else None
+        }
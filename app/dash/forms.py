@@ -87,4 +87,7 @@ class layoutForm(FlaskForm):
     name = StringField('Name', validators=[DataRequired()])
     notes = TextAreaField('Notes')
     save = SubmitField('Save')
-    cancel = SubmitField('Cancel', render_kw={'formnovalidate': True})
\ No newline at end of file
+    cancel = SubmitField('Cancel', render_kw={'formnovalidate': True})
+
+class reloadSettingsForm(FlaskForm):
+    submit = SubmitField('Reload Settings')
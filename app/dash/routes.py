@@ -1,18 +1,27 @@
-from flask import current_app, render_template, flash, redirect, url_for, request, session
-import math, os, json, subprocess
-from datetime import datetime, timezone
+from flask import current_app, render_template, flash, redirect, url_for, request, session, abort, make_response
+import hashlib
+from datetime import date, datetime, timedelta, timezone
 from flask_login import current_user, login_required
 from app.dash import bp
-from dotenv import load_dotenv
 from decorators import rank_required
 from app.models import *
-from sqlalchemy import or_, text, func
+from sqlalchemy import text, select, update
 from app.dash.forms import *
-from app.utils.get_twitch_clips import get_clips_by_broadcaster_id
+from app.dash.forms import reloadSettingsForm
+from app.dash.tables import (activity_table, category_table, clip_table, layout_table, status_clip_table, status_table,
+                              subject_category_table, subject_table, theme_table, user_table)
+from app.utils.get_twitch_clips import get_clips_by_broadcaster_id, parse_twitch_timestamp
 from app.utils.get_twitch_users import get_user_by_login
+from app.taxonomy import get_taxonomy
+from app.audit import ACTIONS, INGESTION_TABLE, audited_tables, decode_changes, get_ingestion_diffs, get_row_history
+from app.cache import likes_generation
+from app.feeds import top_feed_status
+from app.runtime import settings, generation as settings_generation
+from app.stats import adjust_counters, get_clip_stats, is_fresh, peek_clip_stats
+from app.retention import search_archive
+from app.timeseries import METRICS, ROLLUPS, SERIES_CACHE_TTL, get_series, is_settled, series_key
 
-load_dotenv(override=True)
-EMBED_PARENT = os.environ.get('EMBED_PARENT')
+ACTIVITY_FILTERS = ('table_name', 'action', 'admin_id', 'since', 'until')
 
 def set_session_filters(route, page=1, size=20, order='asc', sort='id', search=''):
     session[route] = {
@@ -34,6 +43,49 @@ def get_value(request_value, session_value, default):
         return session_value
     return default
 
+def get_activity_filters():
+    # table, action, admin and date range of the activity report, remembered like the table arguments
+    stored = session.get('activity_filters') or {}
+    filters = {key: get_value(request.args.get(key, type=str), stored.get(key), '') for key in ACTIVITY_FILTERS}
+    session['activity_filters'] = filters
+    return filters
+
+def parse_date(value):
+    try:
+        return datetime.combine(date.fromisoformat(value), datetime.min.time())
+    except ValueError:
+        return None
+
+def activity_criteria(filters):
+    criteria = {}
+    if filters['table_name']:
+        criteria['table_name'] = filters['table_name']
+    if filters['action'] in ACTIONS:
+        criteria['action'] = filters['action']
+    # changes made by the scheduler have no admin
+    if filters['admin_id'] == 'system':
+        criteria['admin_id'] = None
+    elif filters['admin_id'].isdigit():
+        criteria['admin_id'] = int(filters['admin_id'])
+    since, until = parse_date(filters['since']), parse_date(filters['until'])
+    if since:
+        criteria['since'] = since
+    if until:
+        # the end date is included
+        criteria['until'] = until + timedelta(days=1)
+    return criteria
+
+def get_table_args(route, default_order='asc'):
+    # page, size, order, sort and search of a listing from the request, else from the last visit
+    filters = get_session_filters(route)
+    page = get_value(request.args.get('page', type=int), filters.get('page') if filters else None, 1)
+    size = get_value(request.args.get('size', type=int), filters.get('size') if filters else None, 20)
+    order = get_value(request.args.get('order', type=str), filters.get('order') if filters else None, default_order)
+    sort = get_value(request.args.get('sort', type=str), filters.get('sort') if filters else None, 'id')
+    search = get_value(request.args.get('search', type=str), filters.get('search') if filters else None, '')
+    set_session_filters(route, page, size, order, sort, search)
+    return page, size, order, sort, search
+
 # ? Unsure of if this will be kept, this would help with page updates without refresh 
 @bp.route('/load_table', methods=['POST'])
 @login_required
@@ -66,19 +118,12 @@ def load_table():
 
 @bp.context_processor
 def inject_sidebar_labels():
-    sidebar_labels = Status.query.order_by('id')
-    return dict(sidebar=sidebar_labels)
-
-def get_git_revision_hash():
-    try:
-        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=current_app.root_path).strip().decode('ascii')
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        return 'Unknown'
+    return dict(sidebar=get_taxonomy().statuses)
 
 @bp.context_processor
 def inject_commit_version():
-    commit_version = get_git_revision_hash()
-    return dict(commit_version=commit_version)
+    # read once at startup by app.runtime, not on every render
+    return dict(commit_version=settings.commit_version)
 
 def format_duration(seconds):
     seconds = int(seconds)
@@ -105,38 +150,22 @@ def format_duration(seconds):
 # 
 # 
 #
+def format_stats(stats):
+    # copy of the shared snapshot with the total duration spelled out
+    return dict(stats, total_duration=format_duration(stats['total_duration'])) if stats else None
+
 @bp.route('/dashboard')
 @login_required
 @rank_required('SUPERADMIN', 'ADMIN', 'MODERATOR')
 def dashboard():
-    total_clips = Clip.query.count()
-    unsorted_clips = Clip.query.filter(Clip.status_id == 1).count()
-    clips_without_subjects = Clip.query.join(Status, Clip.status_id == Status.id).filter(Status.type != 'Hidden', Clip.subjects == None).count()
-    clips_without_themes = Clip.query.join(Status, Clip.status_id == Status.id).filter(Status.type != 'Hidden', Clip.themes == None).count()
-    clips_without_category = Clip.query.join(Status, Clip.status_id == Status.id).filter(Status.type != 'Hidden', Clip.category_id == None).count()
-    clips_without_layout = Clip.query.join(Status, Clip.status_id == Status.id).filter(Status.type != 'Hidden', Clip.layout_id == None).count()
-    total_views = db.session.query(func.sum(Clip.view_count)).scalar() or 0
-    total_upvotes = db.session.query(upvotes).count()
-    unique_clippers = db.session.query(Clip.creator_id).distinct().count()
-    average_duration = db.session.query(func.avg(Clip.duration)).scalar() or 0
-    total_duration = db.session.query(func.sum(Clip.duration)).scalar() or 0
-    total_duration_formatted = format_duration(total_duration)
-
-    stats = {
-        'total_clips': total_clips,
-        'unsorted_clips': unsorted_clips,
-        'clips_without_subjects': clips_without_subjects,
-        'clips_without_themes': clips_without_themes,
-        'clips_without_category': clips_without_category,
-        'clips_without_layout': clips_without_layout,
-        'total_views': total_views,
-        'total_upvotes': total_upvotes,
-        'unique_clippers': unique_clippers,
-        'average_duration': average_duration,
-        'total_duration': total_duration_formatted
-    }
+    # rendered from the last snapshot without querying, the panels refresh themselves when it has expired
+    return render_template('dash/dashboard.html', title='Dashboard', stats=format_stats(peek_clip_stats()), stale=not is_fresh())
 
-    return render_template('dash/dashboard.html', title='Dashboard', stats=stats)
+@bp.route('/dashboard/stats')
+@login_required
+@rank_required('SUPERADMIN', 'ADMIN', 'MODERATOR')
+def dashboard_stats():
+    return render_template('dash/dashboard_stats.html', stats=format_stats(get_clip_stats()), stale=False)
     
 # 
 # 
@@ -151,83 +180,12 @@ def dashboard():
 @login_required
 @rank_required('SUPERADMIN', 'ADMIN', 'MODERATOR')
 def dash_clips():
-    filters = get_session_filters('clips')
-    page = get_value(request.args.get('page', type=int), filters.get('page') if filters else None, 1)
-    size = get_value(request.args.get('size', type=int), filters.get('size') if filters else None, 20)
-    order = get_value(request.args.get('order', type=str), filters.get('order') if filters else None, 'desc')
-    sort = get_value(request.args.get('sort', type=str), filters.get('sort') if filters else None, 'id')
-    search = get_value(request.args.get('search', type=str), filters.get('search') if filters else None, '')
-    set_session_filters('clips', page, size, order, sort, search)
-    columns = {
-        'id': 'ID',
-        'broadcaster_name': 'Broadcaster',
-        'creator_name': 'Creator',
-        'title': 'Title',
-        'title_override': 'Title Override',
-        'view_count': 'Views',
-        'created_at': 'Created At',
-        'duration': 'Duration',
-        'notes': 'Notes',
-        'category': 'Category',
-        'status': 'Status',
-        'themes': 'Themes',
-        'subjects': 'Subjects',
-        'layout': 'Layout',
-        'updated_by': 'Updated By',
-        'updated_at': 'Updated At',
-        'twitch_id': 'Twitch ID',
-    }
-    # Make sure the sort input is valid
-    if sort in columns.keys() and sort not in ['category', 'status', 'themes', 'subjects']:
-        query = (
-            Clip.query
-            .join(Status, Clip.status_id == Status.id)
-            .filter(Status.type != 'Hidden')
-            .filter(
-                or_(
-                    Clip.twitch_id.ilike(f'%{search}%'),
-                    Clip.broadcaster_name.ilike(f'%{search}%'),
-                    Clip.creator_name.ilike(f'%{search}%'),
-                    Clip.title.ilike(f'%{search}%'),
-                    Clip.title_override.ilike(f'%{search}%'),
-                    Clip.notes.ilike(f'%{search}%'),
-                    # Clip.category.ilike(f'%{search}%'),
-                    # Clip.status.ilike(f'%{search}%'),
-                    # Clip.themes.ilike(f'%{search}%'),
-                    # Clip.subjects.ilike(f'%{search}%')
-                )
-            )
-            .order_by(getattr(Clip, sort).desc() if order == 'desc' else getattr(Clip, sort).asc())
-        )
-    else:
-        # Default to sort by id
-        query = (
-            Clip.query
-            .join(Status, Clip.status_id == Status.id)
-            .filter(Status.type != 'Hidden')
-            .filter(
-                or_(
-                    Clip.twitch_id.ilike(f'%{search}%'),
-                    Clip.broadcaster_name.ilike(f'%{search}%'),
-                    Clip.creator_name.ilike(f'%{search}%'),
-                    Clip.title.ilike(f'%{search}%'),
-                    Clip.title_override.ilike(f'%{search}%'),
-                    Clip.notes.ilike(f'%{search}%'),
-                    # Clip.category.ilike(f'%{search}%'),
-                    # Clip.status.ilike(f'%{search}%'),
-                    # Clip.themes.ilike(f'%{search}%'),
-                    # Clip.subjects.ilike(f'%{search}%')
-                )
-            )
-            .order_by(Clip.id.desc() if order == 'desc' else Clip.id.desc())
-        )
-    # Default to page 1 if page number isn't valid
-    if page > math.ceil(query.count()/size) or page < 1:
-        page = 1
-    clips = db.paginate(query, page=page, per_page=size, error_out=False)
+    page, size, order, sort, search = get_table_args('clips', clip_table.default_order)
+    clips = clip_table.paginate(page, size, order, sort, search)
     pages = clips.iter_pages(left_edge=2, left_current=1, right_edge=2, right_current=1)
-    return render_template('dash/clips/clips.html', title='Dashboard - Clips', clips=clips, page=page, pages=pages, size=size, order=order, sort=sort, search=search, columns=columns)
     
+    return render_template('dash/clips/clips.html', title='Dashboard - Clips', clips=clips, page=clips.page, pages=pages, size=size, order=order, sort=sort, search=search, columns=clip_table.columns)
+
 @bp.route('/dashboard/clips/<id>/edit', methods=['GET', 'POST'])
 @login_required
 @rank_required('SUPERADMIN', 'ADMIN', 'MODERATOR')
@@ -250,27 +208,21 @@ def dash_clips_edit(id):
                         themes=[theme.id for theme in current_clip.themes],
                         subjects=[subject.id for subject in current_clip.subjects],
                         layout=current_clip.layout_id)
-        form.category.choices = [(None, '-- None --')] + [(c.id, c.name) for c in Category.query.order_by('id')]
-        form.status.choices = [(st.id, st.name) for st in Status.query.order_by('id')]
-        form.themes.choices = [(t.id, t.name) for t in Theme.query.order_by('id')]
-        form.layout.choices = [(None, '-- None --')] + [(l.id, l.name) for l in Layout.query.order_by('id')]
+        taxonomy = get_taxonomy()
+        form.category.choices = [(None, '-- None --')] + [(c.id, c.name) for c in taxonomy.categories]
+        form.status.choices = [(st.id, st.name) for st in taxonomy.statuses]
+        form.themes.choices = [(t.id, t.name) for t in taxonomy.themes]
+        form.layout.choices = [(None, '-- None --')] + [(l.id, l.name) for l in taxonomy.layouts]
         form.subjects.choices = []
         form.subjects.option_attrs = {}
 
-        for sc in SubjectCategory.query.order_by('id'):
-            subjects = Subject.query.filter(Subject.category_id == sc.id).order_by('id').all()
-            if not subjects:
-                continue
-
-            group_choices = []
+        for group_name, subjects in taxonomy.subject_groups:
+            form.subjects.choices.append((group_name, [(su.id, su.name) for su in subjects]))
             for su in subjects:
-                group_choices.append((su.id, su.name))
                 form.subjects.option_attrs[str(su.id)] = {
-                    'data-subtext': su.subtext or '',
-                    'data-tokens': su.keywords or ''
+                    'data-subtext': su.subtext,
+                    'data-tokens': su.keywords
                 }
-
-            form.subjects.choices.append((sc.name, group_choices))
     else:
         return redirect(url_for('dash.dash_clips'))
 
@@ -318,7 +270,8 @@ def dash_clips_edit(id):
             if referrer:
                 return redirect(referrer)
             return redirect(url_for('dash.dash_clips'))
-    return render_template('dash/clips/edit_clip.html', title='Dashboard - Edit Clip', form=form, clip=current_clip, embed_parent=EMBED_PARENT)
+    return render_template('dash/clips/edit_clip.html', title='Dashboard - Edit Clip', form=form, clip=current_clip, embed_parent=settings.embed_parent,
+                           history=get_row_history('clip', current_clip.id))
 
 @bp.route('/dashboard/clips/<id>/delete', methods=['GET', 'POST'])
 @login_required
@@ -524,7 +477,7 @@ def dash_clips_import_submit():
                     language=clip.get('language'),
                     title=clip['title'],
                     view_count=clip['view_count'],
-                    created_at=clip['created_at'],
+                    created_at=parse_twitch_timestamp(clip['created_at']),
                     thumbnail_url=clip['thumbnail_url'],
                     duration=clip['duration'],
                     vod_offset=clip.get('vod_offset'),
@@ -606,74 +559,12 @@ def dash_users_fill():
 @login_required
 @rank_required('SUPERADMIN', 'ADMIN')
 def dash_users():
-    filters = get_session_filters('users')
-    page = get_value(request.args.get('page', type=int), filters.get('page') if filters else None, 1)
-    size = get_value(request.args.get('size', type=int), filters.get('size') if filters else None, 20)
-    order = get_value(request.args.get('order', type=str), filters.get('order') if filters else None, 'asc')
-    sort = get_value(request.args.get('sort', type=str), filters.get('sort') if filters else None, 'id')
-    search = get_value(request.args.get('search', type=str), filters.get('search') if filters else None, '')
-    set_session_filters('users', page, size, order, sort, search)
-    columns = {
-        'id': 'ID',
-        'twitch_id': 'Twitch ID',
-        'display_name': 'Name',
-        'contributions': 'Contributions',
-        'clips': 'Clips',
-        'notes': 'Notes',
-        'rank': 'Rank',
-        'login_enabled': 'Login Enabled',
-        'last_verified': 'Last Login',
-        'updated_by': 'Updated By',
-        'updated_at': 'Updated At'
-    }
-    # Make sure the sort input is valid
-    if sort in columns.keys():
-        # Sorting by clip count requires joining Clip and User tables
-        if sort == 'clips':
-            query = User.query.outerjoin(Clip, User.twitch_id == Clip.creator_id).group_by(User.twitch_id).filter(
-                or_(
-                    User.twitch_id.ilike(f'%{search}%'),
-                    User.display_name.ilike(f'%{search}%'),
-                    User.notes.ilike(f'%{search}%'),
-                    User.login_enabled.ilike(f'%{search}%')
-                )
-            ).order_by(db.func.count(Clip.id).desc() if order == 'desc' else db.func.count(Clip.id).asc())
-        elif sort == 'rank':
-            query = User.query.outerjoin(Rank, User.rank_id == Rank.id).filter(
-                or_(
-                    User.twitch_id.ilike(f'%{search}%'),
-                    User.display_name.ilike(f'%{search}%'),
-                    User.notes.ilike(f'%{search}%'),
-                    User.login_enabled.ilike(f'%{search}%')
-                )
-            ).order_by(Rank.id.desc() if order == 'desc' else Rank.id.asc())
-        else:
-            query = User.query.filter(
-                or_(
-                    User.twitch_id.ilike(f'%{search}%'),
-                    User.display_name.ilike(f'%{search}%'),
-                    User.notes.ilike(f'%{search}%'),
-                    User.login_enabled.ilike(f'%{search}%')
-                )
-            ).order_by(getattr(User, sort).desc() if order == 'desc' else getattr(User, sort).asc())
-    else:
-        # Default to sort by id
-        query = User.query.filter(
-            or_(
-                User.twitch_id.ilike(f'%{search}%'),
-                User.display_name.ilike(f'%{search}%'),
-                User.notes.ilike(f'%{search}%'),
-                User.login_enabled.ilike(f'%{search}%')
-            )
-        ).order_by(User.id.desc() if order == 'desc' else User.id.asc())
-    # Default to page 1 if page number isn't valid
-    if page > math.ceil(query.count()/size) or page < 1:
-        page = 1
-    users = db.paginate(query, page=page, per_page=size, error_out=False)
+    page, size, order, sort, search = get_table_args('users', user_table.default_order)
+    users = user_table.paginate(page, size, order, sort, search)
     pages = users.iter_pages(left_edge=2, left_current=1, right_edge=2, right_current=1)
     
-    return render_template('dash/users/users.html', title='Dashboard - Users', users=users, page=page, pages=pages, size=size, order=order, sort=sort, search=search, columns=columns)
-    
+    return render_template('dash/users/users.html', title='Dashboard - Users', users=users, page=users.page, pages=pages, size=size, order=order, sort=sort, search=search, columns=user_table.columns)
+
 @bp.route('/dashboard/users/<id>/edit', methods=['GET', 'POST'])
 @login_required
 @rank_required('SUPERADMIN', 'ADMIN')
@@ -706,7 +597,7 @@ def dash_users_edit(id):
             curr_user.updated_at = datetime.now(timezone.utc)
             db.session.commit()
             return redirect(url_for('dash.dash_users'))
-    return render_template('dash/users/edit_user.html', title='Dashboard - Edit User', form=form)
+    return render_template('dash/users/edit_user.html', title='Dashboard - Edit User', form=form, history=get_row_history('user', curr_user.id))
 
 @bp.route('/dashboard/users/<id>/delete', methods=['GET', 'POST'])
 @login_required
@@ -727,8 +618,17 @@ def dash_users_delete(id):
             flash('Entered name does not match!', 'form-error')
         # user name confirmed, delete user
         else:
+            # the user's upvotes go with them, so take them off the clip counters too
+            result = db.session.execute(
+                update(Clip)
+                .where(Clip.id.in_(select(upvotes.c.clip_id).where(upvotes.c.user_id == user.id)))
+                .values(upvote_count=Clip.upvote_count - 1, updated_at=Clip.updated_at)
+                .execution_options(synchronize_session=False)
+            )
+            adjust_counters(db.session.connection(), {'total_upvotes': -result.rowcount})
             db.session.delete(user)
             db.session.commit()
+            likes_generation.bump()
             return redirect(url_for('dash.dash_users'))
     return render_template('dash/users/delete_user.html', title='Dashboard - Delete User', form=form, user=user)
 
@@ -745,67 +645,11 @@ def dash_users_delete(id):
 @login_required
 @rank_required('SUPERADMIN', 'ADMIN', 'MODERATOR')
 def dash_categories():
-    filters = get_session_filters('categories')
-    page = get_value(request.args.get('page', type=int), filters.get('page') if filters else None, 1)
-    size = get_value(request.args.get('size', type=int), filters.get('size') if filters else None, 20)
-    order = get_value(request.args.get('order', type=str), filters.get('order') if filters else None, 'asc')
-    sort = get_value(request.args.get('sort', type=str), filters.get('sort') if filters else None, 'id')
-    search = get_value(request.args.get('search', type=str), filters.get('search') if filters else None, '')
-    set_session_filters('categories', page, size, order, sort, search)
-    columns = {
-        'id': 'ID',
-        'name': 'Name',
-        'clips': 'Clips',
-        'notes': 'Notes',
-        'created_by': 'Created By',
-        'created_at': 'Created At',
-        'updated_by': 'Updated By',
-        'updated_at': 'Updated At'
-    }
-    # Make sure the sort input is valid
-    if sort in columns.keys():
-        # Sorting by clip count requires joining Clip and Category tables
-        if sort == 'clips':
-            query = Category.query.outerjoin(Clip, Category.id == Clip.category_id).group_by(Category.id).filter(
-                or_(
-                    Category.id.ilike(f'%{search}%'),
-                    Category.name.ilike(f'%{search}%'),
-                    Category.notes.ilike(f'%{search}%'),
-                    Category.created_by.ilike(f'%{search}%'),
-                    Category.created_at.ilike(f'%{search}%'),
-                    Category.updated_at.ilike(f'%{search}%')
-                )
-            ).order_by(db.func.count(Clip.id).desc() if order == 'desc' else db.func.count(Clip.id).asc())
-        else:
-            query = Category.query.filter(
-                or_(
-                    Category.id.ilike(f'%{search}%'),
-                    Category.name.ilike(f'%{search}%'),
-                    Category.notes.ilike(f'%{search}%'),
-                    Category.created_by.ilike(f'%{search}%'),
-                    Category.created_at.ilike(f'%{search}%'),
-                    Category.updated_at.ilike(f'%{search}%')
-                )
-            ).order_by(getattr(Category, sort).desc() if order == 'desc' else getattr(Category, sort).asc())
-    else:
-        # Default to sort by id
-        query = Category.query.filter(
-            or_(
-                Category.id.ilike(f'%{search}%'),
-                Category.name.ilike(f'%{search}%'),
-                Category.notes.ilike(f'%{search}%'),
-                Category.created_by.ilike(f'%{search}%'),
-                Category.created_at.ilike(f'%{search}%'),
-                Category.updated_at.ilike(f'%{search}%')
-            )
-        ).order_by(Category.id.desc() if order == 'desc' else Category.id.asc())
-    # Default to page 1 if page number isn't valid
-    if page > math.ceil(query.count()/size) or page < 1:
-        page = 1
-    categories = db.paginate(query, page=page, per_page=size, error_out=False)
+    page, size, order, sort, search = get_table_args('categories', category_table.default_order)
+    categories = category_table.paginate(page, size, order, sort, search)
     pages = categories.iter_pages(left_edge=2, left_current=1, right_edge=2, right_current=1)
     
-    return render_template('dash/categories/categories.html', title='Dashboard - Categories', categories=categories, page=page, pages=pages, size=size, order=order, sort=sort, search=search, columns=columns)
+    return render_template('dash/categories/categories.html', title='Dashboard - Categories', categories=categories, page=categories.page, pages=pages, size=size, order=order, sort=sort, search=search, columns=category_table.columns)
 
 @bp.route('/dashboard/categories/create', methods=['GET', 'POST'])
 @login_required
@@ -911,67 +755,11 @@ def dash_categories_delete(id):
 @login_required
 @rank_required('SUPERADMIN', 'ADMIN', 'MODERATOR')
 def dash_themes():
-    filters = get_session_filters('themes')
-    page = get_value(request.args.get('page', type=int), filters.get('page') if filters else None, 1)
-    size = get_value(request.args.get('size', type=int), filters.get('size') if filters else None, 20)
-    order = get_value(request.args.get('order', type=str), filters.get('order') if filters else None, 'asc')
-    sort = get_value(request.args.get('sort', type=str), filters.get('sort') if filters else None, 'id')
-    search = get_value(request.args.get('search', type=str), filters.get('search') if filters else None, '')
-    set_session_filters('themes', page, size, order, sort, search)
-    columns = {
-        'id': 'ID',
-        'name': 'Name',
-        'clips': 'Clips',
-        'notes': 'Notes',
-        'created_by': 'Created By',
-        'created_at': 'Created At',
-        'updated_by': 'Updated By',
-        'updated_at': 'Updated At'
-    }
-    # Make sure the sort input is valid
-    if sort in columns.keys():
-        # Sorting by clip count requires joining Clip and Theme tables
-        if sort == 'clips':
-            query = Theme.query.outerjoin(clip_themes, Theme.id == clip_themes.c.theme_id).outerjoin(Clip, Clip.id == clip_themes.c.clip_id).group_by(Theme.id).filter(
-                or_(
-                    Theme.id.ilike(f'%{search}%'),
-                    Theme.name.ilike(f'%{search}%'),
-                    Theme.notes.ilike(f'%{search}%'),
-                    Theme.created_by.ilike(f'%{search}%'),
-                    Theme.created_at.ilike(f'%{search}%'),
-                    Theme.updated_at.ilike(f'%{search}%')
-                )
-            ).order_by(db.func.count(Clip.id).desc() if order == 'desc' else db.func.count(Clip.id).asc())
-        else:
-            query = Theme.query.filter(
-                or_(
-                    Theme.id.ilike(f'%{search}%'),
-                    Theme.name.ilike(f'%{search}%'),
-                    Theme.notes.ilike(f'%{search}%'),
-                    Theme.created_by.ilike(f'%{search}%'),
-                    Theme.created_at.ilike(f'%{search}%'),
-                    Theme.updated_at.ilike(f'%{search}%')
-                )
-            ).order_by(getattr(Theme, sort).desc() if order == 'desc' else getattr(Theme, sort).asc())
-    else:
-        # Default to sort by id
-        query = Theme.query.filter(
-            or_(
-                Theme.id.ilike(f'%{search}%'),
-                Theme.name.ilike(f'%{search}%'),
-                Theme.notes.ilike(f'%{search}%'),
-                Theme.created_by.ilike(f'%{search}%'),
-                Theme.created_at.ilike(f'%{search}%'),
-                Theme.updated_at.ilike(f'%{search}%')
-            )
-        ).order_by(Theme.id.desc() if order == 'desc' else Theme.id.asc())
-    # Default to page 1 if page number isn't valid
-    if page > math.ceil(query.count()/size) or page < 1:
-        page = 1
-    themes = db.paginate(query, page=page, per_page=size, error_out=False)
+    page, size, order, sort, search = get_table_args('themes', theme_table.default_order)
+    themes = theme_table.paginate(page, size, order, sort, search)
     pages = themes.iter_pages(left_edge=2, left_current=1, right_edge=2, right_current=1)
     
-    return render_template('dash/themes/themes.html', title='Dashboard - Themes', themes=themes, page=page, pages=pages, size=size, order=order, sort=sort, search=search, columns=columns)
+    return render_template('dash/themes/themes.html', title='Dashboard - Themes', themes=themes, page=themes.page, pages=pages, size=size, order=order, sort=sort, search=search, columns=theme_table.columns)
 
 @bp.route('/dashboard/themes/create', methods=['GET', 'POST'])
 @login_required
@@ -1077,81 +865,12 @@ def dash_themes_delete(id):
 @login_required
 @rank_required('SUPERADMIN', 'ADMIN', 'MODERATOR')
 def dash_subjects():
-    filters = get_session_filters('subjects')
-    page = get_value(request.args.get('page', type=int), filters.get('page') if filters else None, 1)
-    size = get_value(request.args.get('size', type=int), filters.get('size') if filters else None, 20)
-    order = get_value(request.args.get('order', type=str), filters.get('order') if filters else None, 'asc')
-    sort = get_value(request.args.get('sort', type=str), filters.get('sort') if filters else None, 'id')
-    search = get_value(request.args.get('search', type=str), filters.get('search') if filters else None, '')
-    set_session_filters('subjects', page, size, order, sort, search)
-    columns = {
-        'id': 'ID',
-        'name': 'Name',
-        'category_id': 'Category',
-        'clips': 'Clips',
-        'subtext': 'Subtext',
-        'keywords': 'Keywords',
-        'notes': 'Notes',
-        'public': 'Public',
-        'created_by': 'Created By',
-        'created_at': 'Created At',
-        'updated_by': 'Updated By',
-        'updated_at': 'Updated At'
-    }
-    # Make sure the sort input is valid
-    if sort in columns.keys():
-        # Sorting by clip count requires joining Clip and Subject tables
-        if sort == 'clips':
-            query = Subject.query.outerjoin(clip_subjects, Subject.id == clip_subjects.c.subject_id).outerjoin(Clip, Clip.id == clip_subjects.c.clip_id).group_by(Subject.id).filter(
-                or_(
-                    Subject.id.ilike(f'%{search}%'),
-                    Subject.name.ilike(f'%{search}%'),
-                    # TODO Subject.category_id.name.ilike(f'%{search}%'),
-                    Subject.subtext.ilike(f'%{search}%'),
-                    Subject.keywords.ilike(f'%{search}%'),
-                    Subject.notes.ilike(f'%{search}%'),
-                    Subject.created_by.ilike(f'%{search}%'),
-                    Subject.created_at.ilike(f'%{search}%'),
-                    Subject.updated_at.ilike(f'%{search}%')
-                )
-            ).order_by(db.func.count(Clip.id).desc() if order == 'desc' else db.func.count(Clip.id).asc())
-        else:
-            query = Subject.query.filter(
-                or_(
-                    Subject.id.ilike(f'%{search}%'),
-                    Subject.name.ilike(f'%{search}%'),
-                    # TODO Subject.category_id.name.ilike(f'%{search}%'),
-                    Subject.subtext.ilike(f'%{search}%'),
-                    Subject.keywords.ilike(f'%{search}%'),
-                    Subject.notes.ilike(f'%{search}%'),
-                    Subject.created_by.ilike(f'%{search}%'),
-                    Subject.created_at.ilike(f'%{search}%'),
-                    Subject.updated_at.ilike(f'%{search}%')
-                )
-            ).order_by(getattr(Subject, sort).desc() if order == 'desc' else getattr(Subject, sort).asc())
-    else:
-        # Default to sort by id
-        query = Subject.query.filter(
-            or_(
-                Subject.id.ilike(f'%{search}%'),
-                Subject.name.ilike(f'%{search}%'),
-                # TODO Subject.category_id.name.ilike(f'%{search}%'),
-                Subject.subtext.ilike(f'%{search}%'),
-                Subject.keywords.ilike(f'%{search}%'),
-                Subject.notes.ilike(f'%{search}%'),
-                Subject.created_by.ilike(f'%{search}%'),
-                Subject.created_at.ilike(f'%{search}%'),
-                Subject.updated_at.ilike(f'%{search}%')
-            )
-        ).order_by(Subject.id.desc() if order == 'desc' else Subject.id.asc())
-    # Default to page 1 if page number isn't valid
-    if page > math.ceil(query.count()/size) or page < 1:
-        page = 1
-    subjects = db.paginate(query, page=page, per_page=size, error_out=False)
+    page, size, order, sort, search = get_table_args('subjects', subject_table.default_order)
+    subjects = subject_table.paginate(page, size, order, sort, search)
     pages = subjects.iter_pages(left_edge=2, left_current=1, right_edge=2, right_current=1)
     
-    return render_template('dash/subjects/subjects.html', title='Dashboard - Subjects', subjects=subjects, page=page, pages=pages, size=size, order=order, sort=sort, search=search, columns=columns)
-    
+    return render_template('dash/subjects/subjects.html', title='Dashboard - Subjects', subjects=subjects, page=subjects.page, pages=pages, size=size, order=order, sort=sort, search=search, columns=subject_table.columns)
+
 @bp.route('/dashboard/subjects/create', methods=['GET', 'POST'])
 @login_required
 @rank_required('SUPERADMIN', 'ADMIN')
@@ -1271,68 +990,12 @@ def dash_subjects_delete(id):
 @login_required
 @rank_required('SUPERADMIN', 'ADMIN', 'MODERATOR')
 def dash_subject_categories():
-    filters = get_session_filters('subject_categories')
-    page = get_value(request.args.get('page', type=int), filters.get('page') if filters else None, 1)
-    size = get_value(request.args.get('size', type=int), filters.get('size') if filters else None, 20)
-    order = get_value(request.args.get('order', type=str), filters.get('order') if filters else None, 'asc')
-    sort = get_value(request.args.get('sort', type=str), filters.get('sort') if filters else None, 'id')
-    search = get_value(request.args.get('search', type=str), filters.get('search') if filters else None, '')
-    set_session_filters('subject_categories', page, size, order, sort, search)
-    columns = {
-        'id': 'ID',
-        'name': 'Name',
-        'subjects': 'Subjects',
-        'notes': 'Notes',
-        'created_by': 'Created By',
-        'created_at': 'Created At',
-        'updated_by': 'Updated By',
-        'updated_at': 'Updated At'
-    }
-    # Make sure the sort input is valid
-    if sort in columns.keys():
-        # Sorting by subject count requires joining Subject and SubjectCategory tables
-        if sort == 'clips':
-            query = SubjectCategory.query.outerjoin(Subject, SubjectCategory.id == Subject.category_id).group_by(SubjectCategory.id).filter(
-                or_(
-                    SubjectCategory.id.ilike(f'%{search}%'),
-                    SubjectCategory.name.ilike(f'%{search}%'),
-                    SubjectCategory.notes.ilike(f'%{search}%'),
-                    SubjectCategory.created_by.ilike(f'%{search}%'),
-                    SubjectCategory.created_at.ilike(f'%{search}%'),
-                    SubjectCategory.updated_at.ilike(f'%{search}%')
-                )
-            ).order_by(db.func.count(Subject.id).desc() if order == 'desc' else db.func.count(Subject.id).asc())
-        else:
-            query = SubjectCategory.query.filter(
-                or_(
-                    SubjectCategory.id.ilike(f'%{search}%'),
-                    SubjectCategory.name.ilike(f'%{search}%'),
-                    SubjectCategory.notes.ilike(f'%{search}%'),
-                    SubjectCategory.created_by.ilike(f'%{search}%'),
-                    SubjectCategory.created_at.ilike(f'%{search}%'),
-                    SubjectCategory.updated_at.ilike(f'%{search}%')
-                )
-            ).order_by(getattr(SubjectCategory, sort).desc() if order == 'desc' else getattr(SubjectCategory, sort).asc())
-    else:
-        # Default to sort by id
-        query = SubjectCategory.query.filter(
-            or_(
-                SubjectCategory.id.ilike(f'%{search}%'),
-                SubjectCategory.name.ilike(f'%{search}%'),
-                SubjectCategory.notes.ilike(f'%{search}%'),
-                SubjectCategory.created_by.ilike(f'%{search}%'),
-                SubjectCategory.created_at.ilike(f'%{search}%'),
-                SubjectCategory.updated_at.ilike(f'%{search}%')
-            )
-        ).order_by(SubjectCategory.id.desc() if order == 'desc' else SubjectCategory.id.asc())
-    # Default to page 1 if page number isn't valid
-    if page > math.ceil(query.count()/size) or page < 1:
-        page = 1
-    subject_categories = db.paginate(query, page=page, per_page=size, error_out=False)
+    page, size, order, sort, search = get_table_args('subject_categories', subject_category_table.default_order)
+    subject_categories = subject_category_table.paginate(page, size, order, sort, search)
     pages = subject_categories.iter_pages(left_edge=2, left_current=1, right_edge=2, right_current=1)
     
-    return render_template('dash/subject_categories/subject_categories.html', title='Dashboard - Subject Categories', subject_categories=subject_categories, page=page, pages=pages, size=size, order=order, sort=sort, search=search, columns=columns)
-   
+    return render_template('dash/subject_categories/subject_categories.html', title='Dashboard - Subject Categories', subject_categories=subject_categories, page=subject_categories.page, pages=pages, size=size, order=order, sort=sort, search=search, columns=subject_category_table.columns)
+
 @bp.route('/dashboard/subject_categories/create', methods=['GET', 'POST'])
 @login_required
 @rank_required('SUPERADMIN', 'ADMIN')
@@ -1439,81 +1102,12 @@ def dash_subject_categories_delete(id):
 @login_required
 @rank_required('SUPERADMIN', 'ADMIN', 'MODERATOR')
 def dash_statuslabels():
-    filters = get_session_filters('statuslabels')
-    page = get_value(request.args.get('page', type=int), filters.get('page') if filters else None, 1)
-    size = get_value(request.args.get('size', type=int), filters.get('size') if filters else None, 20)
-    order = get_value(request.args.get('order', type=str), filters.get('order') if filters else None, 'asc')
-    sort = get_value(request.args.get('sort', type=str), filters.get('sort') if filters else None, 'id')
-    search = get_value(request.args.get('search', type=str), filters.get('search') if filters else None, '')
-    set_session_filters('statuslabels', page, size, order, sort, search)
-    columns = {
-        'id': 'ID',
-        'name': 'Name',
-        'type': 'Status Type',
-        'clips': 'Clips',
-        'color': 'Color',
-        'notes': 'Notes',
-        'created_by': 'Created By',
-        'created_at': 'Created At',
-        'updated_by': 'Updated By',
-        'updated_at': 'Updated At'
-    }
-    # Make sure the sort input is valid
-    if sort in columns.keys():
-        # Sorting by clip count requires joining Clip and Status tables
-        if sort == 'clips':
-            query = Status.query.outerjoin(Clip, Status.id == Clip.status_id).group_by(Status.id).filter(
-                or_(
-                    Status.id.ilike(f'%{search}%'),
-                    Status.name.ilike(f'%{search}%'),
-                    Status.type.ilike(f'%{search}%'),
-                    Status.color.ilike(f'%{search}%'),
-                    Status.notes.ilike(f'%{search}%'),
-                    Status.created_by.ilike(f'%{search}%'),
-                    Status.created_at.ilike(f'%{search}%'),
-                    Status.updated_at.ilike(f'%{search}%')
-                )
-            ).order_by(func.count(Clip.id).desc() if order == 'desc' else func.count(Clip.id).asc())
-        else:
-            query = Status.query.filter(
-                or_(
-                    Status.id.ilike(f'%{search}%'),
-                    Status.name.ilike(f'%{search}%'),
-                    Status.type.ilike(f'%{search}%'),
-                    Status.color.ilike(f'%{search}%'),
-                    Status.notes.ilike(f'%{search}%'),
-                    Status.created_by.ilike(f'%{search}%'),
-                    Status.created_at.ilike(f'%{search}%'),
-                    Status.updated_at.ilike(f'%{search}%')
-                )
-            ).order_by(getattr(Status, sort).desc() if order == 'desc' else getattr(Status, sort).asc())
-    else:
-        # Default to sort by id
-        query = Status.query.filter(
-            or_(
-                Status.id.ilike(f'%{search}%'),
-                Status.name.ilike(f'%{search}%'),
-                Status.type.ilike(f'%{search}%'),
-                Status.color.ilike(f'%{search}%'),
-                Status.notes.ilike(f'%{search}%'),
-                Status.created_by.ilike(f'%{search}%'),
-                Status.created_at.ilike(f'%{search}%'),
-                Status.updated_at.ilike(f'%{search}%')
-            )
-        ).order_by(Status.id.desc() if order == 'desc' else Status.id.asc())
-
-    # compute clip counts in one query to avoid lazy reload for each status label
-    clip_counts = dict(db.session.query(Clip.status_id, func.count(Clip.id)).group_by(Clip.status_id).all())
-    # Default to page 1 if page number isn't valid
-    if page > math.ceil(query.count()/size) or page < 1:
-        page = 1
-    status_labels = db.paginate(query, page=page, per_page=size, error_out=False)
-    for status in status_labels.items:
-        status.clip_count = clip_counts.get(status.id, 0)
+    page, size, order, sort, search = get_table_args('statuslabels', status_table.default_order)
+    status_labels = status_table.paginate(page, size, order, sort, search)
     pages = status_labels.iter_pages(left_edge=2, left_current=1, right_edge=2, right_current=1)
     
-    return render_template('dash/statuslabels/statuslabels.html', title='Dashboard - Status Labels', status_labels=status_labels, page=page, pages=pages, size=size, order=order, sort=sort, search=search, columns=columns)
-    
+    return render_template('dash/statuslabels/statuslabels.html', title='Dashboard - Status Labels', status_labels=status_labels, page=status_labels.page, pages=pages, size=size, order=order, sort=sort, search=search, columns=status_table.columns)
+
 @bp.route('/dashboard/statuslabels/create', methods=['GET', 'POST'])
 @login_required
 @rank_required('SUPERADMIN', 'ADMIN')
@@ -1547,72 +1141,12 @@ def dash_statuslabels_create():
 @login_required
 @rank_required('SUPERADMIN', 'ADMIN', 'MODERATOR')
 def dash_statuslabels_clips(id):
-    filters = get_session_filters('clips')
-    page = get_value(request.args.get('page', type=int), filters.get('page') if filters else None, 1)
-    size = get_value(request.args.get('size', type=int), filters.get('size') if filters else None, 20)
-    order = get_value(request.args.get('order', type=str), filters.get('order') if filters else None, 'desc')
-    sort = get_value(request.args.get('sort', type=str), filters.get('sort') if filters else None, 'id')
-    search = get_value(request.args.get('search', type=str), filters.get('search') if filters else None, '')
-    set_session_filters('clips', page, size, order, sort, search)
-    columns = {
-        'id': 'ID',
-        'broadcaster_name': 'Broadcaster',
-        'creator_name': 'Creator',
-        'title': 'Title',
-        'title_override': 'Title Override',
-        'view_count': 'Views',
-        'created_at': 'Created At',
-        'duration': 'Duration',
-        'notes': 'Notes',
-        'category': 'Category',
-        'status': 'Status',
-        'themes': 'Themes',
-        'subjects': 'Subjects',
-        'layout': 'Layout',
-        'updated_by': 'Updated By',
-        'updated_at': 'Updated At',
-        'twitch_id': 'Twitch ID',
-    }
+    page, size, order, sort, search = get_table_args('clips', status_clip_table.default_order)
     statuslabel = Status.query.filter(Status.id == id).first()
-    # Make sure the sort input is valid
-    if sort in columns.keys() and sort not in ['category', 'status', 'themes', 'subjects']:
-        query = Clip.query.filter(
-            or_(
-                Clip.twitch_id.ilike(f'%{search}%'),
-                Clip.broadcaster_name.ilike(f'%{search}%'),
-                Clip.creator_name.ilike(f'%{search}%'),
-                Clip.title.ilike(f'%{search}%'),
-                Clip.title_override.ilike(f'%{search}%'),
-                Clip.notes.ilike(f'%{search}%'),
-                # Clip.category.ilike(f'%{search}%'),
-                # Clip.themes.ilike(f'%{search}%'),
-                # Clip.subjects.ilike(f'%{search}%')
-            ),
-            Clip.status_id == id
-        ).order_by(getattr(Clip, sort).desc() if order == 'desc' else getattr(Clip, sort).asc())
-    else:
-        # Default to sort by id
-        query = Clip.query.filter(
-            or_(
-                Clip.twitch_id.ilike(f'%{search}%'),
-                Clip.broadcaster_name.ilike(f'%{search}%'),
-                Clip.creator_name.ilike(f'%{search}%'),
-                Clip.title.ilike(f'%{search}%'),
-                Clip.title_override.ilike(f'%{search}%'),
-                Clip.notes.ilike(f'%{search}%'),
-                # Clip.category.ilike(f'%{search}%'),
-                # Clip.themes.ilike(f'%{search}%'),
-                # Clip.subjects.ilike(f'%{search}%')
-            ),
-            Clip.status_id == id
-        ).order_by(Clip.id.desc() if order == 'desc' else Clip.id.asc())
-    # Default to page 1 if page number isn't valid
-    if page > math.ceil(query.count()/size) or page < 1:
-        page = 1
-    clips = db.paginate(query, page=page, per_page=size, error_out=False)
+    clips = status_clip_table.paginate(page, size, order, sort, search, status_id=id)
     pages = clips.iter_pages(left_edge=2, left_current=1, right_edge=2, right_current=1)
     
-    return render_template('dash/statuslabels/statuslabel_clips.html', title=f'Dashboard - {statuslabel.name}', header=statuslabel.name, clips=clips, page=page, pages=pages, size=size, order=order, sort=sort, search=search, columns=columns)
+    return render_template('dash/statuslabels/statuslabel_clips.html', title=f'Dashboard - {statuslabel.name}', header=statuslabel.name, clips=clips, page=clips.page, pages=pages, size=size, order=order, sort=sort, search=search, columns=status_clip_table.columns)
 
 @bp.route('/dashboard/statuslabels/<id>/edit', methods=['GET', 'POST'])
 @login_required
@@ -1699,67 +1233,11 @@ def dash_statuslabels_delete(id):
 @login_required
 @rank_required('SUPERADMIN', 'ADMIN', 'MODERATOR')
 def dash_layouts():
-    filters = get_session_filters('layouts')
-    page = get_value(request.args.get('page', type=int), filters.get('page') if filters else None, 1)
-    size = get_value(request.args.get('size', type=int), filters.get('size') if filters else None, 20)
-    order = get_value(request.args.get('order', type=str), filters.get('order') if filters else None, 'asc')
-    sort = get_value(request.args.get('sort', type=str), filters.get('sort') if filters else None, 'id')
-    search = get_value(request.args.get('search', type=str), filters.get('search') if filters else None, '')
-    set_session_filters('layouts', page, size, order, sort, search)
-    columns = {
-        'id': 'ID',
-        'name': 'Name',
-        'clips': 'Clips',
-        'notes': 'Notes',
-        'created_by': 'Created By',
-        'created_at': 'Created At',
-        'updated_by': 'Updated By',
-        'updated_at': 'Updated At'
-    }
-    # Make sure the sort input is valid
-    if sort in columns.keys():
-        # Sorting by clip count requires joining Clip and Layout tables
-        if sort == 'clips':
-            query = Layout.query.outerjoin(Clip, Layout.id == Clip.layout_id).group_by(Layout.id).filter(
-                or_(
-                    Layout.id.ilike(f'%{search}%'),
-                    Layout.name.ilike(f'%{search}%'),
-                    Layout.notes.ilike(f'%{search}%'),
-                    Layout.created_by.ilike(f'%{search}%'),
-                    Layout.created_at.ilike(f'%{search}%'),
-                    Layout.updated_at.ilike(f'%{search}%')
-                )
-            ).order_by(db.func.count(Clip.id).desc() if order == 'desc' else db.func.count(Clip.id).asc())
-        else:
-            query = Layout.query.filter(
-                or_(
-                    Layout.id.ilike(f'%{search}%'),
-                    Layout.name.ilike(f'%{search}%'),
-                    Layout.notes.ilike(f'%{search}%'),
-                    Layout.created_by.ilike(f'%{search}%'),
-                    Layout.created_at.ilike(f'%{search}%'),
-                    Layout.updated_at.ilike(f'%{search}%')
-                )
-            ).order_by(getattr(Layout, sort).desc() if order == 'desc' else getattr(Layout, sort).asc())
-    else:
-        # Default to sort by id
-        query = Layout.query.filter(
-            or_(
-                Layout.id.ilike(f'%{search}%'),
-                Layout.name.ilike(f'%{search}%'),
-                Layout.notes.ilike(f'%{search}%'),
-                Layout.created_by.ilike(f'%{search}%'),
-                Layout.created_at.ilike(f'%{search}%'),
-                Layout.updated_at.ilike(f'%{search}%')
-            )
-        ).order_by(Layout.id.desc() if order == 'desc' else Layout.id.asc())
-    # Default to page 1 if page number isn't valid
-    if page > math.ceil(query.count()/size) or page < 1:
-        page = 1
-    layouts = db.paginate(query, page=page, per_page=size, error_out=False)
+    page, size, order, sort, search = get_table_args('layouts', layout_table.default_order)
+    layouts = layout_table.paginate(page, size, order, sort, search)
     pages = layouts.iter_pages(left_edge=2, left_current=1, right_edge=2, right_current=1)
     
-    return render_template('dash/layouts/layouts.html', title='Dashboard - Layouts', layouts=layouts, page=page, pages=pages, size=size, order=order, sort=sort, search=search, columns=columns)
+    return render_template('dash/layouts/layouts.html', title='Dashboard - Layouts', layouts=layouts, page=layouts.page, pages=pages, size=size, order=order, sort=sort, search=search, columns=layout_table.columns)
 
 @bp.route('/dashboard/layouts/create', methods=['GET', 'POST'])
 @login_required
@@ -1865,62 +1343,73 @@ def dash_layouts_delete(id):
 @login_required
 @rank_required('SUPERADMIN', 'ADMIN')
 def dash_reports_activity():
-    filters = get_session_filters('activity')
-    page = get_value(request.args.get('page', type=int), filters.get('page') if filters else None, 1)
-    size = get_value(request.args.get('size', type=int), filters.get('size') if filters else None, 20)
-    order = get_value(request.args.get('order', type=str), filters.get('order') if filters else None, 'desc')
-    sort = get_value(request.args.get('sort', type=str), filters.get('sort') if filters else None, 'id')
-    search = get_value(request.args.get('search', type=str), filters.get('search') if filters else None, '')
-    set_session_filters('activity', page, size, order, sort, search)
-    columns = {
-        'id': 'ID',
-        'timestamp': 'Timestamp',
-        'admin': 'Created By',
-        'action': 'Action',
-        'table_name': 'Table Name',
-        'row_id': 'Row ID',
-        'row_twitch_id': 'Row Twitch ID',
-        'changes_json': 'Changed'
-    }
-    # Make sure the sort input is valid
-    if sort in columns.keys() and sort != 'changes_json':
-        query = ActivityLog.query.filter(
-            or_(
-                ActivityLog.id.ilike(f'%{search}%'),
-                ActivityLog.table_name.ilike(f'%{search}%'),
-                ActivityLog.row_id.ilike(f'%{search}%'),
-                ActivityLog.row_twitch_id.ilike(f'%{search}%'),
-                ActivityLog.timestamp.ilike(f'%{search}%'),
-                ActivityLog.action.ilike(f'%{search}%'),
-                ActivityLog.changes.ilike(f'%{search}%')
-            )
-        ).order_by(getattr(ActivityLog, sort).desc() if order == 'desc' else getattr(ActivityLog, sort).asc())
-    else:
-        # Default to sort by id
-        query = ActivityLog.query.filter(
-            or_(
-                ActivityLog.id.ilike(f'%{search}%'),
-                ActivityLog.table_name.ilike(f'%{search}%'),
-                ActivityLog.row_id.ilike(f'%{search}%'),
-                ActivityLog.row_twitch_id.ilike(f'%{search}%'),
-                ActivityLog.timestamp.ilike(f'%{search}%'),
-                ActivityLog.action.ilike(f'%{search}%'),
-                ActivityLog.changes.ilike(f'%{search}%')
-            )
-        ).order_by(ActivityLog.id.asc() if order == 'asc' else ActivityLog.id.desc())
-    # Default to page 1 if page number isn't valid
-    if page > math.ceil(query.count()/size) or page < 1:
-        page = 1
-    activities = db.paginate(query, page=page, per_page=size, error_out=False)
-    
-    for activity in activities.items:
-        activity.changes_json = None
-        if activity.changes:
-            activity.changes_json = json.loads(activity.changes)
-
+    page, size, order, sort, search = get_table_args('activity', activity_table.default_order)
+    filters = get_activity_filters()
+    activities = activity_table.paginate(page, size, order, sort, search, **activity_criteria(filters))
+    decode_changes(activities.items)
     pages = activities.iter_pages(left_edge=2, left_current=1, right_edge=2, right_current=1)
+    admins = User.query.join(Rank).filter(Rank.name != 'USER').order_by(User.display_name).all()
     
-    return render_template('dash/reports/activity.html', title='Dashboard - Activity Report', activities=activities, page=page, pages=pages, size=size, order=order, sort=sort, search=search, columns=columns)
+    return render_template('dash/reports/activity.html', title='Dashboard - Activity Report', activities=activities, page=activities.page, pages=pages, size=size, order=order, sort=sort, search=search, columns=activity_table.columns,
+                           filters=filters, tables=audited_tables(), actions=ACTIONS, admins=admins)
+
+@bp.route('/dashboard/reports/activity/archive')
+@login_required
+@rank_required('SUPERADMIN', 'ADMIN')
+def dash_reports_activity_archive():
+    # the filters of the activity report, the archive is only read on request
+    filters = get_activity_filters()
+    search = request.args.get('search', '', type=str).strip()
+    activities, truncated = search_archive(activity_criteria(filters), search)
+    return render_template('dash/reports/activity_archive.html', title='Dashboard - Activity Archive',
+                           activities=activities, truncated=truncated, filters=filters, search=search)
+
+@bp.route('/dashboard/reports/activity/<int:id>/details')
+@login_required
+@rank_required('SUPERADMIN', 'ADMIN')
+def dash_reports_activity_details(id):
+    activity = ActivityLog.query.filter(ActivityLog.id == id, ActivityLog.table_name == INGESTION_TABLE).first()
+    if activity is None:
+        abort(404)
+    diffs = get_ingestion_diffs(activity.id)
+    # shaped like activity rows for the changes partial
+    for diff in diffs:
+        diff['changes_json'] = diff.pop('changes')
+    return render_template('dash/reports/activity_details.html', title='Dashboard - Activity Details', activity=activity,
+                           diffs=diffs)
+
+@bp.route('/dashboard/reports/statistics', methods=['GET'])
+@login_required
+@rank_required('SUPERADMIN', 'ADMIN')
+def dash_reports_statistics():
+    today = datetime.now(timezone.utc).date()
+    return render_template('dash/reports/statistics.html', title='Dashboard - Statistics Report', metrics=METRICS,
+                           rollups=ROLLUPS, start=(today - timedelta(days=90)).isoformat(), end=today.isoformat())
+
+@bp.route('/dashboard/reports/statistics/data', methods=['GET'])
+@login_required
+@rank_required('SUPERADMIN', 'ADMIN')
+def dash_reports_statistics_data():
+    try:
+        end = date.fromisoformat(request.args.get('end') or datetime.now(timezone.utc).date().isoformat())
+        start = date.fromisoformat(request.args.get('start') or (end - timedelta(days=90)).isoformat())
+    except ValueError:
+        abort(400)
+    rollup = request.args.get('rollup', 'day')
+    if start > end or rollup not in ROLLUPS:
+        abort(400)
+    metrics = tuple(m for m in request.args.get('metrics', '').split(',') if m in METRICS) or METRICS
+
+    response = make_response(get_series(start, end, rollup, metrics))
+    if is_settled(end):
+        # past days don't change, the browser keeps the answer until a backfill bumps the key
+        response.set_etag(hashlib.sha1(series_key(start, end, rollup, metrics).encode()).hexdigest())
+        response.cache_control.private = True
+        response.cache_control.max_age = SERIES_CACHE_TTL
+        response.make_conditional(request)
+    else:
+        response.cache_control.no_cache = True
+    return response
 
 @bp.route('/dashboard/reports/goaccess', methods=['GET'])
 @login_required
@@ -1933,6 +1422,18 @@ def dash_reports_goaccess():
         now=int(datetime.now(timezone.utc).timestamp())
     )
 
+@bp.route('/dashboard/reports/database/reload-settings', methods=['POST'])
+@login_required
+@rank_required('SUPERADMIN')
+def dash_reload_settings():
+    form = reloadSettingsForm()
+    if form.validate_on_submit():
+        settings.reload()
+        # the other workers and the scheduler pick it up on their next check
+        settings_generation.bump()
+        flash('Settings reloaded', 'success')
+    return redirect(url_for('dash.dash_reports_database'))
+
 @bp.route('/dashboard/reports/database', methods=['GET'])
 @login_required
 @rank_required('SUPERADMIN')
@@ -1987,6 +1488,15 @@ def dash_reports_database():
     """))
     uptime_rows = uptime_result.fetchall()
 
+    # caches are per worker, these numbers only cover the worker serving this page
+    feed_cache = current_app.extensions.get('feed_cache')
+    feed_cache_stats = feed_cache.stats() if feed_cache else None
+    card_cache = current_app.extensions.get('card_cache')
+    card_cache_stats = card_cache.stats() if card_cache else None
+    audit_writer = current_app.extensions.get('audit_writer')
+    audit_writer_stats = audit_writer.stats() if audit_writer else None
+    top_feeds = top_feed_status()
+
     return render_template(
         'dash/reports/database.html',
         title='Dashboard - Database Reports',
@@ -1998,5 +1508,11 @@ def dash_reports_database():
         queries_rows=queries_rows,
         select_rows=select_rows,
         threads_rows=threads_rows,
-        uptime_rows=uptime_rows
+        uptime_rows=uptime_rows,
+        feed_cache_stats=feed_cache_stats,
+        card_cache_stats=card_cache_stats,
+        audit_writer_stats=audit_writer_stats,
+        runtime=settings.metadata(),
+        reload_form=reloadSettingsForm(),
+        top_feeds=top_feeds
     )
\ No newline at end of file
@@ -0,0 +1,314 @@
+import calendar
+from collections import namedtuple
+from datetime import datetime, timedelta
+import sqlalchemy as sa
+from flask import current_app
+from flask_sqlalchemy.pagination import Pagination
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import joinedload, selectinload, with_expression
+from sqlalchemy.sql.util import find_tables
+from app import db
+from app.cache import Generation, TTLCache
+from app.models import *
+
+# bumped after every commit that wrote rows of a listing, counts cached before it are no longer used
+generation = Generation('tables')
+# tables a listing counts rows of or reads in its where, filled in by each Table
+listed_tables = set()
+COUNT_CACHE_SIZE = 512
+# longest search term compared against integer columns, anything longer can't be an id
+MAX_INTEGER_DIGITS = 18
+# prefixes of an ISO timestamp a search can give, with the span each one covers
+DATETIME_FORMATS = (('%Y-%m-%d %H:%M:%S', timedelta(seconds=1)), ('%Y-%m-%d %H:%M', timedelta(minutes=1)),
+                    ('%Y-%m-%d %H', timedelta(hours=1)), ('%Y-%m-%d', timedelta(days=1)), ('%Y-%m', 'month'), ('%Y', 'year'))
+BOOLEAN_TERMS = {'true': True, 'yes': True, '1': True, 'false': False, 'no': False, '0': False}
+
+# rows of another table pointing at each listed row, foreign_key matched against key (the row's id by default)
+Count = namedtuple('Count', 'attribute foreign_key key', defaults=(None,))
+
+def datetime_range(term):
+    # the timestamps a date or time prefix such as 2024-05 or 2024-05-17 12 stands for
+    term = term.replace('T', ' ')
+    for format, span in DATETIME_FORMATS:
+        try:
+            start = datetime.strptime(term, format)
+        except ValueError:
+            continue
+        if span == 'month':
+            return start, start + timedelta(days=calendar.monthrange(start.year, start.month)[1])
+        if span == 'year':
+            return start, start.replace(year=start.year + 1)
+        return start, start + span
+    return None
+
+def search_predicate(column, term):
+    """Predicate matching term against column according to its type, None when term can't match it.
+
+    Text contains the term, numbers and booleans are compared for equality and
+    timestamps fall in the range of the date prefix, so their indexes stay usable.
+    """
+    column_type = column.type
+    if isinstance(column_type, sa.Boolean):
+        value = BOOLEAN_TERMS.get(term.lower())
+        return None if value is None else column == value
+    if isinstance(column_type, sa.Integer):
+        return column == int(term) if term.isdigit() and len(term) <= MAX_INTEGER_DIGITS else None
+    if isinstance(column_type, (sa.DateTime, sa.Date)):
+        span = datetime_range(term)
+        if span is None:
+            return None
+        if isinstance(column_type, sa.DateTime):
+            return (column >= span[0]) & (column < span[1])
+        return (column >= span[0].date()) & (column < span[1].date())
+    if isinstance(column_type, sa.String):
+        return column.icontains(term, autoescape=True)
+    return None
+
+class TablePagination(Pagination):
+    # items of the page from the listing query, the total from the cached count
+    def _query_items(self):
+        query = self._query_args['query']
+        return db.session.scalars(query.limit(self.per_page).offset(self._query_offset)).all()
+
+    def _query_count(self):
+        return self._query_args['total']
+
+class Table:
+    """Declaration of a dashboard listing and the queries behind it.
+
+    columns are the headings, search the columns a search term is matched
+    against, sorts maps headings that aren't plain columns of the model to the
+    expression they sort by, options load what the rows show and counts fill
+    query expressions with the number of related rows. where restricts every
+    page, e.g. to clips that aren't hidden. filters name the predicates a page
+    can be narrowed with besides equality on a column, such as a date range.
+    """
+
+    def __init__(self, name, model, columns, search=(), sorts=None, options=(), counts=None, where=(), filters=None,
+                 default_order='asc'):
+        self.name = name
+        self.model = model
+        self.columns = columns
+        self.search = search
+        self.options = options
+        self.counts = counts or {}
+        self.where = where
+        self.filters = filters or {}
+        self.default_order = default_order
+        mapped = sa.inspect(model).columns
+        self.sorts = {key: getattr(model, key) for key in columns if key in mapped}
+        self.sorts.update(sorts or {})
+        listed_tables.add(sa.inspect(model).local_table)
+        for clause in where:
+            listed_tables.update(find_tables(clause, check_columns=True))
+
+    def criteria(self, search, filter_by):
+        criteria = list(self.where)
+        criteria += [self.filters[key](value) if key in self.filters else getattr(self.model, key) == value
+                     for key, value in filter_by]
+        search = search.strip()
+        if search:
+            predicates = [predicate for predicate in (search_predicate(column, search) for column in self.search)
+                          if predicate is not None]
+            criteria.append(sa.or_(*predicates) if predicates else sa.false())
+        return criteria
+
+    def count(self, search, filter_by):
+        # counted once per search term until some process commits a change or the entry expires
+        key = (self.name, search.strip(), filter_by, generation.current())
+        return get_count_cache().get_or_set(key, lambda: db.session.scalar(
+            select(func.count()).select_from(self.model).where(*self.criteria(search, filter_by))))
+
+    def query(self, search, filter_by, sort, order):
+        query = select(self.model).where(*self.criteria(search, filter_by)).options(*self.options)
+        sorts = dict(self.sorts)
+        for key, count in self.counts.items():
+            # correlated so an expired row can refresh it on its own, only the rows of the page are counted
+            # unless the page is sorted by it
+            owner = self.model.id if count.key is None else count.key
+            value = select(func.count()).where(count.foreign_key == owner).scalar_subquery()
+            query = query.options(with_expression(count.attribute, value))
+            sorts[key] = value
+        column = sorts.get(sort, self.model.id)
+        query = query.order_by(column.desc() if order == 'desc' else column.asc())
+        if column is not self.model.id:
+            # ties keep the same order from one page to the next
+            query = query.order_by(self.model.id.desc() if order == 'desc' else self.model.id.asc())
+        # rows already in the session, e.g. from the sidebar, get their counts too
+        return query.execution_options(populate_existing=True)
+
+    def paginate(self, page, size, order, sort, search, **filter_by):
+        """One page of the listing, the first page when page is past the end."""
+        filter_by = tuple(sorted(filter_by.items()))
+        total = self.count(search, filter_by)
+        size = size if size and size > 0 else 20
+        if page < 1 or (page - 1) * size >= total:
+            page = 1
+        return TablePagination(page=page, per_page=size, max_per_page=None, error_out=False, total=total,
+                               query=self.query(search, filter_by, sort, order))
+
+def get_count_cache():
+    if 'table_counts' not in current_app.extensions:
+        current_app.extensions['table_counts'] = TTLCache(current_app.config.get('TABLE_COUNT_CACHE_TTL', 300), COUNT_CACHE_SIZE)
+    return current_app.extensions['table_counts']
+
+def changes_listing(session, obj):
+    if sa.inspect(obj).mapper.local_table not in listed_tables:
+        return False
+    # a row can be dirty for a value set back to itself, that moves no count
+    return obj not in session.dirty or session.is_modified(obj, include_collections=False)
+
+def after_flush_listener(session, flush_context):
+    # new, dirty and deleted still hold what was flushed
+    if any(changes_listing(session, obj) for objects in (session.new, session.dirty, session.deleted) for obj in objects):
+        session.info['tables_changed'] = True
+
+def after_commit_listener(session):
+    if session.info.pop('tables_changed', False):
+        generation.bump()
+
+def after_rollback_listener(session, previous_transaction):
+    session.info.pop('tables_changed', None)
+
+def register_table_listeners():
+    if not event.contains(db.session, 'after_flush', after_flush_listener):
+        event.listen(db.session, 'after_flush', after_flush_listener)
+        event.listen(db.session, 'after_commit', after_commit_listener)
+        event.listen(db.session, 'after_soft_rollback', after_rollback_listener)
+
+CLIP_COLUMNS = {
+    'id': 'ID',
+    'broadcaster_name': 'Broadcaster',
+    'creator_name': 'Creator',
+    'title': 'Title',
+    'title_override': 'Title Override',
+    'view_count': 'Views',
+    'created_at': 'Created At',
+    'duration': 'Duration',
+    'notes': 'Notes',
+    'category': 'Category',
+    'status': 'Status',
+    'themes': 'Themes',
+    'subjects': 'Subjects',
+    'layout': 'Layout',
+    'updated_by': 'Updated By',
+    'updated_at': 'Updated At',
+    'twitch_id': 'Twitch ID',
+}
+CLIP_SEARCH = (Clip.twitch_id, Clip.broadcaster_name, Clip.creator_name, Clip.title, Clip.title_override, Clip.notes)
+CLIP_OPTIONS = (joinedload(Clip.category), joinedload(Clip.status), joinedload(Clip.layout), joinedload(Clip.updated_by_user),
+                selectinload(Clip.themes), selectinload(Clip.subjects))
+
+def taxonomy_table(name, model, columns, clip_key, search=(), options=()):
+    # the taxonomy listings only differ in a few columns of their own
+    return Table(name, model, columns,
+                 search=(model.id, model.name, *search, model.notes, model.created_by, model.created_at, model.updated_at),
+                 options=(joinedload(model.created_by_user), joinedload(model.updated_by_user), *options),
+                 counts={'clips': Count(model.clip_count, clip_key)})
+
+# NOT IN lets the database walk clips in id order, an IN list of the visible statuses had it sort them all first
+clip_table = Table('clips', Clip, CLIP_COLUMNS, search=CLIP_SEARCH, options=CLIP_OPTIONS,
+                   sorts={'category': Clip.category_id, 'status': Clip.status_id, 'layout': Clip.layout_id},
+                   where=(Clip.status_id.not_in(select(Status.id).where(Status.type == 'Hidden')),), default_order='desc')
+# the clips of one status label, hidden ones included
+status_clip_table = Table('status_clips', Clip, CLIP_COLUMNS, search=CLIP_SEARCH, options=CLIP_OPTIONS,
+                          sorts={'category': Clip.category_id, 'status': Clip.status_id, 'layout': Clip.layout_id},
+                          default_order='desc')
+user_table = Table('users', User, {
+    'id': 'ID',
+    'twitch_id': 'Twitch ID',
+    'display_name': 'Name',
+    'contributions': 'Contributions',
+    'clips': 'Clips',
+    'notes': 'Notes',
+    'rank': 'Rank',
+    'login_enabled': 'Login Enabled',
+    'last_verified': 'Last Login',
+    'updated_by': 'Updated By',
+    'updated_at': 'Updated At'
+}, search=(User.twitch_id, User.display_name, User.notes, User.login_enabled),
+    sorts={'rank': User.rank_id}, options=(joinedload(User.rank), joinedload(User.updated_by_user)),
+    counts={'clips': Count(User.clip_count, Clip.creator_id, User.twitch_id)})
+category_table = taxonomy_table('categories', Category, {
+    'id': 'ID',
+    'name': 'Name',
+    'clips': 'Clips',
+    'notes': 'Notes',
+    'created_by': 'Created By',
+    'created_at': 'Created At',
+    'updated_by': 'Updated By',
+    'updated_at': 'Updated At'
+}, Clip.category_id)
+theme_table = taxonomy_table('themes', Theme, {
+    'id': 'ID',
+    'name': 'Name',
+    'clips': 'Clips',
+    'notes': 'Notes',
+    'created_by': 'Created By',
+    'created_at': 'Created At',
+    'updated_by': 'Updated By',
+    'updated_at': 'Updated At'
+}, clip_themes.c.theme_id)
+subject_table = taxonomy_table('subjects', Subject, {
+    'id': 'ID',
+    'name': 'Name',
+    'category_id': 'Category',
+    'clips': 'Clips',
+    'subtext': 'Subtext',
+    'keywords': 'Keywords',
+    'notes': 'Notes',
+    'public': 'Public',
+    'created_by': 'Created By',
+    'created_at': 'Created At',
+    'updated_by': 'Updated By',
+    'updated_at': 'Updated At'
+}, clip_subjects.c.subject_id, search=(Subject.subtext, Subject.keywords), options=(joinedload(Subject.category),))
+status_table = taxonomy_table('statuslabels', Status, {
+    'id': 'ID',
+    'name': 'Name',
+    'type': 'Status Type',
+    'clips': 'Clips',
+    'color': 'Color',
+    'notes': 'Notes',
+    'created_by': 'Created By',
+    'created_at': 'Created At',
+    'updated_by': 'Updated By',
+    'updated_at': 'Updated At'
+}, Clip.status_id, search=(Status.type, Status.color))
+layout_table = taxonomy_table('layouts', Layout, {
+    'id': 'ID',
+    'name': 'Name',
+    'clips': 'Clips',
+    'notes': 'Notes',
+    'created_by': 'Created By',
+    'created_at': 'Created At',
+    'updated_by': 'Updated By',
+    'updated_at': 'Updated At'
+}, Clip.layout_id)
+subject_category_table = Table('subject_categories', SubjectCategory, {
+    'id': 'ID',
+    'name': 'Name',
+    'subjects': 'Subjects',
+    'notes': 'Notes',
+    'created_by': 'Created By',
+    'created_at': 'Created At',
+    'updated_by': 'Updated By',
+    'updated_at': 'Updated At'
+}, search=(SubjectCategory.id, SubjectCategory.name, SubjectCategory.notes, SubjectCategory.created_by,
+           SubjectCategory.created_at, SubjectCategory.updated_at),
+    options=(joinedload(SubjectCategory.created_by_user), joinedload(SubjectCategory.updated_by_user)),
+    counts={'subjects': Count(SubjectCategory.subject_count, Subject.category_id)})
+# table, action and admin are filters of their own, the changes text is left out as matching it meant reading every row
+activity_table = Table('activity', ActivityLog, {
+    'id': 'ID',
+    'timestamp': 'Timestamp',
+    'admin': 'Created By',
+    'action': 'Action',
+    'table_name': 'Table Name',
+    'row_id': 'Row ID',
+    'row_twitch_id': 'Row Twitch ID',
+    'changes_json': 'Changed'
+}, search=(ActivityLog.id, ActivityLog.row_id, ActivityLog.row_twitch_id, ActivityLog.timestamp),
+    sorts={'admin': ActivityLog.admin_id}, options=(joinedload(ActivityLog.admin),),
+    filters={'since': lambda value: ActivityLog.timestamp >= value, 'until': lambda value: ActivityLog.timestamp < value},
+    default_order='desc')
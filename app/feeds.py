@@ -0,0 +1,117 @@
+import json
+from collections import namedtuple
+import sqlalchemy as sa
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from sqlalchemy import select
+from app import db
+from app.models import *
+
+# preset timeframes of the feed, 'all' has no lower bound
+TIMEFRAME_DAYS = {'24h': 1, '7d': 7, '30d': 30, '1y': 365}
+TOP_FEED_TIMEFRAMES = ('24h', '7d', '30d', '1y', 'all')
+# sort column of each precomputed feed, all of them descending with ties broken by clip id
+TOP_FEED_SORTS = {
+    'views': Clip.view_count,
+    'new': Clip.created_at,
+    'likes': Clip.upvote_count
+}
+
+# columns a clip card shows, selected on their own instead of loading whole Clip entities
+CARD_COLUMNS = (Clip.id, Clip.twitch_id, Clip.url, Clip.embed_url, Clip.broadcaster_name, Clip.creator_name,
+                Clip.title, Clip.title_override, Clip.view_count, Clip.created_at, Clip.thumbnail_url,
+                Clip.duration, Clip.upvote_count, Clip.updated_at, Clip.category_id, Clip.layout_id, Clip.status_id)
+
+# what the feed and clip queue templates render for a clip, tags are taxonomy choices
+# id, updated_at and upvote_count identify the version of the card for the rendered card cache
+ClipCard = namedtuple('ClipCard', 'id twitch_id url embed_url broadcaster_name creator_name title title_override '
+                                  'view_count created_at created_at_epoch thumbnail_url duration '
+                                  'category themes subjects layout status upvotes upvote_count updated_at liked')
+
+def load_tag_choices(association, key, choices, clip_ids):
+    tags = {clip_id: [] for clip_id in clip_ids}
+    for clip_id, tag_id in db.session.execute(
+        select(association.c.clip_id, association.c[key])
+        .where(association.c.clip_id.in_(clip_ids))
+        .order_by(association.c.clip_id, association.c[key])
+    ):
+        # a tag created after the taxonomy was loaded shows up once it reloads
+        if tag_id in choices:
+            tags[clip_id].append(choices[tag_id])
+    return tags
+
+def load_clip_tags(clip_ids, taxonomy):
+    """Theme and subject choices of each clip, one query per association table for the whole page."""
+    if not clip_ids:
+        return {}, {}
+    return (load_tag_choices(clip_themes, 'theme_id', taxonomy.by_id['theme'], clip_ids),
+            load_tag_choices(clip_subjects, 'subject_id', taxonomy.by_id['subject'], clip_ids))
+
+def timeframe_start(timeframe, now):
+    days = TIMEFRAME_DAYS.get(timeframe)
+    return now - timedelta(days=days) if days else None
+
+def visible_status_filter():
+    # plain status_id predicate so the (status_id, created_at) and (status_id, view_count) indexes can serve the feed
+    return Clip.status_id.in_(select(Status.id).where(Status.type.not_in(['Hidden', 'Pending'])))
+
+def rebuild_top_feeds():
+    """Store the ordered clip ids of every unfiltered sort and preset timeframe."""
+    # compare against created_at in naive UTC
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    size = current_app.config.get('TOP_FEED_SIZE', 240)
+    rows = []
+    for sort, column in TOP_FEED_SORTS.items():
+        for timeframe in TOP_FEED_TIMEFRAMES:
+            query = select(Clip.id).where(visible_status_filter())
+            start = timeframe_start(timeframe, now)
+            if start:
+                query = query.where(Clip.created_at >= start)
+            # one extra id tells whether the list holds the whole feed
+            clip_ids = db.session.scalars(query.order_by(column.desc(), Clip.id.desc()).limit(size + 1)).all()
+            rows.append({'sort': sort, 'timeframe': timeframe, 'clip_ids': json.dumps(clip_ids[:size]),
+                         'complete': len(clip_ids) <= size, 'built_at': now})
+    # bulk statements replace the lists in one transaction and stay out of the activity log
+    db.session.execute(sa.delete(TopFeed))
+    db.session.execute(sa.insert(TopFeed), rows)
+    db.session.commit()
+
+def is_stale(feed, now):
+    return (now - feed.built_at).total_seconds() > current_app.config.get('TOP_FEED_MAX_AGE', 600)
+
+def top_feed_page(sort, timeframe, after_clip_id, per_page):
+    """Clip ids of one page of a precomputed feed and whether the feed goes on after it.
+
+    Returns None when the page has to come from the live query: there is no list
+    for the sort and timeframe, it is older than TOP_FEED_MAX_AGE, the previous page
+    ended on a clip the list doesn't hold or the list ran out.
+    """
+    if sort not in TOP_FEED_SORTS or timeframe not in TOP_FEED_TIMEFRAMES:
+        return None
+    feed = db.session.scalar(select(TopFeed).where(TopFeed.sort == sort, TopFeed.timeframe == timeframe))
+    if feed is None or is_stale(feed, datetime.now(timezone.utc).replace(tzinfo=None)):
+        return None
+    clip_ids = json.loads(feed.clip_ids)
+    start = 0
+    if after_clip_id is not None:
+        try:
+            start = clip_ids.index(after_clip_id) + 1
+        except ValueError:
+            return None
+    page = clip_ids[start:start + per_page]
+    if not page:
+        return None
+    return page, start + per_page < len(clip_ids) or not feed.complete
+
+def top_feed_status():
+    # freshness of every stored list, for the dashboard
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return [{
+        'sort': feed.sort,
+        'timeframe': feed.timeframe,
+        'clips': len(json.loads(feed.clip_ids)),
+        'complete': feed.complete,
+        'built_at': feed.built_at,
+        'age_seconds': int((now - feed.built_at).total_seconds()),
+        'stale': is_stale(feed, now)
+    } for feed in TopFeed.query.order_by(TopFeed.sort, TopFeed.timeframe)]
@@ -1,15 +1,20 @@
-from flask import render_template, render_template_string, send_from_directory, request, session, make_response, current_app
+from flask import render_template, send_from_directory, request, session, make_response, current_app, abort
 from flask_login import current_user
 from datetime import datetime as dt, timedelta, timezone
 from app.main.forms import *
 from app.main import bp
-from dotenv import load_dotenv
 from app.models import *
-from sqlalchemy import func, or_
-import os, json, random
-
-load_dotenv(override=True)
-EMBED_PARENT = os.environ.get('EMBED_PARENT')
+from sqlalchemy import func, or_, and_, select, update, insert, delete
+from sqlalchemy.exc import IntegrityError
+from app.search import search_clips
+from app.taxonomy import get_taxonomy, generation as taxonomy_generation
+from app.cache import TTLCache, likes_generation
+from app.feeds import CARD_COLUMNS, ClipCard, load_clip_tags, timeframe_start, top_feed_page, visible_status_filter
+from app.stats import adjust_counters
+from markupsafe import Markup
+from functools import partial, wraps
+from app.runtime import settings
+import json, random, base64, binascii, hashlib
 
 def format_count(count, type):
     if count < 1000:
@@ -19,32 +24,46 @@ def format_count(count, type):
     elif count < 1_000_000_000:
         return f'{count / 1_000_000:.1f}M {type}s'
 
-def format_upload_date(upload_date_str):
-    upload_date = dt.fromisoformat(upload_date_str.replace('Z', '+00:00'))
-    now = dt.now(timezone.utc)
-    diff = now - upload_date
-    seconds = diff.total_seconds()
-    minutes = seconds // 60
-    hours = minutes // 60
-    days = hours // 24
-    months = days // 30
-    years = months // 12
-
-    if years > 0:
-        return f"{int(years)} year{'s' if years > 1 else ''} ago"
-    elif months > 0:
-        return f"{int(months)} month{'s' if months > 1 else ''} ago"
-    elif days > 0:
-        return f"{int(days)} day{'s' if days > 1 else ''} ago"
-    elif hours > 0:
-        return f"{int(hours)} hour{'s' if hours > 1 else ''} ago"
-    elif minutes > 0:
-        return f"{int(minutes)} minute{'s' if minutes > 1 else ''} ago"
-    else:
-        return f"{int(seconds)} second{'s' if seconds > 1 else ''} ago"
-    
-def format_clips(page, sort, timeframe='7d', category=None, broadcasters=[], themes=[], subjects=[], layout=None, search='', liked=False):
-    now = dt.now(timezone.utc)
+def get_liked_clip_ids(clip_ids):
+    # single lookup against upvotes for the clips on the current page
+    if not clip_ids or not current_user.is_authenticated:
+        return set()
+    return set(db.session.scalars(
+        select(upvotes.c.clip_id).where(upvotes.c.user_id == current_user.id, upvotes.c.clip_id.in_(clip_ids))
+    ))
+
+# Sort key column and direction for each feed sort, ties are broken by clip id in the same direction
+SORT_KEYS = {
+    'views': (Clip.view_count, True),
+    'new': (Clip.created_at, True),
+    'old': (Clip.created_at, False),
+    'likes': (Clip.upvote_count, True)
+}
+
+def encode_cursor(sort, key, clip_id):
+    if isinstance(key, dt):
+        key = key.isoformat()
+    payload = json.dumps([sort, key, clip_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(sort, cursor):
+    # Returns (sort key, clip id) of the last clip on the previous page, or None for the first page
+    if not cursor:
+        return None
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort, key, clip_id = json.loads(payload)
+        if cursor_sort in ('new', 'old'):
+            key = dt.fromisoformat(key)
+    except (binascii.Error, ValueError, TypeError):
+        return None
+    if cursor_sort != sort or not isinstance(clip_id, int):
+        return None
+    return key, clip_id
+
+def format_clips(sort, timeframe='7d', category=None, broadcasters=[], themes=[], subjects=[], layout=None, search='', liked=False, cursor=None):
+    # compare against created_at in naive UTC
+    now = dt.now(timezone.utc).replace(tzinfo=None)
     per_page = 12
     filters = []
     if category:
@@ -59,163 +78,254 @@ def format_clips(page, sort, timeframe='7d', category=None, broadcasters=[], the
         filters.append(Clip.layout_id == layout)
     if liked and current_user.is_authenticated:
         filters.append(Clip.upvoted_by.any(User.id == current_user.id))
+
+    query = select(*CARD_COLUMNS)
+    relevance = None
     if search:
-        search_pattern = f"%{search.strip()}%"
-        filters.append(Clip.title.ilike(search_pattern) | 
-                       Clip.title_override.ilike(search_pattern) |
-                       Clip.broadcaster_name.ilike(search_pattern) | 
-                       Clip.creator_name.ilike(search_pattern) |
-                       Clip.category.has(Category.name.ilike(search_pattern)) |
-                       Clip.themes.any(Theme.name.ilike(search_pattern)) |
-                       Clip.subjects.any(Subject.name.ilike(search_pattern)) |
-                       Clip.layout.has(Layout.name.ilike(search_pattern)))
-    
-    if sort == 'new':
-        order_by = Clip.created_at.desc()
-    elif sort == 'old':
-        order_by = Clip.created_at.asc()
-    elif sort == 'likes':
-        order_by = func.count(upvotes.c.user_id).desc()
+        query, relevance = search_clips(query, search)
+
+    # relevance needs a ranking search backend, otherwise fall back to views
+    if sort == 'relevance' and relevance is not None:
+        sort_column, descending = relevance, True
+    else:
+        if sort not in SORT_KEYS:
+            sort = 'views'
+        sort_column, descending = SORT_KEYS[sort]
+    if descending:
+        order_by = [sort_column.desc(), Clip.id.desc()]
     else:
-        order_by = Clip.view_count.desc()
+        order_by = [sort_column.asc(), Clip.id.asc()]
+
+    # unfiltered feeds are served from the lists the scheduler precomputes when they are fresh
+    last_seen = decode_cursor(sort, cursor)
+    top_page = None
+    if not (filters or search):
+        top_page = top_feed_page(sort, timeframe, last_seen[1] if last_seen else None, per_page)
+
+    # Keyset pagination, continue strictly after the last clip of the previous page
+    keyset = []
+    if last_seen:
+        key, clip_id = last_seen
+        if descending:
+            keyset.append(or_(sort_column < key, and_(sort_column == key, Clip.id < clip_id)))
+        else:
+            keyset.append(or_(sort_column > key, and_(sort_column == key, Clip.id > clip_id)))
     
-    if timeframe == '24h':
-        last_24_hours = now - timedelta(days=1)
-        filters.append(Clip.created_at >= last_24_hours)
-    elif timeframe == '7d':
-        last_7_days = now - timedelta(days=7)
-        filters.append(Clip.created_at >= last_7_days)
-    elif timeframe == '30d':
-        last_30_days = now - timedelta(days=30)
-        filters.append(Clip.created_at >= last_30_days)
-    elif timeframe == '1y':
-        last_1_year = now - timedelta(days=365)
-        filters.append(Clip.created_at >= last_1_year)
+    start = timeframe_start(timeframe, now)
+    if start:
+        filters.append(Clip.created_at >= start)
     elif timeframe.startswith('custom:'):
         # Handle custom date range: custom:YYYY-MM-DD|YYYY-MM-DD
         try:
             date_range = timeframe.split(':', 1)[1]
             start_str, end_str = date_range.split('|')
-            start_date = dt.strptime(start_str, '%Y-%m-%d').replace(tzinfo=timezone.utc)
-            end_date = dt.strptime(end_str, '%Y-%m-%d').replace(tzinfo=timezone.utc) + timedelta(days=1)
+            start_date = dt.strptime(start_str, '%Y-%m-%d')
+            end_date = dt.strptime(end_str, '%Y-%m-%d') + timedelta(days=1)
             filters.append(Clip.created_at >= start_date)
             filters.append(Clip.created_at < end_date)
         except (ValueError, IndexError):
             pass
 
-    filters.append(Clip.status.has(Status.type != 'Hidden'))
-    filters.append(Clip.status.has(Status.type != 'Pending'))
+    filters.append(visible_status_filter())
 
-    if sort == 'likes':
-        query = Clip.query.outerjoin(upvotes).group_by(Clip.id).filter(*filters)
-    else:
-        query = Clip.query.filter(*filters)
-    clips = query.order_by(order_by).paginate(page=page, per_page=per_page, error_out=False)
-
-    formatted_clips = [{
-        'twitch_id': clip.twitch_id,
-        'url': clip.url,
-        'embed_url': clip.embed_url,
-        'broadcaster_name': clip.broadcaster_name,
-        'creator_name': clip.creator_name,
-        'title': clip.title,
-        'title_override': clip.title_override,
-        'view_count': format_count(clip.view_count, 'view'),
-        'created_at': clip.created_at,
-        'created_at_formatted': format_upload_date(clip.created_at),
-        'thumbnail_url': clip.thumbnail_url,
-        'duration': clip.duration,
-        'category': clip.category,
-        'themes': clip.themes,
-        'subjects': clip.subjects,
-        'layout': clip.layout,
-        'status': clip.status,
-        'upvotes': format_count(len(clip.upvoted_by), 'like'),
-        'liked': current_user.is_authenticated and current_user in clip.upvoted_by
-    } for clip in clips.items]
-    has_next = clips.has_next
+    query = query.filter(*filters).add_columns(sort_column.label('sort_key'))
+    rows = None
+    if top_page:
+        page_ids, has_more = top_page
+        rows = db.session.execute(query.filter(Clip.id.in_(page_ids))).all()
+        if len(rows) == len(page_ids):
+            position = {clip_id: index for index, clip_id in enumerate(page_ids)}
+            rows.sort(key=lambda row: position[row.id])
+        else:
+            # a clip was hidden or left the timeframe since the list was built
+            rows = None
+    if rows is None:
+        # fetch one extra row to know if there is a next page without counting
+        rows = db.session.execute(query.filter(*keyset).order_by(*order_by).limit(per_page + 1)).all()
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+    next_cursor = None
+    if has_more and rows:
+        next_cursor = encode_cursor(sort, rows[-1].sort_key, rows[-1].id)
+    clip_ids = [row.id for row in rows]
+    liked_clip_ids = get_liked_clip_ids(clip_ids)
+    # category, layout and status come from the cached taxonomy, themes and subjects from two batched lookups
+    taxonomy = get_taxonomy()
+    theme_choices, subject_choices = load_clip_tags(clip_ids, taxonomy)
+
+    formatted_clips = [ClipCard(
+        id=row.id,
+        twitch_id=row.twitch_id,
+        url=row.url,
+        embed_url=row.embed_url,
+        broadcaster_name=row.broadcaster_name,
+        creator_name=row.creator_name,
+        title=row.title,
+        title_override=row.title_override,
+        view_count=format_count(row.view_count, 'view'),
+        created_at=row.created_at,
+        # created_at is naive UTC, the page turns the epoch into relative text so cached cards don't go stale
+        created_at_epoch=int(row.created_at.replace(tzinfo=timezone.utc).timestamp()),
+        thumbnail_url=row.thumbnail_url,
+        duration=row.duration,
+        category=taxonomy.by_id['category'].get(row.category_id),
+        themes=theme_choices[row.id],
+        subjects=subject_choices[row.id],
+        layout=taxonomy.by_id['layout'].get(row.layout_id),
+        status=taxonomy.by_id['status'].get(row.status_id),
+        upvotes=format_count(row.upvote_count, 'like'),
+        upvote_count=row.upvote_count,
+        updated_at=row.updated_at,
+        liked=row.id in liked_clip_ids
+    ) for row in rows]
     
-    return formatted_clips, has_next
+    return formatted_clips, next_cursor
+
+def get_feed_cache():
+    if 'feed_cache' not in current_app.extensions:
+        current_app.extensions['feed_cache'] = TTLCache(current_app.config.get('FEED_CACHE_TTL', 60))
+    return current_app.extensions['feed_cache']
+
+def clip_data_version():
+    # newest clip edit, an indexed max shared by the fragment validators and the feed cache key
+    return db.session.scalar(select(func.max(Clip.updated_at)))
+
+def feed_cache_key(sort, timeframe, category, broadcasters, themes, subjects, layout, search, liked, cursor):
+    # equivalent filters share an entry, list order, duplicates and surrounding whitespace don't matter
+    canonical = [sort, timeframe, str(category or ''),
+                 sorted({str(b) for b in broadcasters}),
+                 sorted({str(t) for t in themes}),
+                 sorted({str(s) for s in subjects}),
+                 str(layout or ''), search.strip(), bool(liked), cursor or '']
+    # the same data versions as the fragment validators, a cached page never outlives the ETag it is served under
+    versions = [str(clip_data_version()), taxonomy_generation.current(), likes_generation.current()]
+    return json.dumps(canonical + versions)
+
+# rendered cards are keyed on their version, entries expire only to bound memory
+CARD_CACHE_TTL = 3600
+CARD_CACHE_SIZE = 4096
+# stands in for the like button in cached cards, each viewer gets their own button spliced in
+LIKE_BUTTON_SLOT = Markup('<!--like-button-->')
+
+def get_card_cache():
+    if 'card_cache' not in current_app.extensions:
+        current_app.extensions['card_cache'] = TTLCache(CARD_CACHE_TTL, CARD_CACHE_SIZE)
+    return current_app.extensions['card_cache']
+
+def render_card(clip):
+    # the parts around the like button and the button in both states
+    head, tail = render_template('main/clip_card.html', clip=clip, like_button=LIKE_BUTTON_SLOT).split(LIKE_BUTTON_SLOT)
+    unliked, liked = (render_template('main/like_button.html', twitch_id=clip.twitch_id, liked=state, upvotes=clip.upvotes)
+                      for state in (False, True))
+    return head, tail, unliked, liked
+
+def render_cards(clips):
+    """Card HTML for each clip, rendered once per clip version and shared by every viewer."""
+    cache = get_card_cache()
+    # tag renames show up on the cards without touching the clips
+    generation = taxonomy_generation.current()
+    cards = []
+    for clip in clips:
+        head, tail, unliked, liked = cache.get_or_set((clip.id, clip.updated_at, clip.upvote_count, generation),
+                                                      partial(render_card, clip))
+        cards.append(Markup(head + (liked if clip.liked else unliked) + tail))
+    return cards
+
+def render_clips(params, cursor=None, **filters):
+    def render():
+        formatted_clips, next_cursor = format_clips(cursor=cursor, **filters)
+        return Markup(render_template('additional_clips.html', cards=render_cards(formatted_clips), next_cursor=next_cursor, params=params))
+
+    # logged in users see their own likes, anonymous visitors share rendered pages of the feed
+    if current_user.is_authenticated:
+        return render()
+    return get_feed_cache().get_or_set(feed_cache_key(cursor=cursor, **filters), render)
+
+def fragment_validators():
+    # the fragment is a function of the request parameters, the viewer and these data versions
+    data_version = clip_data_version()
+    viewer = str(current_user.id) if current_user.is_authenticated else 'anonymous'
+    parts = [request.path, json.dumps(sorted(request.values.items(multi=True))), str(data_version),
+             taxonomy_generation.current(), likes_generation.current(), viewer]
+    return hashlib.sha1('\n'.join(parts).encode()).hexdigest(), data_version
+
+def conditional_fragment(view):
+    """Answer revalidations of an HTMX fragment with 304 before running the clip query."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method != 'GET':
+            return view(*args, **kwargs)
+        etag, last_modified = fragment_validators()
+        if request.if_none_match.contains_weak(etag):
+            response = make_response('', 304)
+        else:
+            response = make_response(view(*args, **kwargs))
+        response.set_etag(etag)
+        if last_modified:
+            response.last_modified = last_modified.replace(tzinfo=timezone.utc)
+        # shared caches may keep anonymous fragments, everyone has to revalidate before reuse
+        response.cache_control.no_cache = True
+        if current_user.is_authenticated:
+            response.cache_control.private = True
+        else:
+            response.cache_control.public = True
+        response.vary.add('Cookie')
+        return response
+    return wrapper
 
 @bp.route('/like-clip/<twitch_id>', methods=['POST'])
 def like_clip(twitch_id):
-    clip = Clip.query.filter_by(twitch_id=twitch_id).first_or_404()
-    liked = False
+    clip = db.session.execute(select(Clip.id, Clip.upvote_count).where(Clip.twitch_id == twitch_id)).first()
+    if clip is None:
+        abort(404)
     
     if not current_user.is_authenticated:
-        response = make_response(render_template_string("""
-            <span id="like-btn-{{ clip.twitch_id }}">
-                <button class="btn clip-like-btn btn-success" 
-                        type="button"
-                        hx-post="/like-clip/{{ clip.twitch_id }}"
-                        hx-target="#like-btn-{{ clip.twitch_id }}"
-                        hx-swap="outerHTML">
-                    <i class="fa-regular fa-heart"></i>
-                </button>
-                <span class="clip-like-count" id="like-count-{{ clip.twitch_id }}">{{ upvotes }}</span>
-            </span>
-        """, clip=clip, upvotes=format_count(len(clip.upvoted_by), 'like')))
+        response = make_response(render_template('main/like_button.html', twitch_id=twitch_id, liked=False,
+                                                 upvotes=format_count(clip.upvote_count, 'like')))
         response.headers['HX-Trigger'] = json.dumps({"showLoginMessage": "Please log in to like clips"})
         return response
     
-    if current_user.is_authenticated and clip:
-        if current_user in clip.upvoted_by:
-            clip.upvoted_by.remove(current_user)
+    # toggle the single upvotes row, the clip's other upvoters are never loaded
+    upvote = and_(upvotes.c.user_id == current_user.id, upvotes.c.clip_id == clip.id)
+    try:
+        if db.session.execute(delete(upvotes).where(upvote)).rowcount:
+            delta = -1
         else:
-            clip.upvoted_by.append(current_user)
+            db.session.execute(insert(upvotes).values(user_id=current_user.id, clip_id=clip.id))
+            delta = 1
+        # keep the counter in the same transaction as the upvotes row, updated_at is left untouched
+        db.session.execute(
+            update(Clip)
+            .where(Clip.id == clip.id)
+            .values(upvote_count=Clip.upvote_count + delta, updated_at=Clip.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        adjust_counters(db.session.connection(), {'total_upvotes': delta})
+        upvote_count = db.session.scalar(select(Clip.upvote_count).where(Clip.id == clip.id))
         db.session.commit()
-        liked = current_user in clip.upvoted_by
+    except IntegrityError:
+        # a concurrent request from the same user liked the clip first
+        db.session.rollback()
+        delta = 1
+        upvote_count = db.session.scalar(select(Clip.upvote_count).where(Clip.id == clip.id))
+    else:
+        likes_generation.bump()
     
-    return render_template_string("""
-        <span id="like-btn-{{ clip.twitch_id }}">
-            <button class="btn clip-like-btn {% if liked %}btn-danger{% else %}btn-success{% endif %}" 
-                    type="button"
-                    hx-post="/like-clip/{{ clip.twitch_id }}"
-                    hx-target="#like-btn-{{ clip.twitch_id }}"
-                    hx-swap="outerHTML">
-                {% if liked %}
-                    <i class="fa-solid fa-heart"></i>
-                {% else %}
-                    <i class="fa-regular fa-heart"></i>
-                {% endif %}
-            </button>
-            <span class="clip-like-count" id="like-count-{{ clip.twitch_id }}">{{ upvotes }}</span>
-        </span>
-    """, clip=clip, liked=liked, upvotes=format_count(len(clip.upvoted_by), 'like'))
+    return render_template('main/like_button.html', twitch_id=twitch_id, liked=delta > 0,
+                           upvotes=format_count(upvote_count, 'like'))
 
 @bp.route('/favicon.ico')
 def favicon():
     return send_from_directory('static', 'favicon.ico')
 
-VALID_SORTS = {'views', 'new', 'old', 'likes'}
+VALID_SORTS = {'views', 'new', 'old', 'likes', 'relevance'}
 VALID_TIMEFRAMES = {'24h', '7d', '30d', '1y', 'all'}
 
 # Home page
 @bp.route('/', methods=['GET', 'POST'])
 def index():
-    broadcaster_choices = db.session.query(Clip.broadcaster_id, Clip.broadcaster_name).distinct().all()
-    categories = Category.query.order_by('id').all()
-    theme_choices = Theme.query.order_by('id').all()
-    subject_choices = Subject.query.order_by('id').all()
-    layout_choices = Layout.query.order_by('id').all()
-    subject_categories = []
-
-    # Group subjects by category
-    for sc in SubjectCategory.query.order_by('id'):
-        sc_subject_choices = Subject.query.filter(Subject.category_id == sc.id).order_by('id').all()
-        if not sc_subject_choices:
-            continue
-        group_choices = []
-        for su in sc_subject_choices:
-            group_choices.append({
-                'id': su.id, 
-                'name': su.name,
-                'subtext': su.subtext or '',
-                'keywords': su.keywords or ''
-                })
-        subject_categories.append((sc.name, group_choices))
+    taxonomy = get_taxonomy()
     
-    page = 1
     sort = request.args.get('sort', 'views')
     if sort not in VALID_SORTS:
         sort = 'views'
@@ -224,12 +334,12 @@ def index():
         timeframe = '7d'
     category = request.args.get('category', None)
     if category:
-        if not category.isdigit() or not Category.query.get(int(category)):
+        if not category.isdigit() or int(category) not in taxonomy.category_ids:
             category = None
     if category in [None, '', 'null']: category = None
     layout = request.args.get('layout', None)
     if layout:
-        if not layout.isdigit() or not Layout.query.get(int(layout)):
+        if not layout.isdigit() or int(layout) not in taxonomy.layout_ids:
             layout = None
     if layout in [None, '', 'null']: layout = None
     search = request.args.get('search', '')
@@ -283,8 +393,8 @@ def index():
         'liked': liked
     }
 
-    formatted_clips, has_next = format_clips(
-        page=page,
+    clips_html = render_clips(
+        params,
         sort=sort,
         timeframe=timeframe,
         category=category,
@@ -298,15 +408,13 @@ def index():
     return render_template(
         'index.html',
         title='Home',
-        broadcaster_choices=broadcaster_choices,
-        categories=categories,
-        theme_choices=theme_choices,
-        subject_choices=subject_choices,
-        layout_choices=layout_choices,
-        subject_categories=subject_categories,
-        clips=formatted_clips,
-        has_next=has_next,
-        currentPage=2,
+        broadcaster_choices=taxonomy.broadcasters,
+        categories=taxonomy.categories,
+        theme_choices=taxonomy.themes,
+        subject_choices=taxonomy.subjects,
+        layout_choices=taxonomy.layouts,
+        subject_categories=taxonomy.subject_groups,
+        clips_html=clips_html,
         sort=sort,
         timeframe=timeframe,
         selected_category=category,
@@ -315,15 +423,15 @@ def index():
         selected_subjects=subjects,
         selected_layout=layout,
         search=search,
-        liked=liked,
-        params=params
+        liked=liked
     )
 
 # Loads more clips and adds them to the main page as you scroll down
-@bp.route('/load-clips', methods=['POST'])
+@bp.route('/load-clips', methods=['GET', 'POST'])
+@conditional_fragment
 def load_clips():
     # Get the string of params from hx-vals
-    init_params_raw = request.form.get('init_params_json', '{}')
+    init_params_raw = request.values.get('init_params_json', '{}')
     init_params = json.loads(init_params_raw)
     
     # 2. Rebuild current_params by checking form inputs, falling back to init_params
@@ -335,7 +443,7 @@ def load_clips():
         
         if is_list_type:
             # Check if the user selected fields in the form submission
-            form_list = request.form.getlist(key)
+            form_list = request.values.getlist(key)
             form_list = [v for v in form_list if v.strip()] # Clear out empty form defaults
             
             if form_list:
@@ -344,14 +452,14 @@ def load_clips():
                 # Retain the clean list structure: [1, 2, 24, 25]
                 current_params[key] = init_params.get(key, [])
         else:
-            form_value = request.form.get(key, '').strip()
+            form_value = request.values.get(key, '').strip()
             if form_value:
                 current_params[key] = form_value
             else:
                 current_params[key] = init_params.get(key, '')
 
     # Some of this is a bit redundant with the loop above, but I'm keeping it for now to ensure the parameters are in the correct format and validated
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor', None)
     sort = request.values.get('sort', 'views')
     if current_params.get('sort'):
         sort = current_params['sort']
@@ -421,8 +529,9 @@ def load_clips():
         liked = str(current_params['liked']) == '1'
 
     # Sort and paginate
-    formatted_clips, has_next = format_clips(
-        page=page,
+    return render_clips(
+        current_params,
+        cursor=cursor,
         sort=sort,
         timeframe=timeframe,
         category=category,
@@ -433,28 +542,11 @@ def load_clips():
         search=search,
         liked=liked
     )
-    return render_template(
-        'additional_clips.html', 
-        currentPage=page+1, 
-        sort=sort, 
-        timeframe=timeframe,
-        category=category,
-        broadcasters=broadcasters,
-        themes=themes,
-        subjects=subjects,
-        layout=layout,
-        search=search,
-        liked=liked,
-        clips=formatted_clips, 
-        has_next=has_next,
-        params=current_params
-    )
 
 @bp.route('/about')
 def about():
-    static_path = os.path.join(current_app.root_path, 'static')
-    clip_png_files = [f for f in os.listdir(static_path) if f.lower().endswith('.png') and 'clip' in f.lower()] if os.path.exists(static_path) else []
-    cliprepo_image = random.choice(clip_png_files) if clip_png_files else None
+    # the logo list is read once per process, like the one in the page header
+    cliprepo_image = random.choice(settings.clip_logos) if settings.clip_logos else None
     domains = [
         {
             'cliprepo_url': 'https://cliprepo.com',
@@ -500,29 +592,8 @@ def leaderboard():
 
 @bp.route('/clip-queue', methods=['GET'])
 def clip_queue():
-    broadcaster_choices = db.session.query(Clip.broadcaster_id, Clip.broadcaster_name).distinct().all()
-    categories = Category.query.order_by('id').all()
-    theme_choices = Theme.query.order_by('id').all()
-    subject_choices = Subject.query.order_by('id').all()
-    layout_choices = Layout.query.order_by('id').all()
-    subject_categories = []
-
-    # Group subjects by category
-    for sc in SubjectCategory.query.order_by('id'):
-        sc_subject_choices = Subject.query.filter(Subject.category_id == sc.id).order_by('id').all()
-        if not sc_subject_choices:
-            continue
-        group_choices = []
-        for su in sc_subject_choices:
-            group_choices.append({
-                'id': su.id, 
-                'name': su.name,
-                'subtext': su.subtext or '',
-                'keywords': su.keywords or ''
-                })
-        subject_categories.append((sc.name, group_choices))
-
-    page = 1
+    taxonomy = get_taxonomy()
+
     sort = request.args.get('sort', 'views')
     if sort not in VALID_SORTS:
         sort = 'views'
@@ -531,12 +602,12 @@ def clip_queue():
         timeframe = '7d'
     category = request.args.get('category', None)
     if category:
-        if not category.isdigit() or not Category.query.get(int(category)):
+        if not category.isdigit() or int(category) not in taxonomy.category_ids:
              category = None
     if category in [None, '', 'null']: category = None
     layout = request.args.get('layout', None)
     if layout:
-        if not layout.isdigit() or not Layout.query.get(int(layout)):
+        if not layout.isdigit() or int(layout) not in taxonomy.layout_ids:
             layout = None
     if layout in [None, '', 'null']: layout = None
     search = request.args.get('search', '')
@@ -589,8 +660,7 @@ def clip_queue():
         'search': search,
         'liked': liked
     }
-    formatted_clips, _ = format_clips(
-        page=page,
+    formatted_clips, next_cursor = format_clips(
         sort=sort,
         timeframe=timeframe,
         category=category,
@@ -604,29 +674,32 @@ def clip_queue():
     return render_template(
         'main/clip_queue.html',
         title='Clip Queue',
-        categories=categories,
-        broadcaster_choices=broadcaster_choices,
-        theme_choices=theme_choices,
-        subject_choices=subject_choices,
-        layout_choices=layout_choices,
-        subject_categories=subject_categories,
+        categories=taxonomy.categories,
+        broadcaster_choices=taxonomy.broadcasters,
+        theme_choices=taxonomy.themes,
+        subject_choices=taxonomy.subjects,
+        layout_choices=taxonomy.layouts,
+        subject_categories=taxonomy.subject_groups,
         clips=formatted_clips,
         clip_index=0,
         filters=filters,
-        embed_parent=EMBED_PARENT
+        embed_parent=settings.embed_parent,
+        cursors=[''],
+        has_next=next_cursor is not None
     )
 
-@bp.route('/clip-queue/filter', methods=['POST'])
+@bp.route('/clip-queue/filter', methods=['GET', 'POST'])
+@conditional_fragment
 def clip_queue_filter():
-    sort = request.form.get('sort', 'views')
-    timeframe = request.form.get('timeframe', '7d')
-    category = request.form.get('category')
-    broadcasters = request.form.getlist('broadcasters')
-    themes = request.form.getlist('themes')
-    subjects = request.form.getlist('subjects')
-    layout = request.form.get('layout')
-    search = request.form.get('search', '')
-    liked = request.form.get('liked', '0') == '1'
+    sort = request.values.get('sort', 'views')
+    timeframe = request.values.get('timeframe', '7d')
+    category = request.values.get('category')
+    broadcasters = request.values.getlist('broadcasters')
+    themes = request.values.getlist('themes')
+    subjects = request.values.getlist('subjects')
+    layout = request.values.get('layout')
+    search = request.values.get('search', '')
+    liked = request.values.get('liked', '0') == '1'
     filters = {
         'sort': sort,
         'timeframe': timeframe,
@@ -638,8 +711,7 @@ def clip_queue_filter():
         'search': search,
         'liked': liked
     }
-    formatted_clips, has_next = format_clips(
-        page=1,
+    formatted_clips, next_cursor = format_clips(
         sort=sort,
         timeframe=timeframe,
         category=category,
@@ -655,16 +727,27 @@ def clip_queue_filter():
         clips=formatted_clips,
         clip_index=0,
         filters=filters,
-        embed_parent=EMBED_PARENT,
-        page=1,
-        has_next=has_next
+        embed_parent=settings.embed_parent,
+        cursors=[''],
+        has_next=next_cursor is not None
     )
 
-@bp.route('/clip-queue/next', methods=['POST'])
+def get_queue_cursors():
+    # Cursors of every page visited in the clip queue, the current page is last and the first page is ''
+    try:
+        cursors = json.loads(request.values.get('cursors') or '[]')
+    except ValueError:
+        cursors = []
+    if not isinstance(cursors, list) or not cursors:
+        cursors = ['']
+    return [c if isinstance(c, str) else '' for c in cursors]
+
+@bp.route('/clip-queue/next', methods=['GET', 'POST'])
+@conditional_fragment
 def clip_queue_next():
-    clip_index = int(request.form.get('clip_index', 0)) + 1
-    page = int(request.form.get('page', 1))
-    filters = request.form.get('filters')
+    clip_index = int(request.values.get('clip_index', 0)) + 1
+    cursors = get_queue_cursors()
+    filters = request.values.get('filters')
     filters = json.loads(filters) if filters else {}
     sort = filters.get('sort', 'views')
     timeframe = filters.get('timeframe', '7d')
@@ -677,8 +760,7 @@ def clip_queue_next():
     liked = filters.get('liked', False)
 
     # Load current page
-    formatted_clips, has_next = format_clips(
-        page=page,
+    formatted_clips, next_cursor = format_clips(
         sort=sort,
         timeframe=timeframe,
         category=category,
@@ -687,14 +769,14 @@ def clip_queue_next():
         subjects=subjects,
         layout=layout,
         search=search,
-        liked=liked
+        liked=liked,
+        cursor=cursors[-1]
     )
     if clip_index >= len(formatted_clips):
-        if has_next:
+        if next_cursor:
             # Load next page
-            page += 1
-            formatted_clips, has_next = format_clips(
-                page=page,
+            cursors.append(next_cursor)
+            formatted_clips, next_cursor = format_clips(
                 sort=sort,
                 timeframe=timeframe,
                 category=category,
@@ -703,7 +785,8 @@ def clip_queue_next():
                 subjects=subjects,
                 layout=layout,
                 search=search,
-                liked=liked
+                liked=liked,
+                cursor=cursors[-1]
             )
             clip_index = 0
         else:
@@ -714,16 +797,17 @@ def clip_queue_next():
         clips=formatted_clips,
         clip_index=clip_index,
         filters=filters,
-        embed_parent=EMBED_PARENT,
-        page=page,
-        has_next=has_next
+        embed_parent=settings.embed_parent,
+        cursors=cursors,
+        has_next=next_cursor is not None
     )
 
-@bp.route('/clip-queue/prev', methods=['POST'])
+@bp.route('/clip-queue/prev', methods=['GET', 'POST'])
+@conditional_fragment
 def clip_queue_prev():
-    clip_index = int(request.form.get('clip_index', 0)) - 1
-    page = int(request.form.get('page', 1))
-    filters = request.form.get('filters')
+    clip_index = int(request.values.get('clip_index', 0)) - 1
+    cursors = get_queue_cursors()
+    filters = request.values.get('filters')
     filters = json.loads(filters) if filters else {}
     sort = filters.get('sort', 'views')
     timeframe = filters.get('timeframe', '7d')
@@ -735,11 +819,10 @@ def clip_queue_prev():
     search = filters.get('search', '')
     liked = filters.get('liked', False)
 
-    if clip_index < 0 and page > 1:
+    if clip_index < 0 and len(cursors) > 1:
         # Go to previous page, last clip
-        page -= 1
-        formatted_clips, has_next = format_clips(
-            page=page,
+        cursors.pop()
+        formatted_clips, next_cursor = format_clips(
             sort=sort,
             timeframe=timeframe,
             category=category,
@@ -748,12 +831,12 @@ def clip_queue_prev():
             subjects=subjects,
             layout=layout,
             search=search,
-            liked=liked
+            liked=liked,
+            cursor=cursors[-1]
         )
         clip_index = len(formatted_clips) - 1
     else:
-        formatted_clips, has_next = format_clips(
-            page=page,
+        formatted_clips, next_cursor = format_clips(
             sort=sort,
             timeframe=timeframe,
             category=category,
@@ -762,7 +845,8 @@ def clip_queue_prev():
             subjects=subjects,
             layout=layout,
             search=search,
-            liked=liked
+            liked=liked,
+            cursor=cursors[-1]
         )
         if clip_index < 0:
             clip_index = 0
@@ -772,7 +856,7 @@ def clip_queue_prev():
         clips=formatted_clips,
         clip_index=clip_index,
         filters=filters,
-        embed_parent=EMBED_PARENT,
-        page=page,
-        has_next=has_next
-    )
\ No newline at end of file
+        embed_parent=settings.embed_parent,
+        cursors=cursors,
+        has_next=next_cursor is not None
+    )
@@ -18,7 +18,9 @@ clip_themes = sa.Table(
     'clip_themes',
     db.metadata,
     sa.Column('clip_id', sa.Integer, sa.ForeignKey('clip.id'), primary_key=True),
-    sa.Column('theme_id', sa.Integer, sa.ForeignKey('theme.id'), primary_key=True)
+    sa.Column('theme_id', sa.Integer, sa.ForeignKey('theme.id'), primary_key=True),
+    # the primary key starts with clip_id, this one finds the clips of a theme
+    sa.Index('ix_clip_themes_theme_id', 'theme_id')
 )
 
 # Define the association table between Clip and Subject
@@ -26,7 +28,8 @@ clip_subjects = sa.Table(
     'clip_subjects',
     db.metadata,
     sa.Column('clip_id', sa.Integer, sa.ForeignKey('clip.id'), primary_key=True),
-    sa.Column('subject_id', sa.Integer, sa.ForeignKey('subject.id'), primary_key=True)
+    sa.Column('subject_id', sa.Integer, sa.ForeignKey('subject.id'), primary_key=True),
+    sa.Index('ix_clip_subjects_subject_id', 'subject_id')
 )
 
 class Rank(UserMixin, db.Model):
@@ -132,6 +135,9 @@ class User(UserMixin, db.Model):
         foreign_keys='Clip.updated_by'
     )
 
+    # clips the user created on Twitch, filled in by the dashboard listing, see app.dash.tables
+    clip_count: so.Mapped[int] = so.query_expression()
+
     def __repr__(self):
         return f"<User id='{self.id}' login='{self.login}' display_name='{self.display_name}' rank='{self.rank}' contributions={self.contributions}>"
 
@@ -159,6 +165,9 @@ class Category(db.Model):
 
     clips: so.Mapped[List['Clip']] = so.relationship(back_populates='category')
     
+    # filled in by the dashboard listings, see app.dash.tables
+    clip_count: so.Mapped[int] = so.query_expression()
+
     def __repr__(self):
         return f'<Category {self.name}>'
     
@@ -183,6 +192,9 @@ class Theme(db.Model):
     # Relationship to track clips associated with a theme
     clips: so.Mapped[List['Clip']] = so.relationship('Clip', secondary=clip_themes, back_populates='themes')
 
+    # filled in by the dashboard listings, see app.dash.tables
+    clip_count: so.Mapped[int] = so.query_expression()
+
     def __repr__(self):
         return f'<Theme {self.name}>'
     
@@ -209,6 +221,9 @@ class Status(db.Model):
     # Relationship to track clips associated with a status
     clips: so.Mapped[List['Clip']] = so.relationship(back_populates='status')
 
+    # filled in by the dashboard listings, see app.dash.tables
+    clip_count: so.Mapped[int] = so.query_expression()
+
     def __repr__(self):
         return f'<Status {self.name}>'
 
@@ -233,6 +248,9 @@ class SubjectCategory(db.Model):
     # Relationship to track subjects associated with a subject category
     subjects: so.Mapped[List['Subject']] = so.relationship(back_populates='category')
 
+    # filled in by the dashboard listings, see app.dash.tables
+    subject_count: so.Mapped[int] = so.query_expression()
+
     def __repr__(self):
         return f'<Subject Category {self.name}>'
 
@@ -264,6 +282,9 @@ class Subject(db.Model):
     # Relationship to track clips associated with a subject
     clips: so.Mapped[List['Clip']] = so.relationship('Clip', secondary=clip_subjects, back_populates='subjects')
 
+    # filled in by the dashboard listings, see app.dash.tables
+    clip_count: so.Mapped[int] = so.query_expression()
+
     def __repr__(self):
         return f'<Subject {self.name}>'
     
@@ -287,6 +308,9 @@ class Layout(db.Model):
 
     clips: so.Mapped[List['Clip']] = so.relationship(back_populates='layout')
     
+    # filled in by the dashboard listings, see app.dash.tables
+    clip_count: so.Mapped[int] = so.query_expression()
+
     def __repr__(self):
         return f'<Layout {self.name}>'
     
@@ -295,9 +319,10 @@ class Clip(db.Model):
     twitch_id: so.Mapped[str] = so.mapped_column(sa.String(128), unique=True)
     url: so.Mapped[str] = so.mapped_column(sa.String(128))
     embed_url: so.Mapped[str] = so.mapped_column(sa.String(128))
-    broadcaster_id: so.Mapped[int] = so.mapped_column(sa.Integer)
+    # indexed for the distinct broadcaster and clipper counters, see app.stats
+    broadcaster_id: so.Mapped[int] = so.mapped_column(sa.Integer, index=True)
     broadcaster_name: so.Mapped[str] = so.mapped_column(sa.String(32), index=True)
-    creator_id: so.Mapped[int] = so.mapped_column(sa.Integer)
+    creator_id: so.Mapped[int] = so.mapped_column(sa.Integer, index=True)
     creator_name: so.Mapped[str] = so.mapped_column(sa.String(32), index=True)
     video_id: so.Mapped[str] = so.mapped_column(sa.String(32), nullable=True)
     game_id: so.Mapped[str] = so.mapped_column(sa.String(32), nullable=True)
@@ -305,15 +330,22 @@ class Clip(db.Model):
     title: so.Mapped[str] = so.mapped_column(sa.String(256))
     title_override: so.Mapped[str] = so.mapped_column(sa.String(256), nullable=True)
     view_count: so.Mapped[int] = so.mapped_column(sa.Integer)
-    created_at: so.Mapped[str] = so.mapped_column(sa.String(32))
+    # naive UTC, parsed from the Twitch RFC3339 timestamp on ingest
+    created_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime, index=True)
     thumbnail_url: so.Mapped[str] = so.mapped_column(sa.String(256))
     duration: so.Mapped[float] = so.mapped_column(sa.Float)
     vod_offset: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=True)
     is_featured: so.Mapped[bool] = so.mapped_column(sa.Boolean)
     notes: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True)
+    # clip text plus category, layout, theme and subject names, maintained by app.search
+    search_text: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True, deferred=True)
+    # denormalized count of rows in upvotes for this clip, maintained by like_clip
+    upvote_count: so.Mapped[int] = so.mapped_column(sa.Integer, index=True, default=0, server_default='0', nullable=False)
+    # indexed so the newest change to any clip can be read cheaply as a feed data version
     updated_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime,
                                                        default=lambda: datetime.now(timezone.utc),
                                                        onupdate=lambda: datetime.now(timezone.utc),
+                                                       index=True,
                                                        nullable=True)
 
     category_id: so.Mapped[int] = so.mapped_column(sa.ForeignKey(Category.id), index=True, nullable=True)
@@ -338,6 +370,13 @@ class Clip(db.Model):
     # Relationship to track subjects associated with a clip
     subjects: so.Mapped[List['Subject']] = so.relationship('Subject', secondary=clip_subjects, back_populates='clips')
 
+    # the public feed filters on visible statuses and then orders by date or views
+    __table_args__ = (
+        sa.Index('ix_clip_status_id_created_at', 'status_id', 'created_at'),
+        sa.Index('ix_clip_status_id_view_count', 'status_id', 'view_count'),
+        sa.Index('ix_clip_search_text', 'search_text', mysql_prefix='FULLTEXT').ddl_if(dialect='mysql'),
+    )
+
     def __repr__(self):
         return f"<Clip id='{self.id}' title='{self.title}' creator_name='{self.creator_name}'>"
     
@@ -359,6 +398,33 @@ class Statistics(db.Model):
     def __repr__(self):
         return f"<Statistics id='{self.id}' date='{self.date}'>"
     
+class TopFeed(db.Model):
+    id: so.Mapped[int] = so.mapped_column(sa.Integer, primary_key=True)
+    sort: so.Mapped[str] = so.mapped_column(sa.String(16), nullable=False)
+    timeframe: so.Mapped[str] = so.mapped_column(sa.String(8), nullable=False)
+    # JSON list of clip ids in feed order, rebuilt by the scheduler after each clip update
+    clip_ids: so.Mapped[str] = so.mapped_column(sa.Text, nullable=False)
+    # False when more clips matched than were kept, the feed then continues with the live query
+    complete: so.Mapped[bool] = so.mapped_column(sa.Boolean, nullable=False)
+    built_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime, nullable=False)
+
+    __table_args__ = (
+        sa.UniqueConstraint('sort', 'timeframe', name='uq_top_feed_sort_timeframe'),
+    )
+
+    def __repr__(self):
+        return f"<TopFeed sort='{self.sort}' timeframe='{self.timeframe}' built_at='{self.built_at}'>"
+
+class CatalogCounter(db.Model):
+    id: so.Mapped[int] = so.mapped_column(sa.Integer, primary_key=True)
+    name: so.Mapped[str] = so.mapped_column(sa.String(32), nullable=False, unique=True)
+    # adjusted in the same transaction as every clip change, recounted by the scheduler to correct drift
+    value: so.Mapped[int] = so.mapped_column(sa.BigInteger, nullable=False, default=0)
+    updated_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<CatalogCounter name='{self.name}' value={self.value}>"
+
 class ActivityLog(db.Model):
     id: so.Mapped[int] = so.mapped_column(sa.Integer, primary_key=True)
     table_name: so.Mapped[str] = so.mapped_column(sa.String(32), nullable=False)
@@ -372,6 +438,43 @@ class ActivityLog(db.Model):
     # Relationship to the User who performed the action
     admin_id: so.Mapped[int] = so.mapped_column(sa.ForeignKey(User.id), nullable=True)
     admin: so.Mapped['User'] = so.relationship(back_populates='activities')
-    
+
+    # the activity report filters by table, admin and time, the edit pages read the history of one row
+    __table_args__ = (
+        sa.Index('ix_activity_log_table_name_row_id', 'table_name', 'row_id'),
+        sa.Index('ix_activity_log_timestamp', 'timestamp'),
+        sa.Index('ix_activity_log_admin_id', 'admin_id'),
+    )
+
+    def __repr__(self):
+        return f"<ActivityLog='{self.id}' timestamp='{self.timestamp}' action='{self.action}'>"
+
+class ActivityDetail(db.Model):
+    id: so.Mapped[int] = so.mapped_column(sa.Integer, primary_key=True)
+    # the ingestion summary in activity_log these diffs belong to, see app.audit.ingestion_audit
+    activity_id: so.Mapped[int] = so.mapped_column(sa.ForeignKey(ActivityLog.id), index=True, nullable=False)
+    # json or zlib, the data is JSON lines of one diff per changed row either way
+    encoding: so.Mapped[str] = so.mapped_column(sa.String(8), nullable=False)
+    # up to 16 MB, a MEDIUMBLOB on MySQL
+    data: so.Mapped[bytes] = so.mapped_column(sa.LargeBinary(16777215), nullable=False)
+
+    def __repr__(self):
+        return f"<ActivityDetail activity_id='{self.activity_id}' encoding='{self.encoding}'>"
+
+class ActivityArchive(db.Model):
+    id: so.Mapped[int] = so.mapped_column(sa.Integer, primary_key=True)
+    # what the segment holds, read to pick the segments an archive search has to open, see app.retention
+    first_id: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=False)
+    last_id: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=False)
+    first_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime, nullable=False)
+    last_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime, index=True, nullable=False)
+    # comma separated table_name values of the rows
+    table_names: so.Mapped[str] = so.mapped_column(sa.String(512), nullable=False)
+    row_count: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=False)
+    # json or zlib, JSON lines of one activity_log row each, ingestion runs carry their diffs along
+    encoding: so.Mapped[str] = so.mapped_column(sa.String(8), nullable=False)
+    data: so.Mapped[bytes] = so.mapped_column(sa.LargeBinary(16777215), nullable=False)
+    archived_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime, nullable=False)
+
     def __repr__(self):
-        return f"<ActivityLog='{self.id}' timestamp='{self.timestamp}' action='{self.action}'>"
\ No newline at end of file
+        return f"<ActivityArchive first_id='{self.first_id}' last_id='{self.last_id}' row_count='{self.row_count}'>"
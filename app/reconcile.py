@@ -0,0 +1,41 @@
+from app import db
+from app.cache import likes_generation
+from app.models import Clip, upvotes
+from app.stats import count_catalog, store_counters
+from sqlalchemy import func, select, update
+
+def reconcile_upvote_counts():
+    """Recompute Clip.upvote_count from the upvotes table, returns the number of corrected clips."""
+    actual_count = (
+        select(func.count())
+        .select_from(upvotes)
+        .where(upvotes.c.clip_id == Clip.id)
+        .scalar_subquery()
+    )
+    result = db.session.execute(
+        update(Clip)
+        .where(Clip.upvote_count != actual_count)
+        .values(upvote_count=actual_count, updated_at=Clip.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    if result.rowcount:
+        likes_generation.bump()
+    return result.rowcount
+
+def reconcile_catalog_counters():
+    """Count the catalog from scratch and overwrite drifted counters, returns the corrected counter names."""
+    # run after reconcile_upvote_counts, total_upvotes adds up the clip counters it corrects
+    connection = db.session.connection()
+    corrected = store_counters(connection, count_catalog(connection))
+    db.session.commit()
+    return corrected
+
+if __name__ == '__main__':
+    from app import create_app
+    app = create_app()
+    with app.app_context():
+        corrected = reconcile_upvote_counts()
+        print(f"Upvote counts reconciled, {corrected} clip(s) corrected.")
+        corrected = reconcile_catalog_counters()
+        print(f"Catalog counters reconciled, {len(corrected)} counter(s) corrected.")
@@ -0,0 +1,175 @@
+import json
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from sqlalchemy import case, delete, insert, literal, select, true
+from app import db
+from app.audit import decode_lines, encode_chunks
+from app.models import ActivityArchive, ActivityDetail, ActivityLog, User
+
+# days rows stay in activity_log, table.action=days with * for any, 0 keeps them forever
+DEFAULT_RETENTION = 'ingestion=90,*=365'
+ARCHIVE_CHUNK_SIZE = 5000
+# segments an archive search opens at most, newest first
+ARCHIVE_SEARCH_SEGMENTS = 40
+ARCHIVE_SEARCH_LIMIT = 500
+
+def parse_policies(text):
+    """'ingestion.ingest=30,clip=180,*=365' as {('ingestion', 'ingest'): 30, ('clip', '*'): 180, ('*', '*'): 365}."""
+    policies = {}
+    for item in text.split(','):
+        if not item.strip():
+            continue
+        target, _, days = item.partition('=')
+        table, _, action = target.strip().partition('.')
+        policies[(table or '*', action or '*')] = int(days)
+    return policies
+
+def specificity(policy):
+    # table and action first, then table only, then action only
+    (table, action), days = policy
+    return (table == '*', action == '*')
+
+def retention_cutoff(policies, now):
+    """The timestamp each row is archived before, as a CASE where the most specific policy of a row wins.
+
+    Rows kept forever get NULL. Also returns the latest cutoff, a plain range
+    the timestamp index can narrow the scan with, None when nothing expires.
+    """
+    whens = []
+    default = None
+    for (table, action), days in sorted(policies.items(), key=specificity):
+        cutoff = now - timedelta(days=days) if days else None
+        if table == '*' and action == '*':
+            default = cutoff
+            continue
+        condition = true()
+        if table != '*':
+            condition = condition & (ActivityLog.table_name == table)
+        if action != '*':
+            condition = condition & (ActivityLog.action == action)
+        whens.append((condition, literal(cutoff, ActivityLog.timestamp.type)))
+    cutoffs = [now - timedelta(days=days) for days in policies.values() if days]
+    expression = case(*whens, else_=literal(default, ActivityLog.timestamp.type)) if whens else \
+        literal(default, ActivityLog.timestamp.type)
+    return expression, max(cutoffs) if cutoffs else None
+
+def write_segments(records, now):
+    # a chunk past ENCODED_MAX_BYTES becomes several segments
+    for records, encoding, data in encode_chunks(records):
+        db.session.execute(insert(ActivityArchive).values(
+            first_id=records[0]['id'],
+            last_id=records[-1]['id'],
+            first_at=min(record['timestamp'] for record in records),
+            last_at=max(record['timestamp'] for record in records),
+            table_names=','.join(sorted({record['table_name'] for record in records})),
+            row_count=len(records),
+            encoding=encoding,
+            data=data,
+            archived_at=now
+        ))
+
+def archive_activity(chunk_size=ARCHIVE_CHUNK_SIZE):
+    """Move activity rows past their retention to archive segments, returns the number of rows moved.
+
+    Each chunk is written and deleted in its own transaction, an interrupted
+    run leaves every row either in activity_log or in a segment.
+    """
+    policies = parse_policies(current_app.config.get('ACTIVITY_RETENTION', DEFAULT_RETENTION))
+    # timestamps are stored as naive UTC
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    cutoff, latest = retention_cutoff(policies, now)
+    if latest is None:
+        return 0
+    moved = 0
+    while True:
+        rows = db.session.execute(
+            select(*ActivityLog.__table__.columns)
+            .where(ActivityLog.timestamp < latest, ActivityLog.timestamp < cutoff)
+            .order_by(ActivityLog.id)
+            .limit(chunk_size)
+        ).mappings().all()
+        if not rows:
+            break
+        ids = [row['id'] for row in rows]
+        # ingestion runs take their diffs into the segment
+        diffs = {}
+        for activity_id, encoding, data in db.session.execute(
+            select(ActivityDetail.activity_id, ActivityDetail.encoding, ActivityDetail.data)
+            .where(ActivityDetail.activity_id.in_(ids))
+            .order_by(ActivityDetail.id)
+        ):
+            diffs.setdefault(activity_id, []).extend(decode_lines(encoding, data))
+        records = [dict(row, diffs=diffs[row['id']]) if row['id'] in diffs else dict(row) for row in rows]
+        write_segments(records, now)
+        if diffs:
+            db.session.execute(delete(ActivityDetail).where(ActivityDetail.activity_id.in_(list(diffs))))
+        db.session.execute(delete(ActivityLog).where(ActivityLog.id.in_(ids)))
+        db.session.commit()
+        moved += len(rows)
+        if len(rows) < chunk_size:
+            break
+    if moved:
+        # the dashboard routes import this module
+        from app.dash.tables import generation as tables_generation
+        # bulk statements, the listing counts don't see them through the session listeners
+        tables_generation.bump()
+    return moved
+
+def matches(record, criteria, search):
+    for key in ('table_name', 'action', 'admin_id'):
+        if key in criteria and record[key] != criteria[key]:
+            return False
+    if 'since' in criteria and record['timestamp'] < criteria['since']:
+        return False
+    if 'until' in criteria and record['timestamp'] >= criteria['until']:
+        return False
+    if search:
+        # the same columns the live report searches
+        return (search in (str(record['id']), str(record['row_id'])) or search in (record['row_twitch_id'] or '')
+                or str(record['timestamp']).startswith(search))
+    return True
+
+def search_archive(criteria, search=''):
+    """Archived activity matching the activity report criteria, newest first.
+
+    Only segments whose manifest overlaps the criteria are opened, at most
+    ARCHIVE_SEARCH_SEGMENTS of them. Returns the matches, at most
+    ARCHIVE_SEARCH_LIMIT, and whether older segments were left unread.
+    """
+    query = select(ActivityArchive).order_by(ActivityArchive.last_id.desc())
+    if 'since' in criteria:
+        query = query.where(ActivityArchive.last_at >= criteria['since'])
+    if 'until' in criteria:
+        query = query.where(ActivityArchive.first_at < criteria['until'])
+    if 'table_name' in criteria:
+        query = query.where((literal(',') + ActivityArchive.table_names + literal(',')).contains(f",{criteria['table_name']},"))
+    segments = db.session.scalars(query.limit(ARCHIVE_SEARCH_SEGMENTS + 1)).all()
+    truncated = len(segments) > ARCHIVE_SEARCH_SEGMENTS
+
+    activities = []
+    for segment in segments[:ARCHIVE_SEARCH_SEGMENTS]:
+        records = decode_lines(segment.encoding, segment.data)
+        for record in reversed(records):
+            record['timestamp'] = datetime.fromisoformat(record['timestamp'])
+            if matches(record, criteria, search):
+                activities.append(record)
+        if len(activities) >= ARCHIVE_SEARCH_LIMIT:
+            truncated = True
+            break
+    activities = activities[:ARCHIVE_SEARCH_LIMIT]
+
+    # shaped like activity rows for the report templates
+    admins = {user.id: user for user in User.query.filter(User.id.in_({record['admin_id'] for record in activities
+                                                                      if record['admin_id']}))}
+    for record in activities:
+        record['admin'] = admins.get(record['admin_id'])
+        record['changes_json'] = json.loads(record['changes']) if record['changes'] else None
+        record['archived'] = True
+    return activities, truncated
+
+if __name__ == '__main__':
+    from app import create_app
+    app = create_app()
+    with app.app_context():
+        moved = archive_activity()
+        print(f"Activity archived, {moved} row(s) moved.")
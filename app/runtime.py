@@ -0,0 +1,80 @@
+import os, signal, subprocess, threading, time
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from app.cache import Generation
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+STATIC_DIR = os.path.join(BASE_DIR, 'app', 'static')
+# seconds between checks whether another process asked for a reload
+RELOAD_CHECK_INTERVAL = 30
+
+# bumped by the dashboard so every worker reloads, not only the one serving the request
+generation = Generation('settings')
+
+class RuntimeSettings:
+    """Environment values and deployment metadata read once per process.
+
+    Requests only read attributes, reload() re-reads .env, the static logos and
+    the git commit. It runs at startup, on SIGHUP and from the dashboard.
+    """
+
+    def __init__(self):
+        # reentrant since SIGHUP can arrive on the main thread while it is reloading
+        self.lock = threading.RLock()
+        self.generation = None
+        self.checked_at = 0
+        self.reload()
+
+    def reload(self):
+        with self.lock:
+            load_dotenv(os.path.join(BASE_DIR, '.env'), override=True)
+            env = os.environ
+            self.twitch_client_id = env.get('TWITCH_CLIENT_ID')
+            self.twitch_client_secret = env.get('TWITCH_CLIENT_SECRET')
+            self.twitch_oauth_redirect_uri = env.get('TWITCH_OAUTH_REDIRECT_URI')
+            self.embed_parent = env.get('EMBED_PARENT')
+            self.broadcaster_id = env.get('BROADCASTER_ID')
+            self.game_id = env.get('GAME_ID')
+            self.clips_start_date = env.get('CLIPS_START_DATE')
+            self.superadmin_names = (env.get('SUPERADMIN_NAMES') or '').lower().split(',')
+            self.logo_filename = env.get('LOGO_FILENAME', 'random')
+            self.clip_logos = sorted(f for f in os.listdir(STATIC_DIR)
+                                     if f.lower().endswith('.png') and 'clip' in f.lower()) if os.path.exists(STATIC_DIR) else []
+            self.commit_version = get_git_revision_hash()
+            self.loaded_at = datetime.now(timezone.utc)
+
+    def reload_if_requested(self):
+        # another process bumped the generation, checked at most every RELOAD_CHECK_INTERVAL seconds
+        now = time.monotonic()
+        if now - self.checked_at < RELOAD_CHECK_INTERVAL:
+            return
+        self.checked_at = now
+        current = generation.current()
+        if self.generation is None:
+            self.generation = current
+        elif current != self.generation:
+            self.generation = current
+            self.reload()
+
+    def metadata(self):
+        return {
+            'commit': self.commit_version,
+            'loaded_at': self.loaded_at.isoformat(timespec='seconds'),
+            'embed_parent': self.embed_parent,
+            'logo': self.logo_filename,
+            'clip_logos': len(self.clip_logos)
+        }
+
+def get_git_revision_hash():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR,
+                                       stderr=subprocess.DEVNULL).strip().decode('ascii')
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return 'Unknown'
+
+def register_reload_signal():
+    # signal handlers can only be installed from the main thread, e.g. not under a threaded dev server reload
+    if hasattr(signal, 'SIGHUP') and threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGHUP, lambda signum, frame: settings.reload())
+
+settings = RuntimeSettings()
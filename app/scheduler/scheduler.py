@@ -1,18 +1,21 @@
 from app import create_app, apscheduler
 from app.scheduler.tasks.update_clips import update_clips, update_manual_import_clips
 from app.scheduler.tasks import daily_stats
+from app.feeds import rebuild_top_feeds
+from app.reconcile import reconcile_upvote_counts, reconcile_catalog_counters
+from app.retention import archive_activity
 from datetime import datetime, timezone, timedelta
+from app.runtime import settings
+from app.audit import ingestion_audit
 import os, subprocess
-from dotenv import load_dotenv
-
-load_dotenv(override=True)
-CLIPS_START_DATE = os.environ.get("CLIPS_START_DATE")
 
 app = create_app()
 
+# every job first picks up settings reloaded from the dashboard, the scheduler serves no requests to check them on
 @apscheduler.scheduled_job('interval', minutes=5, misfire_grace_time=30)
 def update_clips_job():
     with app.app_context():
+        settings.reload_if_requested()
         latest_clip_file = './app/scheduler/latest_clip_created_at.txt'
         if os.path.exists(latest_clip_file):
             with open(latest_clip_file, 'r') as f:
@@ -22,25 +25,33 @@ def update_clips_job():
                 six_days_ago = (datetime.now(timezone.utc) - timedelta(days=6)).isoformat(timespec='seconds').replace('+00:00', 'Z')
                 if latest_clip_time > six_days_ago:
                     with open(latest_clip_file, 'w') as f:
-                        f.write(CLIPS_START_DATE)
-        update_clips()
+                        f.write(settings.clips_start_date)
+        with ingestion_audit('update_clips_job'):
+            update_clips()
+        rebuild_top_feeds()
 
 @apscheduler.scheduled_job('interval', minutes=1, misfire_grace_time=15)
 def update_recent_clips_job():
     with app.app_context():
+        settings.reload_if_requested()
         six_days_ago = (datetime.now(timezone.utc) - timedelta(days=6)).isoformat(timespec='seconds').replace('+00:00', 'Z')
-        update_clips(started_at=six_days_ago, save_to_file=False)
+        with ingestion_audit('update_recent_clips_job'):
+            update_clips(started_at=six_days_ago, save_to_file=False)
+        rebuild_top_feeds()
 
 @apscheduler.scheduled_job('interval', minutes=7, misfire_grace_time=30)
 def update_manual_import_clips_job():
     with app.app_context():
+        settings.reload_if_requested()
         clip_offset_file = './app/scheduler/manual_import_clip_offset.txt'
         if os.path.exists(clip_offset_file):
             with open(clip_offset_file, 'r') as f:
                 offset = int(f.read().strip())
         else:
             offset = 0
-        update_manual_import_clips(offset)
+        with ingestion_audit('update_manual_import_clips_job'):
+            update_manual_import_clips(offset)
+        rebuild_top_feeds()
 
 @apscheduler.scheduled_job('interval', minutes=5, misfire_grace_time=30)
 def update_goaccess_report():
@@ -54,17 +65,37 @@ def update_goaccess_report():
     except Exception as e:
         print(f"Error updating GoAccess report: {e}", 'error')
 
+@apscheduler.scheduled_job('interval', hours=1, misfire_grace_time=300)
+def reconcile_counters_job():
+    with app.app_context():
+        settings.reload_if_requested()
+        # the counters are kept in step with every change, this only corrects drift
+        reconcile_upvote_counts()
+        corrected = reconcile_catalog_counters()
+        if corrected:
+            print(f"Catalog counters corrected: {', '.join(corrected)}")
+
+@apscheduler.scheduled_job('cron', hour=3, minute=30, misfire_grace_time=3600)
+def archive_activity_job():
+    with app.app_context():
+        settings.reload_if_requested()
+        moved = archive_activity()
+        if moved:
+            print(f"Activity archived: {moved} row(s)")
+
 @apscheduler.scheduled_job('cron', hour=23, minute=59)
 def update_daily_stats():
     with app.app_context():
+        settings.reload_if_requested()
         daily_stats.update_daily_stats()
 
-apscheduler.start()
-print("Scheduler started. Press Ctrl+C to exit.")
+if __name__ == '__main__':
+    apscheduler.start()
+    print("Scheduler started. Press Ctrl+C to exit.")
 
-try:
-    import time
-    while True:
-        time.sleep(60)
-except (KeyboardInterrupt, SystemExit):
-    apscheduler.shutdown()
\ No newline at end of file
+    try:
+        import time
+        while True:
+            time.sleep(60)
+    except (KeyboardInterrupt, SystemExit):
+        apscheduler.shutdown()
@@ -1,117 +1,112 @@
 import os
-from dotenv import load_dotenv
+from sqlalchemy.orm import selectinload
 from app import db
 from app.models import Clip, User
-from app.utils.get_twitch_clips import get_clips_by_broadcaster_id, get_clips_by_game_id, get_clips_by_id
+from app.utils.get_twitch_clips import get_clips_by_broadcaster_id, get_clips_by_game_id, get_clips_by_id, parse_twitch_timestamp
+from app.runtime import settings
 from datetime import datetime, timedelta, timezone
 
-load_dotenv(override=True)
-BROADCASTER_ID = os.environ.get('BROADCASTER_ID')
-GAME_ID = os.environ.get('GAME_ID')
-CLIPS_START_DATE = os.environ.get("CLIPS_START_DATE")
+def prefetch_page(page):
+    """The users and clips a page of Helix clips refers to, keyed by twitch id, one IN query each."""
+    if not page:
+        return {}, {}
+    creator_ids = {int(clip['creator_id']) for clip in page}
+    clip_ids = {clip['id'] for clip in page}
+    # changes from earlier pages are flushed once by the commit at the end
+    with db.session.no_autoflush:
+        users = {user.twitch_id: user for user in User.query.filter(User.twitch_id.in_(creator_ids))}
+        # the activity log compares tags of every updated clip, loaded here for the whole page
+        clips = {clip.twitch_id: clip for clip in Clip.query.filter(Clip.twitch_id.in_(clip_ids))
+                 .options(selectinload(Clip.themes), selectinload(Clip.subjects))}
+    return users, clips
+
+def sync_user(clip, users, users_to_add):
+    creator_id = int(clip['creator_id'])
+    if creator_id in users_to_add:
+        return
+    existing_user = users.get(creator_id)
+    if existing_user:
+        if existing_user.display_name != clip['creator_name'] and clip['creator_name']:
+            existing_user.display_name = clip['creator_name']
+            existing_user.updated_at = datetime.now(timezone.utc)
+    else:
+        users_to_add[creator_id] = User(
+            twitch_id=creator_id,
+            display_name=clip['creator_name'] if clip['creator_name'] else f"User {creator_id}"
+        )
+
+def clip_fields(clip):
+    # the Helix fields kept up to date on clips already in the database
+    return {
+        'url': clip['url'],
+        'embed_url': clip['embed_url'],
+        'broadcaster_id': int(clip['broadcaster_id']),
+        'broadcaster_name': clip['broadcaster_name'],
+        'creator_id': int(clip['creator_id']),
+        'creator_name': clip['creator_name'],
+        'title': clip['title'],
+        'view_count': clip['view_count'],
+        'created_at': parse_twitch_timestamp(clip['created_at']),
+        'vod_offset': clip['vod_offset'],
+        'thumbnail_url': clip['thumbnail_url'],
+        'duration': clip['duration'],
+        'is_featured': clip.get('is_featured', False)
+    }
+
+def update_clip(existing_clip, clip):
+    changed = False
+    for field, value in clip_fields(clip).items():
+        if getattr(existing_clip, field) != value:
+            setattr(existing_clip, field, value)
+            changed = True
+    if changed:
+        existing_clip.updated_at = datetime.now(timezone.utc)
+
+def new_clip(clip):
+    return Clip(
+        twitch_id=clip['id'],
+        video_id=clip['video_id'],
+        game_id=clip['game_id'],
+        language=clip['language'],
+        updated_at=datetime.now(timezone.utc),
+        status_id=1,
+        **clip_fields(clip)
+    )
 
 def update_clips(started_at=None, after=None, save_to_file=True):
     latest_clip_file = './app/scheduler/latest_clip_created_at.txt'
     if started_at is None:
-        started_at = CLIPS_START_DATE
+        started_at = settings.clips_start_date
         if os.path.exists(latest_clip_file):
             with open(latest_clip_file, 'r') as f:
                 started_at = f.read().strip()
-    users_to_add = []
-    clips_to_add = []
+    # pending rows keyed by twitch id, the same user or clip can show up on several pages
+    users_to_add = {}
+    clips_to_add = {}
     while True:
-        if BROADCASTER_ID != "" and BROADCASTER_ID is not None:
-            clips_data = get_clips_by_broadcaster_id(BROADCASTER_ID, started_at, after=after)
+        if settings.broadcaster_id != "" and settings.broadcaster_id is not None:
+            clips_data = get_clips_by_broadcaster_id(settings.broadcaster_id, started_at, after=after)
             if 'error' in clips_data:
                 break
-        elif GAME_ID != "" and GAME_ID is not None:
-            clips_data = get_clips_by_game_id(GAME_ID, started_at, after=after)
+        elif settings.game_id != "" and settings.game_id is not None:
+            clips_data = get_clips_by_game_id(settings.game_id, started_at, after=after)
             if 'error' in clips_data:
                 break
         latest_created_at = None
+        users, clips = prefetch_page(clips_data['data'])
         for clip in clips_data['data']:
             # Track the latest created_at
             if latest_created_at is None or clip['created_at'] > latest_created_at:
                 latest_created_at = clip['created_at']
 
-            existing_user = User.query.filter_by(twitch_id=clip['creator_id']).first()
-            if any(u.twitch_id == clip['creator_id'] for u in users_to_add):
-                continue
-            if existing_user:
-                changed = False
-                if existing_user.display_name != clip['creator_name'] and clip['creator_name']:
-                    existing_user.display_name = clip['creator_name']; changed = True
-                
-                if changed:
-                    existing_user.updated_at = datetime.now(timezone.utc)
-            else:
-                new_user = User(
-                    twitch_id=clip['creator_id'],
-                    display_name=clip['creator_name'] if clip['creator_name'] else f'User {clip['creator_id']}'
-                )
-                users_to_add.append(new_user)
-
-            existing_clip = Clip.query.filter_by(twitch_id=clip['id']).first()
-            new_clip = None
-            if any(c.twitch_id == clip['id'] for c in clips_to_add):
+            sync_user(clip, users, users_to_add)
+            if clip['id'] in clips_to_add:
                 continue
+            existing_clip = clips.get(clip['id'])
             if existing_clip:
-                changed = False
-                # Update existing clip fields
-                if existing_clip.url != clip['url']:
-                    existing_clip.url = clip['url']; changed = True
-                if existing_clip.embed_url != clip['embed_url']:
-                    existing_clip.embed_url = clip['embed_url']; changed = True
-                if existing_clip.broadcaster_id != int(clip['broadcaster_id']):
-                    existing_clip.broadcaster_id = int(clip['broadcaster_id']); changed = True
-                if existing_clip.broadcaster_name != clip['broadcaster_name']:
-                    existing_clip.broadcaster_name = clip['broadcaster_name']; changed = True
-                if existing_clip.creator_id != int(clip['creator_id']):
-                    existing_clip.creator_id = int(clip['creator_id']); changed = True
-                if existing_clip.creator_name != clip['creator_name']:
-                    existing_clip.creator_name = clip['creator_name']; changed = True
-                if existing_clip.title != clip['title']:
-                    existing_clip.title = clip['title']; changed = True
-                if existing_clip.view_count != clip['view_count']:
-                    existing_clip.view_count = clip['view_count']; changed = True
-                if existing_clip.created_at != clip['created_at']:
-                    existing_clip.created_at = clip['created_at']; changed = True
-                if existing_clip.vod_offset != clip['vod_offset']:
-                    existing_clip.vod_offset = clip['vod_offset']; changed = True
-                if existing_clip.thumbnail_url != clip['thumbnail_url']:
-                    existing_clip.thumbnail_url = clip['thumbnail_url']; changed = True
-                if existing_clip.duration != clip['duration']:
-                    existing_clip.duration = clip['duration']; changed = True
-                if existing_clip.is_featured != clip.get('is_featured', False):
-                    existing_clip.is_featured = clip.get('is_featured', False); changed = True
-
-                if changed:
-                    existing_clip.updated_at = datetime.now(timezone.utc)
+                update_clip(existing_clip, clip)
             else:
-                # Create a new clip if it doesn't exist
-                new_clip = Clip(
-                    twitch_id=clip['id'],
-                    url=clip['url'],
-                    embed_url=clip['embed_url'],
-                    broadcaster_id=clip['broadcaster_id'],
-                    broadcaster_name=clip['broadcaster_name'],
-                    creator_id=clip['creator_id'],
-                    creator_name=clip['creator_name'],
-                    video_id=clip['video_id'],
-                    game_id=clip['game_id'],
-                    language=clip['language'],
-                    title=clip['title'],
-                    view_count=clip['view_count'],
-                    created_at=clip['created_at'],
-                    thumbnail_url=clip['thumbnail_url'],
-                    duration=clip['duration'],
-                    vod_offset=clip['vod_offset'],
-                    is_featured=clip.get('is_featured', False),
-                    updated_at=datetime.now(timezone.utc),
-                    status_id=1
-                )
-            if new_clip:
-                clips_to_add.append(new_clip)
+                clips_to_add[clip['id']] = new_clip(clip)
 
         previous_created_at = None
         if os.path.exists(latest_clip_file):
@@ -163,18 +158,18 @@ def update_clips(started_at=None, after=None, save_to_file=True):
             break
 
     if clips_to_add:
-        db.session.add_all(clips_to_add)
+        db.session.add_all(clips_to_add.values())
     if users_to_add:
-        db.session.add_all(users_to_add)
+        db.session.add_all(users_to_add.values())
     db.session.commit()
 
 def update_manual_import_clips(offset):
     # no need to manually import clips if going based on GAME_ID
-    if GAME_ID and not BROADCASTER_ID:
+    if settings.game_id and not settings.broadcaster_id:
         return
     
     manual_clips = db.session.query(Clip.twitch_id)\
-        .filter(Clip.broadcaster_id != BROADCASTER_ID)\
+        .filter(Clip.broadcaster_id != settings.broadcaster_id)\
         .order_by(Clip.created_at.desc())\
         .offset(offset)\
         .limit(100)\
@@ -197,58 +192,15 @@ def update_manual_import_clips(offset):
     if 'error' in clips_data:
         return
 
-    users_to_add = []
+    users_to_add = {}
+    users, clips = prefetch_page(clips_data['data'])
     for clip in clips_data['data']:
-        existing_user = User.query.filter_by(twitch_id=clip['creator_id']).first()
-        if any(u.twitch_id == clip['creator_id'] for u in users_to_add):
-            continue
-        if existing_user:
-            changed = False
-            if existing_user.display_name != clip['creator_name'] and clip['creator_name']:
-                existing_user.display_name = clip['creator_name']; changed = True
-            
-            if changed:
-                existing_user.updated_at = datetime.now(timezone.utc)
-        else:
-            new_user = User(
-                twitch_id=clip['creator_id'],
-                display_name=clip['creator_name'] if clip['creator_name'] else f'User {clip['creator_id']}'
-            )
-            users_to_add.append(new_user)
-
-        existing_clip = Clip.query.filter_by(twitch_id=clip['id']).first()
-        changed = False
-        # Update existing clip fields
-        if existing_clip.url != clip['url']:
-            existing_clip.url = clip['url']; changed = True
-        if existing_clip.embed_url != clip['embed_url']:
-            existing_clip.embed_url = clip['embed_url']; changed = True
-        if existing_clip.broadcaster_id != int(clip['broadcaster_id']):
-            existing_clip.broadcaster_id = int(clip['broadcaster_id']); changed = True
-        if existing_clip.broadcaster_name != clip['broadcaster_name']:
-            existing_clip.broadcaster_name = clip['broadcaster_name']; changed = True
-        if existing_clip.creator_id != int(clip['creator_id']):
-            existing_clip.creator_id = int(clip['creator_id']); changed = True
-        if existing_clip.creator_name != clip['creator_name']:
-            existing_clip.creator_name = clip['creator_name']; changed = True
-        if existing_clip.title != clip['title']:
-            existing_clip.title = clip['title']; changed = True
-        if existing_clip.view_count != clip['view_count']:
-            existing_clip.view_count = clip['view_count']; changed = True
-        if existing_clip.created_at != clip['created_at']:
-            existing_clip.created_at = clip['created_at']; changed = True
-        if existing_clip.vod_offset != clip['vod_offset']:
-            existing_clip.vod_offset = clip['vod_offset']; changed = True
-        if existing_clip.thumbnail_url != clip['thumbnail_url']:
-            existing_clip.thumbnail_url = clip['thumbnail_url']; changed = True
-        if existing_clip.duration != clip['duration']:
-            existing_clip.duration = clip['duration']; changed = True
-        if existing_clip.is_featured != clip.get('is_featured', False):
-            existing_clip.is_featured = clip.get('is_featured', False); changed = True
-
-        if changed:
-            existing_clip.updated_at = datetime.now(timezone.utc)
+        sync_user(clip, users, users_to_add)
+        existing_clip = clips.get(clip['id'])
+        # deleted since its id was read above
+        if existing_clip:
+            update_clip(existing_clip, clip)
 
     if users_to_add:
-        db.session.add_all(users_to_add)
-    db.session.commit()
\ No newline at end of file
+        db.session.add_all(users_to_add.values())
+    db.session.commit()
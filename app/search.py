@@ -0,0 +1,163 @@
+import re
+import sqlalchemy as sa
+from flask import current_app
+from sqlalchemy import event, select, text
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.orm import selectinload
+from app import db
+from app.models import *
+from app.search_index import InvertedIndex, generation as search_index_generation
+
+# Clip attributes that feed Clip.search_text, a change to any of them rebuilds it
+SEARCH_ATTRIBUTES = ('title', 'title_override', 'broadcaster_name', 'creator_name',
+                     'category', 'category_id', 'layout', 'layout_id', 'themes', 'subjects')
+# most terms taken from a single search, the rest are ignored
+MAX_SEARCH_TERMS = 8
+# largest candidate set the in-memory index hands to the database as an IN list
+MAX_MEMORY_CANDIDATES = 10000
+
+# SQLite full-text index, rowid is the clip id
+clip_search_create = sa.DDL(
+    "CREATE VIRTUAL TABLE IF NOT EXISTS clip_search USING fts5(search_text, tokenize = 'unicode61 remove_diacritics 2')"
+)
+clip_search_drop = sa.DDL('DROP TABLE IF EXISTS clip_search')
+event.listen(Clip.__table__, 'after_create', clip_search_create.execute_if(dialect='sqlite'))
+event.listen(Clip.__table__, 'before_drop', clip_search_drop.execute_if(dialect='sqlite'))
+
+def build_search_text(clip):
+    parts = [clip.title, clip.title_override, clip.broadcaster_name, clip.creator_name]
+    if clip.category:
+        parts.append(clip.category.name)
+    if clip.layout:
+        parts.append(clip.layout.name)
+    parts += [theme.name for theme in clip.themes]
+    for subject in clip.subjects:
+        parts += [subject.name, subject.keywords]
+    return ' '.join(part for part in parts if part)
+
+def get_backend(dialect_name):
+    # 'auto' picks the full-text index of the database, 'memory' uses the in-process index
+    # for databases without one and 'like' forces the unindexed fallback
+    backend = current_app.config.get('SEARCH_BACKEND', 'auto')
+    if backend == 'auto':
+        return {'mysql': 'fulltext', 'sqlite': 'fts5'}.get(dialect_name, 'like')
+    return backend
+
+def get_memory_index():
+    # one index per app, each worker process builds its own on first search
+    if 'search_index' not in current_app.extensions:
+        current_app.extensions['search_index'] = InvertedIndex(current_app.config.get('SEARCH_INDEX_REFRESH', 30))
+    return current_app.extensions['search_index']
+
+def get_search_terms(search):
+    return re.findall(r'\w+', search)[:MAX_SEARCH_TERMS]
+
+def search_clips(query, search):
+    """Restrict a Clip query to clips matching search.
+
+    Returns the filtered query and a relevance column (higher is better), or None
+    for the relevance when the backend cannot rank results.
+    """
+    backend = get_backend(db.engine.dialect.name)
+    terms = get_search_terms(search)
+    if backend == 'like' or not terms:
+        return query.filter(like_filter(search)), None
+
+    if backend == 'memory':
+        clip_ids = get_memory_index().lookup(terms)
+        # very broad terms match most of the table, scanning is cheaper than a huge IN list
+        if len(clip_ids) > MAX_MEMORY_CANDIDATES:
+            return query.filter(like_filter(search)), None
+        return query.filter(Clip.id.in_(clip_ids)), None
+
+    if backend == 'fulltext':
+        # every term is required and matches as a prefix
+        relevance = match(Clip.search_text, against=' '.join(f'+{term}*' for term in terms)).in_boolean_mode()
+        return query.filter(relevance > 0), relevance
+
+    matches = text('SELECT rowid AS clip_id, -bm25(clip_search) AS relevance FROM clip_search WHERE clip_search MATCH :terms')
+    matches = matches.bindparams(terms=' '.join(f'"{term}"*' for term in terms))
+    matches = matches.columns(clip_id=sa.Integer, relevance=sa.Float).subquery('clip_search_matches')
+    return query.join(matches, matches.c.clip_id == Clip.id), matches.c.relevance
+
+def like_filter(search):
+    search_pattern = f"%{search.strip()}%"
+    return (Clip.title.ilike(search_pattern) |
+            Clip.title_override.ilike(search_pattern) |
+            Clip.broadcaster_name.ilike(search_pattern) |
+            Clip.creator_name.ilike(search_pattern) |
+            Clip.category.has(Category.name.ilike(search_pattern)) |
+            Clip.themes.any(Theme.name.ilike(search_pattern)) |
+            Clip.subjects.any(Subject.name.ilike(search_pattern)) |
+            Clip.layout.has(Layout.name.ilike(search_pattern)))
+
+def search_text_changed(clip):
+    state = sa.inspect(clip)
+    if state.pending:
+        return True
+    return any(state.attrs[key].history.has_changes() for key in SEARCH_ATTRIBUTES)
+
+def before_flush_listener(session, flush_context, instances):
+    clips = set()
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Clip):
+            if search_text_changed(obj):
+                clips.add(obj)
+        elif isinstance(obj, (Category, Layout, Theme, Subject)) and obj in session.dirty:
+            # renaming a tag changes the text of every clip carrying it
+            attrs = sa.inspect(obj).attrs
+            if attrs.name.history.has_changes() or (isinstance(obj, Subject) and attrs.keywords.history.has_changes()):
+                clips.update(obj.clips)
+    for clip in clips:
+        search_text = build_search_text(clip)
+        if clip.search_text != search_text:
+            clip.search_text = search_text
+
+def after_flush_listener(session, flush_context):
+    connection = session.connection()
+    if get_backend(connection.dialect.name) != 'fts5':
+        return
+    deleted = [clip.id for clip in session.deleted if isinstance(clip, Clip)]
+    changed = [clip for clip in list(session.new) + list(session.dirty)
+               if isinstance(clip, Clip) and sa.inspect(clip).attrs.search_text.history.has_changes()]
+    ids = deleted + [clip.id for clip in changed]
+    if ids:
+        connection.execute(text('DELETE FROM clip_search WHERE rowid IN :ids').bindparams(sa.bindparam('ids', expanding=True)), {'ids': ids})
+    if changed:
+        connection.execute(text('INSERT INTO clip_search (rowid, search_text) VALUES (:clip_id, :search_text)'),
+                           [{'clip_id': clip.id, 'search_text': clip.search_text} for clip in changed])
+
+def register_search_listeners():
+    if not event.contains(db.session, 'before_flush', before_flush_listener):
+        event.listen(db.session, 'before_flush', before_flush_listener)
+        event.listen(db.session, 'after_flush', after_flush_listener)
+
+def rebuild_search_index(batch_size=500):
+    # recompute every clip's search text, then reload the SQLite index from it
+    last_id = 0
+    while True:
+        clips = db.session.scalars(
+            select(Clip).where(Clip.id > last_id).order_by(Clip.id).limit(batch_size)
+            .options(selectinload(Clip.category), selectinload(Clip.layout),
+                     selectinload(Clip.themes), selectinload(Clip.subjects))
+        ).all()
+        if not clips:
+            break
+        db.session.execute(
+            sa.update(Clip).execution_options(synchronize_session=False),
+            [{'id': clip.id, 'search_text': build_search_text(clip), 'updated_at': clip.updated_at} for clip in clips]
+        )
+        last_id = clips[-1].id
+    if get_backend(db.engine.dialect.name) == 'fts5':
+        db.session.execute(text('DELETE FROM clip_search'))
+        db.session.execute(text('INSERT INTO clip_search (rowid, search_text) SELECT id, search_text FROM clip'))
+    db.session.commit()
+    # updated_at is kept, in-memory indexes would never re-read the rebuilt texts
+    search_index_generation.bump()
+
+if __name__ == '__main__':
+    from app import create_app
+    app = create_app()
+    with app.app_context():
+        rebuild_search_index()
+        print('Rebuilt clip search index')
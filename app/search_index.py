@@ -0,0 +1,118 @@
+import bisect, itertools, re, threading, time, unicodedata
+from sqlalchemy import select
+from app import db
+from app.cache import Generation
+from app.models import Clip
+
+# bumped by app.search.rebuild_search_index, which rewrites search texts without moving updated_at
+generation = Generation('search')
+
+def normalize(text):
+    # case and accent folding, so "Café" and "cafe" index to the same token
+    folded = unicodedata.normalize('NFKD', text.casefold())
+    return ''.join(char for char in folded if not unicodedata.combining(char))
+
+def tokenize(text):
+    return set(re.findall(r'\w+', normalize(text or '')))
+
+class InvertedIndex:
+    """In-process token index over Clip.search_text, one per worker.
+
+    Built from the whole clip table on first use and then kept current by
+    re-reading clips whose updated_at moved past the last sync. Built again
+    when the search texts were rebuilt in place.
+    """
+
+    def __init__(self, refresh_interval=30):
+        self.refresh_interval = refresh_interval
+        self.postings = {}
+        # indexed text per clip, kept instead of token sets since strings are far smaller
+        self.clip_text = {}
+        self.sorted_tokens = []
+        self.synced_at = None
+        self.generation = None
+        self.checked_at = 0
+        self.build_seconds = None
+        self.lock = threading.Lock()
+
+    def index_clip(self, clip_id, search_text):
+        tokens = tokenize(search_text)
+        old_tokens = tokenize(self.clip_text.get(clip_id))
+        for token in old_tokens - tokens:
+            self.postings[token].discard(clip_id)
+        for token in tokens - old_tokens:
+            if token not in self.postings:
+                self.postings[token] = set()
+                bisect.insort(self.sorted_tokens, token)
+            self.postings[token].add(clip_id)
+        self.clip_text[clip_id] = search_text
+
+    def build(self):
+        started = time.perf_counter()
+        # read first, a rebuild finishing while this one runs is picked up on the next sync
+        self.generation = generation.current()
+        self.postings, self.clip_text = {}, {}
+        synced_at = None
+        for clip_id, search_text, updated_at in db.session.execute(select(Clip.id, Clip.search_text, Clip.updated_at)):
+            for token in tokenize(search_text):
+                self.postings.setdefault(token, set()).add(clip_id)
+            self.clip_text[clip_id] = search_text
+            if updated_at and (synced_at is None or updated_at > synced_at):
+                synced_at = updated_at
+        self.sorted_tokens = sorted(self.postings)
+        self.synced_at = synced_at
+        self.build_seconds = time.perf_counter() - started
+
+    def refresh(self):
+        # >= so clips saved in the same instant as the last sync are not missed, re-indexing them is harmless
+        rows = db.session.execute(
+            select(Clip.id, Clip.search_text, Clip.updated_at).where(Clip.updated_at >= self.synced_at)
+        ).all()
+        for clip_id, search_text, updated_at in rows:
+            self.index_clip(clip_id, search_text)
+            if updated_at > self.synced_at:
+                self.synced_at = updated_at
+
+    def sync(self):
+        now = time.monotonic()
+        with self.lock:
+            if self.build_seconds is None:
+                self.build()
+            elif now - self.checked_at < self.refresh_interval:
+                return
+            elif self.synced_at is None or generation.current() != self.generation:
+                # nothing had an updated_at when last built, or the search texts were rebuilt since
+                self.build()
+            else:
+                self.refresh()
+            self.checked_at = now
+
+    def lookup(self, terms):
+        """Ids of clips having a token starting with every term.
+
+        Deleted clips are never removed from the index, they simply match
+        nothing once the ids are applied to the clip table.
+        """
+        self.sync()
+        candidates = None
+        for term in terms:
+            term = normalize(term)
+            matched = set()
+            start = bisect.bisect_left(self.sorted_tokens, term)
+            for token in itertools.islice(self.sorted_tokens, start, None):
+                if not token.startswith(term):
+                    break
+                matched |= self.postings[token]
+            candidates = matched if candidates is None else candidates & matched
+            if not candidates:
+                return set()
+        return candidates or set()
+
+    def stats(self):
+        return {
+            'clips': len(self.clip_text),
+            'tokens': len(self.postings),
+            'postings': sum(len(ids) for ids in self.postings.values()),
+            'build_seconds': self.build_seconds,
+            'synced_at': self.synced_at
+        }
@@ -2,11 +2,33 @@ const sortLabels = {
     new: "New",
     old: "Old",
     views: "Views",
-    likes: "Likes"
+    likes: "Likes",
+    relevance: "Relevance"
 };
 
 const DateTime = window.luxon?.DateTime;
 
+function formatUploadDate(epochSeconds) {
+    // cards are cached on the server, so the relative upload time is worked out here
+    const seconds = Math.max(0, Math.floor(Date.now() / 1000 - epochSeconds));
+    const minutes = Math.floor(seconds / 60);
+    const hours = Math.floor(minutes / 60);
+    const days = Math.floor(hours / 24);
+    const months = Math.floor(days / 30);
+    const years = Math.floor(months / 12);
+    const units = [[years, 'year'], [months, 'month'], [days, 'day'], [hours, 'hour'], [minutes, 'minute']];
+    for (const [count, unit] of units) {
+        if (count > 0) return `${count} ${unit}${count > 1 ? 's' : ''} ago`;
+    }
+    return `${seconds} second${seconds > 1 ? 's' : ''} ago`;
+}
+
+function renderUploadDates(root) {
+    root.querySelectorAll('.clip-upload-date[data-created-at]').forEach(function (el) {
+        el.textContent = formatUploadDate(Number(el.dataset.createdAt));
+    });
+}
+
 function submitFilterForm() {
     const form = document.getElementById('filter-form');
     if (!form) return;
@@ -201,11 +223,13 @@ window.addEventListener('DOMContentLoaded', function() {
 
     initSelectPickers();
     initDaterangepicker();
+    renderUploadDates(document);
 });
 
 document.body.addEventListener('htmx:afterSwap', function (evt) {
     initSelectPickers();
     initDaterangepicker();
+    renderUploadDates(document);
 });
 
 document.querySelectorAll('.sort-btn').forEach(function(btn) {
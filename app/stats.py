@@ -0,0 +1,314 @@
+import time
+from collections import Counter
+import sqlalchemy as sa
+from datetime import datetime, timezone
+from flask import current_app
+from sqlalchemy import case, event, exists, func, select
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import *
+
+# counters of distinct values, a flush only looks up the values its clips moved to or from
+DISTINCT_COUNTERS = {'unique_broadcasters': Clip.broadcaster_id, 'unique_clippers': Clip.creator_id}
+# clip columns the counters are derived from
+CLIP_COLUMNS = {'status_id', 'category_id', 'layout_id', 'view_count', 'upvote_count', 'duration',
+                'broadcaster_id', 'creator_id'}
+# counters of listed clips missing one of these
+MISSING_COUNTERS = {'clips_without_subjects': 'subjects', 'clips_without_themes': 'themes',
+                    'clips_without_category': 'category', 'clips_without_layout': 'layout'}
+# deleting one of these or changing a status type moves clips the flush doesn't hold, everything is counted again
+RECOUNT_MODELS = (Status, Category, Layout, Theme, Subject)
+
+def count_where(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+def summed_counters():
+    """Catalog counters that are sums over clips, the difference of the changed clips is added to them."""
+    # hidden clips are left out of the sorting backlog, clips without a status too as the old inner join did
+    listed = Status.type != 'Hidden'
+    has_subjects = exists().where(clip_subjects.c.clip_id == Clip.id)
+    has_themes = exists().where(clip_themes.c.clip_id == Clip.id)
+    return (
+        func.count(Clip.id).label('total_clips'),
+        count_where(Clip.status_id == 1).label('unsorted_clips'),
+        count_where(listed & ~has_subjects).label('clips_without_subjects'),
+        count_where(listed & ~has_themes).label('clips_without_themes'),
+        count_where(listed & Clip.category_id.is_(None)).label('clips_without_category'),
+        count_where(listed & Clip.layout_id.is_(None)).label('clips_without_layout'),
+        func.coalesce(func.sum(Clip.view_count), 0).label('total_views'),
+        # the denormalized counters add up to the rows in upvotes, see app.reconcile
+        func.coalesce(func.sum(Clip.upvote_count), 0).label('total_upvotes'),
+        # whole milliseconds so the counter stays an integer
+        func.coalesce(func.sum(func.round(Clip.duration * 1000)), 0).label('total_duration_ms')
+    )
+
+CATALOG_COUNTERS = tuple(column.name for column in summed_counters()) + tuple(DISTINCT_COUNTERS)
+
+def count_catalog(connection):
+    """Every catalog counter counted from scratch in a single query."""
+    query = select(*summed_counters()).select_from(Clip).outerjoin(Status, Clip.status_id == Status.id)
+    for name, column in DISTINCT_COUNTERS.items():
+        query = query.add_columns(select(func.count(column.distinct())).correlate(None).scalar_subquery().label(name))
+    return {key: int(value or 0) for key, value in connection.execute(query).one()._mapping.items()}
+
+def adjust_counters(connection, deltas):
+    # one statement for all counters, for changes made without the ORM such as likes
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if deltas:
+        connection.execute(
+            sa.update(CatalogCounter)
+            .where(CatalogCounter.name.in_(deltas))
+            .values(value=CatalogCounter.value + case(deltas, value=CatalogCounter.name),
+                    updated_at=datetime.now(timezone.utc))
+            .execution_options(synchronize_session=False)
+        )
+
+def store_counters(connection, counts):
+    """Overwrite the stored counters with counts, returns the names whose value was off."""
+    now = datetime.now(timezone.utc)
+    stored = dict(connection.execute(select(CatalogCounter.name, CatalogCounter.value)).all())
+    corrected = []
+    for name, value in counts.items():
+        if stored.get(name) == value:
+            continue
+        corrected.append(name)
+        if name in stored:
+            connection.execute(sa.update(CatalogCounter).where(CatalogCounter.name == name)
+                               .values(value=value, updated_at=now).execution_options(synchronize_session=False))
+        else:
+            connection.execute(sa.insert(CatalogCounter).values(name=name, value=value, updated_at=now))
+    return corrected
+
+def read_catalog_counters():
+    counters = dict(db.session.execute(select(CatalogCounter.name, CatalogCounter.value)).all())
+    if not set(CATALOG_COUNTERS) <= counters.keys():
+        # first read after the table was created, count everything once
+        try:
+            store_counters(db.session.connection(), count_catalog(db.session.connection()))
+            db.session.commit()
+        except IntegrityError:
+            # another worker created the rows first
+            db.session.rollback()
+        counters = dict(db.session.execute(select(CatalogCounter.name, CatalogCounter.value)).all())
+    return counters
+
+def compute_clip_stats():
+    """Every clip statistic shown on the dashboard and stored daily, read from the catalog counters."""
+    stats = {name: value for name, value in read_catalog_counters().items() if name in CATALOG_COUNTERS}
+    stats['total_verified_users'] = db.session.scalar(select(func.count(User.id)).where(User.last_verified.is_not(None)))
+    stats['total_duration'] = stats.pop('total_duration_ms') / 1000
+    stats['average_duration'] = stats['total_duration'] / stats['total_clips'] if stats['total_clips'] else 0.0
+    stats['computed_at'] = datetime.now(timezone.utc)
+    return stats
+
+def peek_clip_stats():
+    # the last snapshot this process computed however old it is, None before the first one
+    snapshot = current_app.extensions.get('clip_stats')
+    return snapshot[1] if snapshot else None
+
+def is_fresh():
+    snapshot = current_app.extensions.get('clip_stats')
+    return snapshot is not None and time.monotonic() - snapshot[0] < current_app.config.get('STATS_CACHE_TTL', 60)
+
+def get_clip_stats():
+    """Snapshot of compute_clip_stats, recomputed once it is older than STATS_CACHE_TTL seconds."""
+    if not is_fresh():
+        current_app.extensions['clip_stats'] = (time.monotonic(), compute_clip_stats())
+    return peek_clip_stats()
+
+def distinct_value(value):
+    # ingestion passes the Twitch ids as strings
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        # never fails the write, the counter is off until the hourly reconcile
+        current_app.logger.warning(f'Catalog counters skipped a non-numeric id: {value!r}')
+        return None
+
+def amount(value):
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+def is_listed(status):
+    # hidden clips are left out of the sorting backlog, clips without a status too
+    return status is not None and status.type != 'Hidden'
+
+def plain_counts(values):
+    """What one clip adds to the summed counters that don't depend on its status type."""
+    return {
+        'total_clips': 1,
+        'unsorted_clips': int(values['status_id'] == 1),
+        'total_views': int(amount(values['view_count'])),
+        'total_upvotes': int(amount(values['upvote_count'])),
+        'total_duration_ms': round(amount(values['duration']) * 1000)
+    }
+
+def clip_counts(values):
+    """What one clip adds to each summed counter."""
+    counts = plain_counts(values)
+    listed = is_listed(values['status']())
+    for name, key in MISSING_COUNTERS.items():
+        counts[name] = int(listed and not values[key]())
+    return counts
+
+def changed_counts(obj, before, after):
+    state = sa.inspect(obj)
+    if state.attrs.status.history.has_changes() or state.attrs.status_id.history.has_changes():
+        old, new = clip_counts(before), clip_counts(after)
+        return {name: new[name] - old[name] for name in new}
+    # same status, a listed clip only counts for the tags or choices it gained or lost,
+    # the status and the tags are loaded only then
+    old, new = plain_counts(before), plain_counts(after)
+    counts = {name: new[name] - old[name] for name in new}
+    for name, key in MISSING_COUNTERS.items():
+        counts[name] = 0
+        if key in ('themes', 'subjects') and not state.attrs[key].history.has_changes():
+            continue
+        was_missing, is_missing = not before[key](), not after[key]()
+        if was_missing != is_missing and is_listed(after['status']()):
+            counts[name] = int(is_missing) - int(was_missing)
+    return counts
+
+def stored_values(session, obj, row):
+    """A clip as it is in the database, from the attribute history or from row when that is incomplete."""
+    state = sa.inspect(obj)
+    values = {}
+    for key in CLIP_COLUMNS:
+        if row is not None:
+            values[key] = row[key]
+            continue
+        history = state.attrs[key].history
+        values[key] = history.deleted[0] if history.deleted else getattr(obj, key)
+    values['status'] = lambda: session.get(Status, values['status_id']) if values['status_id'] is not None else None
+    values['category'] = lambda: values['category_id'] is not None
+    values['layout'] = lambda: values['layout_id'] is not None
+    for key in ('themes', 'subjects'):
+        history = state.attrs[key].history
+        if history.has_changes():
+            values[key] = lambda tags=list(history.unchanged) + list(history.deleted): tags
+        elif row is not None:
+            values[key] = lambda tags=row[f'has_{key}']: tags
+        else:
+            values[key] = lambda key=key: getattr(obj, key)
+    return values
+
+def pending_values(session, obj):
+    """A clip as the flush is about to write it."""
+    state = sa.inspect(obj)
+    values = {key: getattr(obj, key) for key in CLIP_COLUMNS}
+    status = state.attrs.status.history
+    if status.has_changes():
+        # relationships set in this flush haven't reached the foreign keys yet
+        related = status.added[0] if status.added else None
+        values['status_id'] = related.id if related is not None else None
+        values['status'] = lambda: related
+    else:
+        # not obj.status, that is still the old status when only status_id was set
+        values['status'] = lambda: session.get(Status, values['status_id']) if values['status_id'] is not None else None
+    for relationship, column in (('category', 'category_id'), ('layout', 'layout_id')):
+        history = state.attrs[relationship].history
+        if history.has_changes():
+            values[relationship] = lambda related=(history.added[0] if history.added else None): related is not None
+        else:
+            values[relationship] = lambda column=column: values[column] is not None
+    for key in ('themes', 'subjects'):
+        values[key] = lambda key=key: getattr(obj, key)
+    return values
+
+def needs_stored_row(obj):
+    # a column replaced before it was loaded has no old value in its history
+    state = sa.inspect(obj)
+    if CLIP_COLUMNS & state.unloaded:
+        return True
+    return any(state.attrs[key].history.has_changes() and not state.attrs[key].history.deleted for key in CLIP_COLUMNS)
+
+def stored_rows(connection, clip_ids):
+    if not clip_ids:
+        return {}
+    query = select(Clip.id, *(getattr(Clip, key) for key in CLIP_COLUMNS),
+                   exists().where(clip_themes.c.clip_id == Clip.id).label('has_themes'),
+                   exists().where(clip_subjects.c.clip_id == Clip.id).label('has_subjects')).where(Clip.id.in_(clip_ids))
+    return {row.id: row._mapping for row in connection.execute(query)}
+
+def distinct_deltas(connection, gained, lost):
+    """Changes of the distinct counters, only the broadcasters and creators clips moved to or from are looked up."""
+    deltas = {}
+    for name, column in DISTINCT_COUNTERS.items():
+        net = {value: gained[name][value] - lost[name][value] for value in gained[name] | lost[name]}
+        net = {value: change for value, change in net.items() if change}
+        if not net:
+            continue
+        counts = dict(connection.execute(select(column, func.count()).where(column.in_(list(net))).group_by(column)).all())
+        deltas[name] = sum(int(counts.get(value, 0) + change > 0) - int(counts.get(value, 0) > 0)
+                           for value, change in net.items())
+    return deltas
+
+def needs_recount(session):
+    for obj in session.deleted:
+        if isinstance(obj, RECOUNT_MODELS):
+            return True
+    for obj in session.dirty:
+        if isinstance(obj, Status) and sa.inspect(obj).attrs.type.history.has_changes():
+            return True
+    return False
+
+def before_flush_listener(session, flush_context, instances):
+    session.info.pop('catalog_deltas', None)
+    if needs_recount(session):
+        session.info['catalog_recount'] = True
+        return
+    changed = [obj for obj in session.dirty if isinstance(obj, Clip) and session.is_modified(obj)]
+    deleted = [obj for obj in session.deleted if isinstance(obj, Clip)]
+    added = [obj for obj in session.new if isinstance(obj, Clip)]
+    if not (changed or deleted or added):
+        return
+    connection = session.connection()
+    # the counters follow from what each clip was and is about to be, the database is read only for
+    # clips whose old values aren't in memory and for the broadcasters and creators that moved
+    rows = stored_rows(connection, [obj.id for obj in changed + deleted if needs_stored_row(obj)])
+    deltas = dict.fromkeys(CATALOG_COUNTERS, 0)
+    gained = {name: Counter() for name in DISTINCT_COUNTERS}
+    lost = {name: Counter() for name in DISTINCT_COUNTERS}
+    with session.no_autoflush:
+        for obj in changed + deleted + added:
+            before = stored_values(session, obj, rows.get(obj.id)) if obj not in added else None
+            after = pending_values(session, obj) if obj not in deleted else None
+            if before and after:
+                counts = changed_counts(obj, before, after)
+            elif after:
+                counts = clip_counts(after)
+            else:
+                counts = {name: -value for name, value in clip_counts(before).items()}
+            for name, value in counts.items():
+                deltas[name] += value
+            for name, column in DISTINCT_COUNTERS.items():
+                old = distinct_value(before[column.key]) if before else None
+                new = distinct_value(after[column.key]) if after else None
+                if old != new:
+                    if old is not None:
+                        lost[name][old] += 1
+                    if new is not None:
+                        gained[name][new] += 1
+        deltas.update(distinct_deltas(connection, gained, lost))
+    session.info['catalog_deltas'] = deltas
+
+def after_flush_listener(session, flush_context):
+    connection = session.connection()
+    if session.info.pop('catalog_recount', False):
+        store_counters(connection, count_catalog(connection))
+        return
+    deltas = session.info.pop('catalog_deltas', None)
+    if deltas:
+        adjust_counters(connection, deltas)
+
+def after_rollback_listener(session, previous_transaction):
+    session.info.pop('catalog_deltas', None)
+    session.info.pop('catalog_recount', None)
+
+def register_counter_listeners():
+    if not event.contains(db.session, 'before_flush', before_flush_listener):
+        event.listen(db.session, 'before_flush', before_flush_listener)
+        event.listen(db.session, 'after_flush', after_flush_listener)
+        event.listen(db.session, 'after_soft_rollback', after_rollback_listener)
@@ -0,0 +1,90 @@
+from collections import namedtuple
+import sqlalchemy as sa
+from flask import current_app
+from sqlalchemy import event, select
+from app import db
+from app.cache import Generation
+from app.models import *
+
+# Immutable copies of the filter and form choices, safe to share between requests
+StatusChoice = namedtuple('StatusChoice', 'id name color type')
+Choice = namedtuple('Choice', 'id name')
+SubjectChoice = namedtuple('SubjectChoice', 'id name subtext keywords')
+Broadcaster = namedtuple('Broadcaster', 'id name')
+Taxonomy = namedtuple('Taxonomy', 'statuses categories themes subjects subject_groups layouts broadcasters '
+                                  'category_ids layout_ids by_id')
+
+# models whose rows make up the taxonomy, any write to them invalidates it
+TAXONOMY_MODELS = (Status, Category, Theme, Subject, SubjectCategory, Layout)
+
+generation = Generation('taxonomy')
+
+def load_taxonomy():
+    statuses = tuple(StatusChoice(s.id, s.name, s.color, s.type) for s in Status.query.order_by('id'))
+    categories = tuple(Choice(c.id, c.name) for c in Category.query.order_by('id'))
+    themes = tuple(Choice(t.id, t.name) for t in Theme.query.order_by('id'))
+    layouts = tuple(Choice(l.id, l.name) for l in Layout.query.order_by('id'))
+    subject_rows = Subject.query.order_by('id').all()
+    subjects = tuple(SubjectChoice(su.id, su.name, su.subtext or '', su.keywords or '') for su in subject_rows)
+
+    # subjects grouped under their subject category, empty categories are left out
+    grouped = {}
+    for su, choice in zip(subject_rows, subjects):
+        grouped.setdefault(su.category_id, []).append(choice)
+    subject_groups = tuple((sc.name, tuple(grouped[sc.id]))
+                           for sc in SubjectCategory.query.order_by('id') if sc.id in grouped)
+
+    broadcasters = tuple(Broadcaster(*row) for row in db.session.execute(
+        select(Clip.broadcaster_id, Clip.broadcaster_name).distinct()
+    ))
+    # choices keyed by id for each kind, clip cards attach their tags from these
+    by_id = {kind: {choice.id: choice for choice in choices} for kind, choices in
+             (('status', statuses), ('category', categories), ('theme', themes), ('subject', subjects), ('layout', layouts))}
+    return Taxonomy(statuses, categories, themes, subjects, subject_groups, layouts, broadcasters,
+                    frozenset(c.id for c in categories), frozenset(l.id for l in layouts), by_id)
+
+def get_taxonomy():
+    # reloaded only when some process bumped the generation since this one last loaded it
+    current = generation.current()
+    cached = current_app.extensions.get('taxonomy')
+    if cached is None or cached[0] != current:
+        cached = (current, load_taxonomy())
+        current_app.extensions['taxonomy'] = cached
+    return cached[1]
+
+def changes_taxonomy(session):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, TAXONOMY_MODELS):
+            # tagging a clip touches the tag's clips collection, only its own columns matter here
+            if obj in session.dirty and not session.is_modified(obj, include_collections=False):
+                continue
+            return True
+        if isinstance(obj, Clip):
+            # the broadcaster list only changes when a clip brings a new broadcaster or one goes away
+            if obj in session.deleted:
+                return True
+            state = sa.inspect(obj)
+            if obj in session.dirty and not (state.attrs.broadcaster_id.history.has_changes()
+                                             or state.attrs.broadcaster_name.history.has_changes()):
+                continue
+            cached = current_app.extensions.get('taxonomy')
+            if cached is None or (obj.broadcaster_id, obj.broadcaster_name) not in cached[1].broadcasters:
+                return True
+    return False
+
+def after_flush_listener(session, flush_context):
+    if not session.info.get('taxonomy_changed') and changes_taxonomy(session):
+        session.info['taxonomy_changed'] = True
+
+def after_commit_listener(session):
+    if session.info.pop('taxonomy_changed', False):
+        generation.bump()
+
+def after_rollback_listener(session, previous_transaction):
+    session.info.pop('taxonomy_changed', None)
+
+def register_taxonomy_listeners():
+    if not event.contains(db.session, 'after_flush', after_flush_listener):
+        event.listen(db.session, 'after_flush', after_flush_listener)
+        event.listen(db.session, 'after_commit', after_commit_listener)
+        event.listen(db.session, 'after_soft_rollback', after_rollback_listener)
@@ -0,0 +1,215 @@
+import json, math
+from datetime import date, datetime, timedelta, timezone
+import sqlalchemy as sa
+from flask import current_app
+from sqlalchemy import func, literal, select, union_all
+from app import db
+from app.audit import INGESTION_TABLE, decode_lines
+from app.cache import Generation, TTLCache
+from app.models import *
+
+# Statistics columns the report can chart, in the order of the legend
+METRICS = ('total_clips', 'unsorted_clips', 'clips_without_subjects', 'clips_without_themes', 'clips_without_category',
+           'clips_without_layout', 'total_views', 'total_upvotes', 'total_verified_users', 'unique_broadcasters',
+           'unique_clippers')
+ROLLUPS = ('day', 'week', 'month')
+# a series is thinned to about this many points, more than a chart can tell apart
+MAX_POINTS = 366
+SERIES_CACHE_TTL = 86400
+SERIES_CACHE_SIZE = 256
+
+# bumped when past rows change, the rows of finished days are otherwise never written again
+generation = Generation('statistics')
+
+def period_start(day, rollup):
+    if rollup == 'week':
+        return day - timedelta(days=day.weekday())
+    if rollup == 'month':
+        return day.replace(day=1)
+    return day
+
+def roll_up(rows, metrics, rollup):
+    """One point per period holding the last value each metric had in it.
+
+    Statistics rows are snapshots of running totals, so the end of a period
+    stands for the whole period. Rows must come ordered by date.
+    """
+    points = {}
+    for row in rows:
+        point = points.setdefault(period_start(row.date, rollup), {})
+        for metric in metrics:
+            value = getattr(row, metric)
+            if value is not None:
+                point[metric] = value
+    return [{'date': start.isoformat(), **{metric: point.get(metric) for metric in metrics}}
+            for start, point in points.items()]
+
+def downsample(points, max_points=MAX_POINTS):
+    # every n-th point, the most recent one is always kept
+    if len(points) <= max_points:
+        return points
+    step = math.ceil(len(points) / max_points)
+    sampled = points[::step]
+    if sampled[-1] is not points[-1]:
+        sampled.append(points[-1])
+    return sampled
+
+def load_series(start, end, rollup, metrics):
+    rows = db.session.execute(
+        select(Statistics.date, *(getattr(Statistics, metric) for metric in metrics))
+        .where(Statistics.date.between(start, end))
+        # days recorded more than once keep their latest row
+        .order_by(Statistics.date, Statistics.id)
+    ).all()
+    points = roll_up(rows, metrics, rollup)
+    sampled = downsample(points)
+    return {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'rollup': rollup,
+        'metrics': list(metrics),
+        'points': sampled,
+        'downsampled': len(sampled) < len(points)
+    }
+
+def get_series_cache():
+    if 'statistics_cache' not in current_app.extensions:
+        current_app.extensions['statistics_cache'] = TTLCache(SERIES_CACHE_TTL, SERIES_CACHE_SIZE)
+    return current_app.extensions['statistics_cache']
+
+def is_settled(end):
+    # today's row is still updated by the scheduler, earlier days no longer change
+    return end < datetime.now(timezone.utc).date()
+
+def series_key(start, end, rollup, metrics):
+    return json.dumps([start.isoformat(), end.isoformat(), rollup, list(metrics), generation.current()])
+
+def get_series(start, end, rollup, metrics):
+    """Metrics between start and end rolled up per day, week or month, cached once the range is in the past."""
+    if not is_settled(end):
+        return load_series(start, end, rollup, metrics)
+    return get_series_cache().get_or_set(series_key(start, end, rollup, metrics),
+                                         lambda: load_series(start, end, rollup, metrics))
+
+def as_date(value):
+    # SQLite returns DATE() as a string, MySQL as a date
+    return value if isinstance(value, date) else date.fromisoformat(str(value))
+
+def first_seen_per_day(column):
+    first = select(column, func.min(Clip.created_at).label('first_at')).group_by(column).subquery()
+    return select(literal(column.key).label('kind'), func.date(first.c.first_at).label('day'), func.count().label('count')) \
+        .group_by(func.date(first.c.first_at))
+
+def clip_growth_per_day():
+    """New clips, broadcasters and clippers per day of Clip.created_at, in one grouped query."""
+    day = func.date(Clip.created_at)
+    growth = {}
+    for kind, value, count in db.session.execute(union_all(
+        select(literal('clips').label('kind'), day.label('day'), func.count().label('count')).group_by(day),
+        first_seen_per_day(Clip.broadcaster_id),
+        first_seen_per_day(Clip.creator_id)
+    )):
+        if value is not None:
+            growth.setdefault(as_date(value), {})[kind] = count
+    return growth
+
+def unsorted_changes_per_day():
+    """Change in unsorted clips per day, read in one pass from the clip history of the activity log
+    and the diffs of ingestion runs.
+
+    Returns the changes and the first day the log covers.
+    """
+    changes = {}
+    first_day = None
+    # the status each clip was last seen with, deletions don't record it
+    last_status = {}
+    rows = db.session.execute(
+        select(ActivityLog.table_name, ActivityLog.row_id, ActivityLog.timestamp, ActivityLog.action, ActivityLog.changes,
+               ActivityDetail.encoding, ActivityDetail.data)
+        .outerjoin(ActivityDetail, ActivityDetail.activity_id == ActivityLog.id)
+        .where(sa.or_(
+            sa.and_(ActivityLog.table_name == 'clip',
+                    sa.or_(ActivityLog.action != 'update', ActivityLog.changes.like('%"status_id"%'))),
+            # runs without inserts, deletes or status changes can't move the count
+            sa.and_(ActivityLog.table_name == INGESTION_TABLE,
+                    sa.or_(*(ActivityLog.changes.like(f'%"{key}"%') for key in ('insert', 'delete', 'status_id'))))
+        ))
+        .order_by(ActivityLog.timestamp, ActivityLog.id, ActivityDetail.id)
+        .execution_options(yield_per=1000)
+    )
+    for table, row_id, timestamp, action, raw, encoding, data in rows:
+        day = timestamp.date()
+        first_day = first_day or day
+        if table == INGESTION_TABLE:
+            # the diffs of a run count on the day it was logged
+            diffs = [(diff['row_id'], diff['action'], diff['changes'])
+                     for diff in (decode_lines(encoding, data) if data else []) if diff['table_name'] == 'clip']
+        else:
+            diffs = [(row_id, action, json.loads(raw) if raw else {})]
+        for row_id, action, row_changes in diffs:
+            # ingestion diffs hold the id as a number, the log as text
+            row_id = str(row_id)
+            if action == 'delete':
+                old, new = last_status.pop(row_id, None), None
+            else:
+                status = row_changes.get('status_id') or {}
+                old, new = status.get('old'), status.get('new')
+                last_status[row_id] = new
+            delta = (new == 1) - (old == 1)
+            if delta:
+                changes[day] = changes.get(day, 0) + delta
+    return changes, first_day
+
+def backfill_statistics():
+    """Write a Statistics row for every past day without one, returns the number of rows written.
+
+    Clip totals, broadcasters and clippers come from Clip.created_at, so clips
+    deleted since are missing from them. Unsorted clips are counted back from
+    today through the activity log and only for the days it covers. Views,
+    upvotes, tags and verified users have no history and stay empty.
+    """
+    growth = clip_growth_per_day()
+    if not growth:
+        return 0
+    changes, log_start = unsorted_changes_per_day()
+    today = datetime.now(timezone.utc).date()
+    recorded = set(as_date(value) for value in db.session.scalars(select(Statistics.date).distinct()))
+
+    # unsorted clips at the end of each day, walking back from the current count
+    unsorted = db.session.scalar(select(func.count(Clip.id)).where(Clip.status_id == 1))
+    unsorted_at = {}
+    if log_start:
+        day = today
+        while day >= log_start:
+            unsorted -= changes.get(day, 0)
+            day -= timedelta(days=1)
+            unsorted_at[day] = unsorted
+
+    rows = []
+    totals = {'clips': 0, 'broadcaster_id': 0, 'creator_id': 0}
+    day = min(growth)
+    while day < today:
+        for kind, count in growth.get(day, {}).items():
+            totals[kind] += count
+        if day not in recorded:
+            rows.append({
+                'date': day,
+                'total_clips': totals['clips'],
+                'unique_broadcasters': totals['broadcaster_id'],
+                'unique_clippers': totals['creator_id'],
+                'unsorted_clips': unsorted_at.get(day) if log_start and day >= log_start else None
+            })
+        day += timedelta(days=1)
+    if rows:
+        # a bulk statement, the backfill is not an edit to put in the activity log
+        db.session.execute(sa.insert(Statistics), rows)
+        db.session.commit()
+        generation.bump()
+    return len(rows)
+
+if __name__ == '__main__':
+    from app import create_app
+    app = create_app()
+    with app.app_context():
+        written = backfill_statistics()
+        print(f"Statistics backfilled, {written} day(s) written.")
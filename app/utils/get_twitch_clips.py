@@ -1,23 +1,28 @@
-from datetime import datetime
+from datetime import datetime, timezone
 from urllib.parse import urlencode
-from dotenv import load_dotenv
-import os, requests
+import requests
+from app.runtime import settings
 
-
-load_dotenv(override=True)
-
-TWITCH_CLIENT_ID = os.environ.get('TWITCH_CLIENT_ID')
-TWITCH_CLIENT_SECRET = os.environ.get('TWITCH_CLIENT_SECRET')
 TWITCH_CLIENT_ACCESS_TOKEN = ''
 TWITCH_TOKEN_URL = 'https://id.twitch.tv/oauth2/token'
 TWITCH_CLIP_URL = 'https://api.twitch.tv/helix/clips'
 
 
+def parse_twitch_timestamp(value):
+    # Twitch returns RFC3339 strings like 2024-05-01T12:34:56Z, clips store them as naive UTC datetimes
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
 def get_twitch_access_token():
     global TWITCH_CLIENT_ACCESS_TOKEN
     params = {
-        'client_id': TWITCH_CLIENT_ID,
-        'client_secret': TWITCH_CLIENT_SECRET,
+        'client_id': settings.twitch_client_id,
+        'client_secret': settings.twitch_client_secret,
         'grant_type': 'client_credentials'
     }
     response = requests.post(TWITCH_TOKEN_URL, data=params)
@@ -32,7 +37,7 @@ def fetch_clips_from_twitch(params):
     
     headers = {
         'Authorization': f'Bearer {TWITCH_CLIENT_ACCESS_TOKEN}',
-        'Client-Id': TWITCH_CLIENT_ID
+        'Client-Id': settings.twitch_client_id
     }
     
     qs = urlencode(params, doseq=True)
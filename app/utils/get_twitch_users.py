@@ -1,12 +1,7 @@
 from urllib.parse import urlencode
-from dotenv import load_dotenv
-import os, requests
+import requests
+from app.runtime import settings
 
-
-load_dotenv(override=True)
-
-TWITCH_CLIENT_ID = os.environ.get('TWITCH_CLIENT_ID')
-TWITCH_CLIENT_SECRET = os.environ.get('TWITCH_CLIENT_SECRET')
 TWITCH_CLIENT_ACCESS_TOKEN = ''
 TWITCH_TOKEN_URL = 'https://id.twitch.tv/oauth2/token'
 TWITCH_USERS_URL = 'https://api.twitch.tv/helix/users'
@@ -14,8 +9,8 @@ TWITCH_USERS_URL = 'https://api.twitch.tv/helix/users'
 def get_twitch_access_token():
     global TWITCH_CLIENT_ACCESS_TOKEN
     params = {
-        'client_id': TWITCH_CLIENT_ID,
-        'client_secret': TWITCH_CLIENT_SECRET,
+        'client_id': settings.twitch_client_id,
+        'client_secret': settings.twitch_client_secret,
         'grant_type': 'client_credentials'
     }
     response = requests.post(TWITCH_TOKEN_URL, data=params)
@@ -30,7 +25,7 @@ def fetch_users_from_twitch(params):
 
     headers = {
         'Authorization': f'Bearer {TWITCH_CLIENT_ACCESS_TOKEN}',
-        'Client-Id': TWITCH_CLIENT_ID
+        'Client-Id': settings.twitch_client_id
     }
 
     qs = urlencode(params, doseq=True)
@@ -9,5 +9,28 @@ class Config(object):
     SECRET_KEY = os.environ.get('SECRET_KEY')
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
     SQLALCHEMY_RECORD_QUERIES = os.environ.get('SQLALCHEMY_RECORD_QUERIES', 'False')
+    # auto, fulltext (MySQL), fts5 (SQLite), memory or like
+    SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND', 'auto')
+    # seconds anonymous feed pages are served from cache, in step with the one minute clip refresh
+    FEED_CACHE_TTL = int(os.environ.get('FEED_CACHE_TTL', 60))
+    # clip ids kept per precomputed feed and seconds before a list is too old to serve
+    TOP_FEED_SIZE = int(os.environ.get('TOP_FEED_SIZE', 240))
+    TOP_FEED_MAX_AGE = int(os.environ.get('TOP_FEED_MAX_AGE', 600))
+    # seconds the dashboard statistics snapshot is shown before the panels recompute it
+    STATS_CACHE_TTL = int(os.environ.get('STATS_CACHE_TTL', 60))
+    # seconds a dashboard listing's row count is reused, commits from any process reset it sooner
+    TABLE_COUNT_CACHE_TTL = int(os.environ.get('TABLE_COUNT_CACHE_TTL', 300))
+    # seconds between checks for changed clips when SEARCH_BACKEND is memory
+    SEARCH_INDEX_REFRESH = int(os.environ.get('SEARCH_INDEX_REFRESH', 30))
+    # sync writes the activity log in the request's transaction, async hands it to a writer thread after commit
+    AUDIT_WRITER = os.environ.get('AUDIT_WRITER', 'sync')
+    # rows the writer holds before commits wait up to AUDIT_QUEUE_TIMEOUT seconds and then spill to disk
+    AUDIT_QUEUE_SIZE = int(os.environ.get('AUDIT_QUEUE_SIZE', 10000))
+    AUDIT_QUEUE_TIMEOUT = float(os.environ.get('AUDIT_QUEUE_TIMEOUT', 1.0))
+    AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE', 500))
+    # zlib compress the per-row diffs of scheduler runs and the activity archive segments
+    AUDIT_DETAIL_COMPRESSION = os.environ.get('AUDIT_DETAIL_COMPRESSION', 'True').lower() == 'true'
+    # days activity rows stay before the scheduler archives them, table.action=days with * for any and 0 for forever
+    ACTIVITY_RETENTION = os.environ.get('ACTIVITY_RETENTION', 'ingestion=90,*=365')
     SESSION_PERMANENT = True
     PERMANENT_SESSION_LIFETIME = timedelta(days=31)
\ No newline at end of file
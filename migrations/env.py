@@ -51,6 +51,16 @@ def get_metadata():
     return target_db.metadata
 
 
+def include_object(object, name, type_, reflected, compare_to):
+    # the full-text search index is dialect specific and created by its migration,
+    # on SQLite it lives in the clip_search tables kept in sync by app.search
+    if type_ == 'table' and name.startswith('clip_search'):
+        return False
+    if type_ == 'index' and name == 'ix_clip_search_text':
+        return False
+    return True
+
+
 def run_migrations_offline():
     """Run migrations in 'offline' mode.
 
@@ -93,6 +103,8 @@ def run_migrations_online():
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    if conf_args.get("include_object") is None:
+        conf_args["include_object"] = include_object
 
     connectable = get_engine()
 
@@ -0,0 +1,82 @@
+"""Store Clip created_at as an indexed DateTime
+
+Revision ID: 3f5d8a1c7e20
+Revises: 6b1e0c2a9f47
+Create Date: 2026-10-18 16:02:47.118204
+
+"""
+from datetime import datetime, timezone
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f5d8a1c7e20'
+down_revision = '6b1e0c2a9f47'
+branch_labels = None
+depends_on = None
+
+# rows converted per statement while copying the old column into the new one
+BATCH_SIZE = 5000
+
+
+def parse_created_at(value):
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def format_created_at(value):
+    return value.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def copy_column(source, source_type, target, target_type, convert):
+    # walk the table by primary key so no single statement touches every row
+    conn = op.get_bind()
+    clip = sa.table('clip', sa.column('id', sa.Integer), sa.column(source, source_type), sa.column(target, target_type))
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(clip.c.id, clip.c[source])
+            .where(clip.c.id > last_id)
+            .order_by(clip.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        conn.execute(
+            clip.update().where(clip.c.id == sa.bindparam('clip_id')).values({target: sa.bindparam('value')}),
+            [{'clip_id': row[0], 'value': convert(row[1])} for row in rows]
+        )
+        last_id = rows[-1][0]
+
+
+def upgrade():
+    with op.batch_alter_table('clip', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('created_at_dt', sa.DateTime(), nullable=True))
+
+    copy_column('created_at', sa.String(32), 'created_at_dt', sa.DateTime(), parse_created_at)
+
+    with op.batch_alter_table('clip', schema=None) as batch_op:
+        batch_op.drop_column('created_at')
+        batch_op.alter_column('created_at_dt', new_column_name='created_at', existing_type=sa.DateTime(), nullable=False)
+
+    with op.batch_alter_table('clip', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_clip_created_at'), ['created_at'], unique=False)
+        batch_op.create_index('ix_clip_status_id_created_at', ['status_id', 'created_at'], unique=False)
+        batch_op.create_index('ix_clip_status_id_view_count', ['status_id', 'view_count'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('clip', schema=None) as batch_op:
+        batch_op.drop_index('ix_clip_status_id_view_count')
+        batch_op.drop_index('ix_clip_status_id_created_at')
+        batch_op.drop_index(batch_op.f('ix_clip_created_at'))
+        batch_op.add_column(sa.Column('created_at_str', sa.String(length=32), nullable=True))
+
+    copy_column('created_at', sa.DateTime(), 'created_at_str', sa.String(32), format_created_at)
+
+    with op.batch_alter_table('clip', schema=None) as batch_op:
+        batch_op.drop_column('created_at')
+        batch_op.alter_column('created_at_str', new_column_name='created_at', existing_type=sa.String(length=32), nullable=False)
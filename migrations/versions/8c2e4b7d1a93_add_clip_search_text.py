@@ -0,0 +1,87 @@
+"""Add Clip search_text and full-text index
+
+Revision ID: 8c2e4b7d1a93
+Revises: 3f5d8a1c7e20
+Create Date: 2026-10-18 17:41:05.552930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c2e4b7d1a93'
+down_revision = '3f5d8a1c7e20'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+
+def backfill_search_text():
+    # same text as app.search.build_search_text, built with plain tables so later model changes don't affect it
+    conn = op.get_bind()
+    meta = sa.MetaData()
+    clip = sa.Table('clip', meta, autoload_with=conn)
+    category = sa.Table('category', meta, autoload_with=conn)
+    layout = sa.Table('layout', meta, autoload_with=conn)
+    theme = sa.Table('theme', meta, autoload_with=conn)
+    subject = sa.Table('subject', meta, autoload_with=conn)
+    clip_themes = sa.Table('clip_themes', meta, autoload_with=conn)
+    clip_subjects = sa.Table('clip_subjects', meta, autoload_with=conn)
+
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(clip.c.id, clip.c.title, clip.c.title_override, clip.c.broadcaster_name,
+                      clip.c.creator_name, category.c.name, layout.c.name)
+            .select_from(clip.outerjoin(category, clip.c.category_id == category.c.id)
+                             .outerjoin(layout, clip.c.layout_id == layout.c.id))
+            .where(clip.c.id > last_id)
+            .order_by(clip.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        ids = [row[0] for row in rows]
+        tags = {clip_id: [] for clip_id in ids}
+        # subjects add their keywords after their name
+        for table, association, key, columns in ((theme, clip_themes, 'theme_id', (theme.c.name,)),
+                                                 (subject, clip_subjects, 'subject_id', (subject.c.name, subject.c.keywords))):
+            for clip_id, *parts in conn.execute(
+                sa.select(association.c.clip_id, *columns)
+                .join(table, association.c[key] == table.c.id)
+                .where(association.c.clip_id.in_(ids))
+                .order_by(association.c.clip_id, table.c.id)
+            ):
+                tags[clip_id] += parts
+        conn.execute(
+            clip.update().where(clip.c.id == sa.bindparam('clip_id')).values(search_text=sa.bindparam('value')),
+            [{'clip_id': row[0], 'value': ' '.join(part for part in list(row[1:]) + tags[row[0]] if part)} for row in rows]
+        )
+        last_id = ids[-1]
+
+
+def upgrade():
+    with op.batch_alter_table('clip', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('search_text', sa.Text(), nullable=True))
+
+    backfill_search_text()
+
+    dialect = op.get_bind().dialect.name
+    if dialect == 'mysql':
+        op.create_index('ix_clip_search_text', 'clip', ['search_text'], unique=False, mysql_prefix='FULLTEXT')
+    elif dialect == 'sqlite':
+        op.execute("CREATE VIRTUAL TABLE IF NOT EXISTS clip_search USING fts5(search_text, tokenize = 'unicode61 remove_diacritics 2')")
+        op.execute('INSERT INTO clip_search (rowid, search_text) SELECT id, search_text FROM clip')
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'mysql':
+        op.drop_index('ix_clip_search_text', table_name='clip')
+    elif dialect == 'sqlite':
+        op.execute('DROP TABLE IF EXISTS clip_search')
+
+    with op.batch_alter_table('clip', schema=None) as batch_op:
+        batch_op.drop_column('search_text')
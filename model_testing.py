@@ -30,7 +30,8 @@ class ModelTestCase(unittest.TestCase):
     # Test User creation and defaults
     def test_create_user(self):
         rank = Rank(name='Member')
-        user = User(id='123', 
+        user = User(id=123,
+                    twitch_id=123, 
                     login='test_login', 
                     display_name='test_user', 
                     profile_image_url='test_url', 
@@ -40,7 +41,7 @@ class ModelTestCase(unittest.TestCase):
         db.session.add(user)
         db.session.commit()
 
-        queried_user = db.session.get(User, '123')
+        queried_user = db.session.get(User, 123)
         self.assertIsNotNone(queried_user)
         self.assertEqual(queried_user.login, 'test_login')
         self.assertEqual(queried_user.display_name, 'test_user')
@@ -52,18 +53,19 @@ class ModelTestCase(unittest.TestCase):
     def test_clip_themes_relationship(self):
         theme = Theme(name='Horror')
         theme2 = Theme(name='Comedy')
-        clip = Clip(id='clip1', 
+        clip = Clip(id=1,
+                    twitch_id='clip1', 
                     url='url1', 
                     embed_url='embed1', 
-                    broadcaster_id='b_id1', 
+                    broadcaster_id=1, 
                     broadcaster_name='broadcast1', 
-                    creator_id='c_id1',
+                    creator_id=2,
                     creator_name='creator1',
                     game_id='game1',
                     language='en',
                     title='Scary Clip', 
                     view_count='201',
-                    created_at='created',
+                    created_at=datetime(2024, 1, 1),
                     thumbnail_url='thumbnail',
                     duration='30',
                     is_featured=1
@@ -76,7 +78,7 @@ class ModelTestCase(unittest.TestCase):
         db.session.add(clip)
         db.session.commit()
 
-        queried_clip = db.session.get(Clip, 'clip1')
+        queried_clip = db.session.get(Clip, 1)
         self.assertIn(theme, queried_clip.themes)
         self.assertIn(theme2, queried_clip.themes)
         self.assertIn(clip, theme.clips)
@@ -84,26 +86,29 @@ class ModelTestCase(unittest.TestCase):
     
     # Test User upvoting a Clip (Many-to-Many relationship)
     def test_user_upvote_clip(self):
-        user = User(id='123', 
+        user = User(id=123,
+                    twitch_id=123, 
                     login='test_login', 
                     display_name='test_user', 
                     profile_image_url='test_url')
-        user2 = User(id='223', 
+        user2 = User(id=223,
+                    twitch_id=223, 
                     login='test_login2', 
                     display_name='test_user2', 
                     profile_image_url='test_url2')
-        clip = Clip(id='clip1', 
+        clip = Clip(id=1,
+                    twitch_id='clip1', 
                     url='url1', 
                     embed_url='embed1', 
-                    broadcaster_id='b_id1', 
+                    broadcaster_id=1, 
                     broadcaster_name='broadcast1', 
-                    creator_id='c_id1',
+                    creator_id=2,
                     creator_name='creator1',
                     game_id='game1',
                     language='en',
                     title='Scary Clip', 
                     view_count='201',
-                    created_at='created',
+                    created_at=datetime(2024, 1, 1),
                     thumbnail_url='thumbnail',
                     duration='30',
                     is_featured=1
@@ -116,9 +121,9 @@ class ModelTestCase(unittest.TestCase):
         db.session.add(clip)
         db.session.commit()
 
-        queried_clip = db.session.get(Clip, 'clip1')
-        queried_user = db.session.get(User, '123')
-        queried_user2 = db.session.get(User, '223')
+        queried_clip = db.session.get(Clip, 1)
+        queried_user = db.session.get(User, 123)
+        queried_user2 = db.session.get(User, 223)
 
         self.assertIn(clip, queried_user.upvoted_clips)
         self.assertIn(clip, queried_user2.upvoted_clips)
@@ -128,18 +133,19 @@ class ModelTestCase(unittest.TestCase):
     # Test foreign key relationship between Clip and Category
     def test_clip_category_relationship(self):
         category = Category(name='Action')
-        clip = Clip(id='clip1', 
+        clip = Clip(id=1,
+                    twitch_id='clip1', 
                     url='url1', 
                     embed_url='embed1', 
-                    broadcaster_id='b_id1', 
+                    broadcaster_id=1, 
                     broadcaster_name='broadcast1', 
-                    creator_id='c_id1',
+                    creator_id=2,
                     creator_name='creator1',
                     game_id='game1',
                     language='en',
                     title='Scary Clip', 
                     view_count='201',
-                    created_at='created',
+                    created_at=datetime(2024, 1, 1),
                     thumbnail_url='thumbnail',
                     duration='30',
                     is_featured=1, 
@@ -149,7 +155,7 @@ class ModelTestCase(unittest.TestCase):
         db.session.add(clip)
         db.session.commit()
 
-        queried_clip = db.session.get(Clip, 'clip1')
+        queried_clip = db.session.get(Clip, 1)
         self.assertEqual(queried_clip.category.name, 'Action')
         self.assertIn(clip, category.clips)
     
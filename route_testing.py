@@ -0,0 +1,994 @@
+import os
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ.setdefault('SECRET_KEY', 'testing')
+os.environ.setdefault('SUPERADMIN_NAMES', '')
+
+from datetime import datetime, timezone, timedelta
+import glob, json, re, shutil, tempfile, threading, unittest
+from contextlib import contextmanager
+from flask import g
+from sqlalchemy import event, func, select
+from app import create_app, db
+from app.models import *
+from app.taxonomy import get_taxonomy, SubjectChoice
+from app.feeds import rebuild_top_feeds
+from app.runtime import settings, generation as settings_generation
+from config import Config
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'  # Use an in-memory SQLite database
+
+@contextmanager
+def capture_statements(with_parameters=False):
+    # the SQL sent inside the block, the listener is removed even when the block fails
+    statements = []
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters) if with_parameters else statement)
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+class ClipTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.assertEqual(self.app.config['SQLALCHEMY_DATABASE_URI'], 'sqlite://')
+
+        db.create_all()
+        self.client = self.app.test_client()
+
+        self.status = Status(name='Unsorted', type='Visible', color='#ff8040')
+        self.category = Category(name='Action')
+        self.layout = Layout(name='Fullscreen')
+        self.themes = [Theme(name='Comedy'), Theme(name='Horror')]
+        subject_category = SubjectCategory(name='Animals')
+        self.subjects = [Subject(name='Fox', public=True, category=subject_category),
+                         Subject(name='Parrot', public=True, category=subject_category)]
+        self.users = [User(twitch_id=100 + i, display_name=f'user{i}') for i in range(3)]
+        db.session.add_all([self.status, self.category, self.layout, subject_category] + self.themes + self.subjects + self.users)
+        db.session.commit()
+        self.clip_number = 0
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def add_clips(self, count):
+        now = datetime.now(timezone.utc)
+        for _ in range(count):
+            self.clip_number += 1
+            clip = Clip(twitch_id=f'clip{self.clip_number}',
+                        url='url',
+                        embed_url='https://clips.twitch.tv/embed?clip=x',
+                        broadcaster_id=1,
+                        broadcaster_name='broadcaster',
+                        creator_id=2,
+                        creator_name='creator',
+                        title=f'Clip {self.clip_number}',
+                        view_count=self.clip_number,
+                        created_at=(now - timedelta(hours=1)).replace(tzinfo=None),
+                        thumbnail_url='thumbnail',
+                        duration=30,
+                        is_featured=False,
+                        status=self.status,
+                        category=self.category,
+                        layout=self.layout,
+                        themes=list(self.themes),
+                        subjects=list(self.subjects),
+                        upvoted_by=list(self.users))
+            db.session.add(clip)
+        db.session.commit()
+        db.session.expire_all()
+
+    def log_in(self, user):
+        user.access_token, user.refresh_token = 'access', 'refresh'
+        user.last_verified = datetime.now(timezone.utc)
+        db.session.commit()
+        with self.client.session_transaction() as session:
+            session['_user_id'] = str(user.id)
+            session['_fresh'] = True
+        # requests share the test's app context, drop the user Flask-Login cached on g
+        g.pop('_login_user', None)
+
+    def count_queries(self, request, status=200):
+        with capture_statements() as statements:
+            response = request()
+        self.assertEqual(response.status_code, status)
+        return len(statements)
+
+class FeedQueryCountTestCase(ClipTestCase):
+    def setUp(self):
+        super().setUp()
+        # measure the uncached feed, the cache has its own tests
+        self.app.config['FEED_CACHE_TTL'] = 0
+
+    def assertConstantQueries(self, request, limit):
+        # the number of queries must not grow with the number of clips on the page
+        self.add_clips(2)
+        # warm per-process caches so both counts measure the same steady state
+        request()
+        small_page = self.count_queries(request)
+        self.add_clips(20)
+        full_page = self.count_queries(request)
+        self.assertEqual(small_page, full_page)
+        self.assertLessEqual(full_page, limit)
+
+    def test_index_query_count(self):
+        self.assertConstantQueries(lambda: self.client.get('/?sort=views&timeframe=all'), 6)
+
+    def test_load_clips_query_count(self):
+        params = json.dumps({'sort': 'views', 'timeframe': 'all', 'broadcasters': [], 'themes': [], 'subjects': []})
+        self.assertConstantQueries(lambda: self.client.post('/load-clips', data={'init_params_json': params}), 6)
+
+    def test_likes_sort_query_count(self):
+        params = json.dumps({'sort': 'likes', 'timeframe': 'all', 'broadcasters': [], 'themes': [], 'subjects': []})
+        self.assertConstantQueries(lambda: self.client.post('/load-clips', data={'init_params_json': params}), 6)
+
+    def test_clip_queue_query_count(self):
+        self.assertConstantQueries(lambda: self.client.get('/clip-queue?sort=views&timeframe=all'), 6)
+
+    def test_clip_queue_filter_query_count(self):
+        self.assertConstantQueries(lambda: self.client.post('/clip-queue/filter', data={'sort': 'views', 'timeframe': 'all'}), 6)
+
+    def test_clip_queue_next_query_count(self):
+        filters = json.dumps({'sort': 'views', 'timeframe': 'all'})
+        self.assertConstantQueries(lambda: self.client.post('/clip-queue/next', data={'clip_index': 0, 'cursors': json.dumps(['']), 'filters': filters}), 6)
+
+    def walk_load_clips(self, params):
+        seen = []
+        url = '/load-clips'
+        while url:
+            html = self.client.post(url, data={'init_params_json': json.dumps(params)}).get_data(as_text=True)
+            seen += re.findall(r'id="like-btn-(clip\d+)"', html)
+            match = re.search(r'hx-get="(/load-clips\?cursor=[^"]+)"', html)
+            url = match.group(1) if match else None
+        return seen
+
+    def test_load_clips_cursor_walks_every_clip(self):
+        # every clip shows up exactly once when following the cursors, even with tied sort keys
+        self.add_clips(30)
+        for clip in Clip.query.all():
+            clip.view_count = clip.id % 3
+        db.session.commit()
+        seen = self.walk_load_clips({'sort': 'views', 'timeframe': 'all', 'broadcasters': [], 'themes': [], 'subjects': []})
+        self.assertEqual(len(seen), 30)
+        self.assertEqual(set(seen), {f'clip{i}' for i in range(1, 31)})
+
+    def test_new_sort_cursor_walks_every_clip(self):
+        self.add_clips(30)
+        start = datetime(2024, 1, 1)
+        for clip in Clip.query.all():
+            clip.created_at = start + timedelta(days=clip.id % 4)
+        db.session.commit()
+        seen = self.walk_load_clips({'sort': 'new', 'timeframe': 'all', 'broadcasters': [], 'themes': [], 'subjects': []})
+        self.assertEqual(len(seen), 30)
+        self.assertEqual(set(seen), {f'clip{i}' for i in range(1, 31)})
+
+    def test_timeframe_filters_on_created_at(self):
+        self.add_clips(2)
+        old_clip = db.session.get(Clip, 1)
+        old_clip.created_at = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=10)
+        db.session.commit()
+        seen = self.walk_load_clips({'sort': 'new', 'timeframe': '7d', 'broadcasters': [], 'themes': [], 'subjects': []})
+        self.assertEqual(seen, ['clip2'])
+        seen = self.walk_load_clips({'sort': 'new', 'timeframe': 'custom:2000-01-01|2099-12-31', 'broadcasters': [], 'themes': [], 'subjects': []})
+        self.assertEqual(seen, ['clip2', 'clip1'])
+
+    def test_timeframe_filters_use_created_at_index(self):
+        # the feed query is explained with the parameters it ran with, the timeframe must be a range on the index
+        self.add_clips(2)
+        for sort in ('new', 'views'):
+            for timeframe in ('7d', 'custom:2000-01-01|2099-12-31'):
+                params = {'sort': sort, 'timeframe': timeframe, 'broadcasters': [], 'themes': [], 'subjects': []}
+                with capture_statements(with_parameters=True) as statements:
+                    self.client.post('/load-clips', data={'init_params_json': json.dumps(params)})
+                statement, parameters = next((statement, parameters) for statement, parameters in statements
+                                             if 'clip.created_at >= ?' in statement)
+                plan = [row[-1] for row in db.session.connection().exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)]
+                self.assertTrue(any(step.startswith('SEARCH clip USING INDEX ix_clip_status_id_created_at (status_id=? AND created_at>?')
+                                    for step in plan), plan)
+
+    def test_top_feeds_serve_precomputed_order(self):
+        self.add_clips(30)
+        self.app.config['TOP_FEED_SIZE'] = 20
+        rebuild_top_feeds()
+        self.assertEqual(ActivityLog.query.filter_by(table_name='top_feed').count(), 0)
+        feed = TopFeed.query.filter_by(sort='views', timeframe='all').one()
+        self.assertEqual(json.loads(feed.clip_ids), list(range(30, 10, -1)))
+        self.assertFalse(feed.complete)
+        # the stored list is followed and the live query takes over where it ends
+        params = {'sort': 'views', 'timeframe': 'all', 'broadcasters': [], 'themes': [], 'subjects': []}
+        self.assertEqual(self.walk_load_clips(params), [f'clip{i}' for i in range(30, 0, -1)])
+        # lists keep their order until the next rebuild
+        clip = db.session.get(Clip, 1)
+        clip.view_count = 1000
+        db.session.commit()
+        self.assertEqual(self.walk_load_clips(params)[0], 'clip30')
+        # filtered feeds and stale lists go to the live query
+        self.assertEqual(self.walk_load_clips(dict(params, layout=self.layout.id))[0], 'clip1')
+        self.app.config['TOP_FEED_MAX_AGE'] = -1
+        self.assertEqual(self.walk_load_clips(params)[0], 'clip1')
+
+    def test_top_feeds_skip_clips_hidden_since_rebuild(self):
+        self.add_clips(3)
+        rebuild_top_feeds()
+        hidden = Status(name='Hidden', type='Hidden', color='#000000')
+        db.session.get(Clip, 3).status = hidden
+        db.session.commit()
+        params = {'sort': 'views', 'timeframe': 'all', 'broadcasters': [], 'themes': [], 'subjects': []}
+        self.assertEqual(self.walk_load_clips(params), ['clip2', 'clip1'])
+
+    def test_clip_cards_show_tags(self):
+        self.add_clips(1)
+        html = self.client.get('/load-clips?sort=views&timeframe=all').get_data(as_text=True)
+        for text in ['Clip 1', 'Action', 'Comedy', 'Horror', 'Fox,', 'Parrot', '1 view']:
+            self.assertIn(text, html)
+        html = self.client.get('/clip-queue/filter?sort=views&timeframe=all').get_data(as_text=True)
+        self.assertIn('<span>Clip 1</span>', html)
+
+    def test_rendered_cards_are_shared_and_versioned(self):
+        self.add_clips(3)
+        url = '/load-clips?sort=views&timeframe=all'
+        anonymous = self.client.get(url).get_data(as_text=True)
+        self.assertNotIn('fa-solid fa-heart', anonymous)
+        created_at = db.session.get(Clip, 1).created_at.replace(tzinfo=timezone.utc)
+        self.assertIn(f'data-created-at="{int(created_at.timestamp())}"', anonymous)
+        # a viewer who liked the clips gets the cached cards with their own like buttons
+        self.log_in(self.users[0])
+        html = self.client.get(url).get_data(as_text=True)
+        self.assertEqual(html.count('fa-solid fa-heart'), 3)
+        self.assertEqual(html.replace('fa-solid', 'fa-regular').replace('btn-danger', 'btn-success'), anonymous)
+        cache = self.app.extensions['card_cache']
+        self.assertEqual((cache.hits, cache.misses), (3, 3))
+        # an edited clip is rendered again, the others are reused
+        clip = db.session.get(Clip, 2)
+        clip.title_override = 'Renamed'
+        db.session.commit()
+        self.assertIn('Renamed', self.client.get(url).get_data(as_text=True))
+        self.assertEqual((cache.hits, cache.misses), (5, 4))
+
+    def test_like_toggle(self):
+        self.add_clips(1)
+        db.session.get(Clip, 1).upvote_count = len(self.users)
+        db.session.commit()
+        self.assertIn('Please log in', self.client.post('/like-clip/clip1').headers['HX-Trigger'])
+        self.log_in(self.users[0])
+        # add_clips has every user like the clip, the first toggle removes the like
+        html = self.client.post('/like-clip/clip1').get_data(as_text=True)
+        self.assertIn('fa-regular fa-heart', html)
+        self.assertIn('2 likes', html)
+        db.session.expire_all()
+        self.assertEqual(db.session.get(Clip, 1).upvote_count, 2)
+        self.assertNotIn(self.users[0], db.session.get(Clip, 1).upvoted_by)
+        html = self.client.post('/like-clip/clip1').get_data(as_text=True)
+        self.assertIn('fa-solid fa-heart', html)
+        self.assertIn('3 likes', html)
+        # the upvoter list is never loaded, so the cost doesn't grow with the number of likers
+        for i in range(20):
+            db.session.execute(upvotes.insert().values(user_id=1000 + i, clip_id=1))
+        db.session.commit()
+        self.assertLessEqual(self.count_queries(lambda: self.client.post('/like-clip/clip1')), 6)
+        self.assertEqual(self.client.post('/like-clip/unknown').status_code, 404)
+
+    def assertCountersMatchRecount(self):
+        from app.stats import count_catalog, read_catalog_counters
+        self.assertEqual(read_catalog_counters(), count_catalog(db.session.connection()))
+
+    def test_catalog_counters_follow_changes(self):
+        from app.stats import compute_clip_stats, read_catalog_counters
+        self.add_clips(3)
+        stats = compute_clip_stats()
+        self.assertEqual((stats['total_clips'], stats['total_views'], stats['unique_clippers']), (3, 6, 1))
+        # edits, tags, new and deleted clips only adjust the stored counters
+        hidden = Status(name='Hidden', type='Hidden', color='#000000')
+        clip = db.session.get(Clip, 1)
+        clip.upvote_count = 3
+        clip.category, clip.themes = None, []
+        untagged = db.session.get(Clip, 2)
+        untagged.status, untagged.subjects, untagged.layout = hidden, [], None
+        db.session.get(Clip, 3).creator_id = 5
+        db.session.commit()
+        self.assertCountersMatchRecount()
+        self.add_clips(2)
+        db.session.delete(db.session.get(Clip, 4))
+        db.session.commit()
+        self.assertCountersMatchRecount()
+        counters = read_catalog_counters()
+        expected = {'total_clips': 4, 'unsorted_clips': 3, 'clips_without_subjects': 0, 'clips_without_themes': 1,
+                    'clips_without_category': 1, 'clips_without_layout': 0, 'total_views': 11, 'total_upvotes': 3,
+                    'unique_broadcasters': 1, 'unique_clippers': 2, 'total_duration_ms': 120000}
+        self.assertEqual({key: counters[key] for key in expected}, expected)
+        # deleting a tag or retyping a status touches clips outside the flush, everything is counted again
+        hidden.type = 'Visible'
+        db.session.delete(self.themes[0])
+        db.session.commit()
+        self.assertCountersMatchRecount()
+        self.log_in(self.users[0])
+        self.client.post('/like-clip/clip5')
+        self.assertEqual(read_catalog_counters()['total_upvotes'], 2)
+        self.assertCountersMatchRecount()
+        # columns set before they were loaded, the clip takes its creator's last clip away
+        clip = db.session.get(Clip, 5)
+        db.session.expire(clip)
+        clip.status_id, clip.creator_id = hidden.id, 5
+        db.session.commit()
+        self.assertCountersMatchRecount()
+        self.assertEqual(read_catalog_counters()['unique_clippers'], 2)
+        # an edit that moves no clip reads nothing for the counters
+        clip = db.session.get(Clip, 5)
+        with capture_statements() as statements:
+            clip.view_count = 50
+            db.session.commit()
+        self.assertFalse([statement for statement in statements if 'count(' in statement or 'FROM status' in statement])
+        self.assertCountersMatchRecount()
+
+    def test_dashboard_renders_cached_stats(self):
+        self.add_clips(2)
+        moderator = Rank(name='MODERATOR')
+        self.users[0].rank = moderator
+        db.session.add(moderator)
+        self.log_in(self.users[0])
+        # no snapshot yet, the page asks for the panels
+        html = self.client.get('/dashboard').get_data(as_text=True)
+        self.assertIn('hx-get="/dashboard/stats"', html)
+        html = self.client.get('/dashboard/stats').get_data(as_text=True)
+        self.assertNotIn('hx-get', html)
+        self.assertIn('As of', html)
+        # the fresh snapshot is rendered without counting again
+        self.add_clips(1)
+        html = self.client.get('/dashboard').get_data(as_text=True)
+        self.assertNotIn('hx-get="/dashboard/stats"', html)
+        self.assertEqual(self.app.extensions['clip_stats'][1]['total_clips'], 2)
+        self.app.config['STATS_CACHE_TTL'] = 0
+        self.client.get('/dashboard/stats')
+        self.assertEqual(self.app.extensions['clip_stats'][1]['total_clips'], 3)
+
+    def test_statistics_backfill_and_series(self):
+        from app.timeseries import backfill_statistics, downsample
+        self.add_clips(3)
+        today = datetime.now(timezone.utc).date()
+        days_ago = lambda days: today - timedelta(days=days)
+        for clip_id, days, creator_id in ((1, 10, 2), (2, 8, 2), (3, 8, 5)):
+            clip = db.session.get(Clip, clip_id)
+            clip.created_at, clip.creator_id = datetime.combine(days_ago(days), datetime.min.time()), creator_id
+        db.session.commit()
+        # the clips came in unsorted ten days ago and one was sorted today
+        db.session.execute(sa.update(ActivityLog).values(timestamp=datetime.combine(days_ago(10), datetime.min.time())))
+        db.session.get(Clip, 2).status = Status(name='Sorted', type='Visible', color='#00ff00')
+        db.session.add(Statistics(date=days_ago(5), total_clips=99))
+        db.session.commit()
+        self.assertEqual(backfill_statistics(), 9)
+        self.assertEqual(backfill_statistics(), 0)
+        rows = {row.date: row for row in Statistics.query}
+        self.assertEqual((rows[days_ago(10)].total_clips, rows[days_ago(10)].unique_clippers), (1, 1))
+        self.assertEqual((rows[days_ago(8)].total_clips, rows[days_ago(8)].unique_clippers), (3, 2))
+        self.assertEqual(rows[days_ago(1)].unsorted_clips, 3)
+        self.assertIsNone(rows[days_ago(1)].total_views)
+        self.assertEqual(rows[days_ago(5)].total_clips, 99)
+
+        admin = Rank(name='ADMIN')
+        self.users[0].rank = admin
+        db.session.add(admin)
+        self.log_in(self.users[0])
+        self.assertIn('statisticsChart', self.client.get('/dashboard/reports/statistics').get_data(as_text=True))
+        url = f'/dashboard/reports/statistics/data?start={days_ago(10)}&end={days_ago(1)}&rollup=month&metrics=total_clips'
+        response = self.client.get(url)
+        self.assertEqual(response.json['points'][-1]['total_clips'], 3)
+        self.assertEqual(len(response.json['points']), len({period.replace(day=1) for period in rows if period < today}))
+        # a past range is served from cache and revalidates by its ETag
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': response.headers['ETag']}).status_code, 304)
+        self.assertEqual(self.app.extensions['statistics_cache'].hits, 1)
+        self.assertEqual(self.client.get(url.replace('rollup=month', 'rollup=hour')).status_code, 400)
+        points = [{'date': n} for n in range(1000)]
+        sampled = downsample(points)
+        self.assertLessEqual(len(sampled), 367)
+        self.assertIs(sampled[-1], points[-1])
+
+    def test_statistics_backfill_reads_ingestion_runs(self):
+        from app.audit import ingestion_audit
+        from app.timeseries import backfill_statistics
+        today = datetime.now(timezone.utc).date()
+        days_ago = lambda days: datetime.combine(today - timedelta(days=days), datetime.min.time())
+        sorted_status = Status(name='Sorted', type='Visible', color='#00ff00')
+        db.session.add(sorted_status)
+        db.session.commit()
+        # the scheduler brought in three unsorted clips six days ago and sorted one of them three days ago
+        with ingestion_audit('update_clips_job'):
+            self.add_clips(3)
+        with ingestion_audit('update_clips_job'):
+            db.session.get(Clip, 3).status = sorted_status
+            db.session.commit()
+        summaries = ActivityLog.query.filter_by(table_name='ingestion').order_by(ActivityLog.id).all()
+        self.assertEqual(len(summaries), 2)
+        summaries[0].timestamp, summaries[1].timestamp = days_ago(6), days_ago(3)
+        for clip in Clip.query.all():
+            clip.created_at = days_ago(6)
+        db.session.commit()
+        # an admin sorted another one today
+        db.session.get(Clip, 2).status = sorted_status
+        db.session.commit()
+        backfill_statistics()
+        unsorted = {row.date: row.unsorted_clips for row in Statistics.query}
+        self.assertEqual([unsorted[days_ago(days).date()] for days in (6, 4, 3, 1)], [3, 3, 2, 2])
+
+    def search_load_clips(self, search, sort='views'):
+        return self.walk_load_clips({'sort': sort, 'timeframe': 'all', 'search': search, 'broadcasters': [], 'themes': [], 'subjects': []})
+
+    def test_search_matches_clip_text_and_tags(self):
+        self.add_clips(3)
+        clip = db.session.get(Clip, 2)
+        clip.title = 'Café opening'
+        clip.themes = []
+        db.session.commit()
+        self.assertEqual(self.search_load_clips('cafe'), ['clip2'])
+        self.assertEqual(self.search_load_clips('open'), ['clip2'])
+        self.assertEqual(set(self.search_load_clips('horror')), {'clip1', 'clip3'})
+        self.assertEqual(self.search_load_clips('fox cafe'), ['clip2'])
+        self.assertEqual(self.search_load_clips('nothing'), [])
+
+    def test_search_follows_tag_renames_and_deletes(self):
+        self.add_clips(2)
+        self.themes[0].name = 'Slapstick'
+        db.session.delete(db.session.get(Clip, 1))
+        db.session.commit()
+        self.assertEqual(self.search_load_clips('slapstick'), ['clip2'])
+        self.assertEqual(self.search_load_clips('comedy'), [])
+
+    def test_search_relevance_sort(self):
+        self.add_clips(30)
+        clip = db.session.get(Clip, 20)
+        clip.title = 'Parrot parrot parrot'
+        db.session.commit()
+        seen = self.search_load_clips('parrot', sort='relevance')
+        self.assertEqual(seen[0], 'clip20')
+        self.assertEqual(sorted(seen), sorted(f'clip{i}' for i in range(1, 31)))
+
+    def test_like_search_backend(self):
+        self.app.config['SEARCH_BACKEND'] = 'like'
+        self.add_clips(2)
+        clip = db.session.get(Clip, 2)
+        clip.title = 'Sunset'
+        db.session.commit()
+        self.assertEqual(self.search_load_clips('unse'), ['clip2'])
+        self.assertEqual(self.search_load_clips('unse', sort='relevance'), ['clip2'])
+
+    def test_search_query_count(self):
+        params = json.dumps({'sort': 'relevance', 'timeframe': 'all', 'search': 'fox', 'broadcasters': [], 'themes': [], 'subjects': []})
+        self.assertConstantQueries(lambda: self.client.post('/load-clips', data={'init_params_json': params}), 12)
+
+    def test_memory_search_backend(self):
+        self.app.config['SEARCH_BACKEND'] = 'memory'
+        self.app.config['SEARCH_INDEX_REFRESH'] = 0
+        self.add_clips(3)
+        self.subjects[0].keywords = 'vulpes'
+        clip = db.session.get(Clip, 2)
+        clip.title = 'Crème brûlée'
+        db.session.commit()
+        self.assertEqual(self.search_load_clips('creme BRU'), ['clip2'])
+        self.assertEqual(len(self.search_load_clips('vulp')), 3)
+        # later edits are picked up from updated_at without rebuilding
+        clip = db.session.get(Clip, 3)
+        clip.title = 'Sunrise'
+        db.session.commit()
+        self.assertEqual(self.search_load_clips('sunr'), ['clip3'])
+        self.assertEqual(self.search_load_clips('creme sunr'), [])
+        # texts rebuilt in place keep updated_at, the index is built again
+        from app.search import rebuild_search_index
+        db.session.execute(sa.update(Subject).where(Subject.id == self.subjects[0].id).values(keywords='lupus'))
+        rebuild_search_index()
+        self.assertEqual(len(self.search_load_clips('lupus')), 3)
+        self.assertEqual(self.search_load_clips('vulp'), [])
+
+    def test_taxonomy_cache_reused_until_commit(self):
+        self.add_clips(1)
+        taxonomy = get_taxonomy()
+        self.assertIs(get_taxonomy(), taxonomy)
+        self.assertEqual(taxonomy.subject_groups, (('Animals', tuple(SubjectChoice(s.id, s.name, '', '') for s in self.subjects)),))
+        db.session.add(Category(name='Drama'))
+        db.session.commit()
+        self.assertIn('Drama', [c.name for c in get_taxonomy().categories])
+
+    def test_taxonomy_cache_tracks_new_broadcasters(self):
+        self.add_clips(1)
+        taxonomy = get_taxonomy()
+        # more clips from a known broadcaster keep the snapshot
+        self.add_clips(1)
+        self.assertIs(get_taxonomy(), taxonomy)
+        clip = db.session.get(Clip, 2)
+        clip.broadcaster_id, clip.broadcaster_name = 3, 'guest'
+        db.session.commit()
+        self.assertEqual(set(get_taxonomy().broadcasters), {(1, 'broadcaster'), (3, 'guest')})
+
+    def test_anonymous_feed_cache(self):
+        self.app.config['FEED_CACHE_TTL'] = 60
+        self.add_clips(2)
+        load = lambda params: self.client.post('/load-clips', data={'init_params_json': json.dumps(params)})
+        params = {'sort': 'views', 'timeframe': 'all', 'broadcasters': [], 'themes': ['2', '1'], 'subjects': [], 'search': 'clip '}
+        first = self.count_queries(lambda: load(params))
+        self.assertGreater(first, 0)
+        # the same filters in another order and with extra whitespace are served from cache,
+        # only the data version in the key is read
+        params.update(themes=['1', '2', '1'], search=' clip')
+        self.assertEqual(self.count_queries(lambda: load(params)), 1)
+        # the first page of the index is the same fragment
+        self.client.get('/?sort=views&timeframe=all&themes=1,2&search=clip')
+        stats = self.app.extensions['feed_cache'].stats()
+        self.assertEqual((stats['hits'], stats['misses']), (2, 1))
+
+    def test_feed_cache_skipped_for_logged_in_users(self):
+        self.app.config['FEED_CACHE_TTL'] = 60
+        self.add_clips(1)
+        user = self.users[0]
+        user.access_token, user.refresh_token = 'access', 'refresh'
+        user.last_verified = datetime.now(timezone.utc)
+        db.session.commit()
+        params = json.dumps({'sort': 'views', 'timeframe': 'all', 'broadcasters': [], 'themes': [], 'subjects': []})
+        anonymous = self.client.post('/load-clips', data={'init_params_json': params}).get_data(as_text=True)
+        self.assertIn('fa-regular fa-heart', anonymous)
+        with self.client.session_transaction() as session:
+            session['_user_id'] = str(user.id)
+            session['_fresh'] = True
+        # requests share the test's app context, drop the anonymous user Flask-Login cached on g
+        g.pop('_login_user', None)
+        liked = self.client.post('/load-clips', data={'init_params_json': params}).get_data(as_text=True)
+        self.assertIn('fa-solid fa-heart', liked)
+
+    def test_fragment_revalidation(self):
+        self.add_clips(2)
+        url = '/load-clips?sort=views&timeframe=all'
+        response = self.client.get(url)
+        etag = response.headers['ETag']
+        self.assertIn('no-cache', response.headers['Cache-Control'])
+        # a matching revalidation only reads the data version
+        queries = self.count_queries(lambda: self.client.get(url, headers={'If-None-Match': etag}), status=304)
+        self.assertEqual(queries, 1)
+        # other filters get their own validator
+        self.assertNotEqual(self.client.get(url + '&search=fox').headers['ETag'], etag)
+        # any change to a clip moves the data version
+        clip = db.session.get(Clip, 1)
+        clip.view_count += 1
+        db.session.commit()
+        response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_cached_fragment_follows_its_etag(self):
+        self.app.config['FEED_CACHE_TTL'] = 60
+        self.app.extensions.pop('feed_cache', None)
+        self.add_clips(2)
+        hidden = Status(name='Removed', type='Hidden', color='#000000')
+        db.session.add(hidden)
+        db.session.commit()
+        url = '/load-clips?sort=views&timeframe=all'
+        response = self.client.get(url)
+        self.assertIn('clip2', response.get_data(as_text=True))
+        etag = response.headers['ETag']
+        db.session.get(Clip, 2).status = hidden
+        db.session.commit()
+        # the cached page of the old data isn't served under the new validator
+        response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('like-btn-clip2', response.get_data(as_text=True))
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': response.headers['ETag']}).status_code, 304)
+
+    def test_clip_queue_fragments_revalidate(self):
+        self.add_clips(2)
+        for url in ['/clip-queue/filter?sort=views&timeframe=all',
+                    '/clip-queue/next?clip_index=0&filters={}&cursors=[""]',
+                    '/clip-queue/prev?clip_index=1&filters={}&cursors=[""]']:
+            etag = self.client.get(url).headers['ETag']
+            self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 304)
+
+class DashboardTableTestCase(ClipTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = Rank(name='ADMIN')
+        self.users[0].rank = self.admin
+        db.session.add(self.admin)
+        self.log_in(self.users[0])
+
+    def test_taxonomy_listings_count_clips_in_query(self):
+        urls = ['/dashboard/categories', '/dashboard/themes', '/dashboard/subjects', '/dashboard/layouts',
+                '/dashboard/statuslabels']
+        self.add_clips(2)
+        for url in urls:
+            self.client.get(url)
+        few = [self.count_queries(lambda: self.client.get(url)) for url in urls]
+        self.add_clips(20)
+        db.session.add_all([Theme(name=f'Theme {i}', created_by=self.users[1].id, updated_by=self.users[2].id) for i in range(5)])
+        db.session.commit()
+        for url in urls:
+            self.client.get(url)
+        self.assertEqual([self.count_queries(lambda: self.client.get(url)) for url in urls], few)
+        for url in urls:
+            html = self.client.get(url + '?sort=clips&order=desc').get_data(as_text=True)
+            self.assertIn('<td>22</td>', html)
+        self.assertIn('user1', self.client.get('/dashboard/themes').get_data(as_text=True))
+
+    def test_dashboard_tables_search_by_type_and_reuse_counts(self):
+        self.users[1].twitch_id = 2
+        self.add_clips(12)
+        html = self.client.get('/dashboard/clips?search=clip 1&page=1').get_data(as_text=True)
+        self.assertIn('of 4 rows', html)
+        # ids are compared whole, not as text
+        html = self.client.get('/dashboard/clips?search=2').get_data(as_text=True)
+        self.assertIn('of 2 rows', html)
+        today = datetime.now(timezone.utc).date().isoformat()
+        self.assertIn('of 0 rows', self.client.get('/dashboard/reports/activity?search=1999-01').get_data(as_text=True))
+        self.assertNotIn('of 0 rows', self.client.get(f'/dashboard/reports/activity?search={today}').get_data(as_text=True))
+        html = self.client.get('/dashboard/users?search=&sort=clips&order=desc').get_data(as_text=True)
+        self.assertLess(html.index('user1'), html.index('user2'))
+        self.assertIn('<td>12</td>', html)
+
+        # a page past the end falls back to the first, the count is reused until a commit
+        request = lambda: self.client.get('/dashboard/clips?search=&page=9').get_data(as_text=True)
+        self.assertIn('of 12 rows', request())
+        with capture_statements() as statements:
+            request()
+        self.assertFalse([statement for statement in statements if 'count(*)' in statement])
+        self.add_clips(1)
+        self.assertIn('of 13 rows', request())
+
+    def test_only_listed_rows_invalidate_counts(self):
+        from app.dash.tables import generation as tables_generation
+        self.add_clips(1)
+        before = tables_generation.current()
+        # a value set back to itself and a row no listing counts keep the cached counts
+        clip = db.session.get(Clip, 1)
+        clip.title = clip.title
+        db.session.add(TopFeed(sort='views', timeframe='all', clip_ids='[]', complete=True, built_at=datetime.now(timezone.utc)))
+        db.session.commit()
+        self.assertEqual(tables_generation.current(), before)
+        db.session.get(Clip, 1).title = 'Retitled'
+        db.session.commit()
+        self.assertNotEqual(tables_generation.current(), before)
+        before = tables_generation.current()
+        # the clips listing leaves out hidden statuses, so status rows count too
+        self.status.type = 'Hidden'
+        db.session.commit()
+        self.assertNotEqual(tables_generation.current(), before)
+
+class ActivityLogTestCase(ClipTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = Rank(name='ADMIN')
+        self.users[0].rank = self.admin
+        db.session.add(self.admin)
+        self.log_in(self.users[0])
+
+    def test_activity_filters_and_row_history(self):
+        self.add_clips(3)
+        clip = db.session.get(Clip, 2)
+        clip.title_override = 'Renamed'
+        db.session.commit()
+
+        html = self.client.get('/dashboard/reports/activity?table_name=clip&action=update&page=1').get_data(as_text=True)
+        self.assertIn('of 1 rows', html)
+        self.assertIn('Renamed', html)
+        # the filters stay until they are changed, like the search
+        self.assertIn('of 1 rows', self.client.get('/dashboard/reports/activity?search=').get_data(as_text=True))
+        tomorrow = (datetime.now(timezone.utc) + timedelta(days=1)).date().isoformat()
+        self.assertIn('of 0 rows', self.client.get(f'/dashboard/reports/activity?since={tomorrow}').get_data(as_text=True))
+        html = self.client.get('/dashboard/reports/activity?action=&since=&admin_id=system').get_data(as_text=True)
+        self.assertIn('of 4 rows', html)
+
+        html = self.client.get('/dashboard/clips/2/edit').get_data(as_text=True)
+        self.assertIn('History', html)
+        self.assertIn('Renamed', html)
+        self.assertEqual(html.count('<td>update</td>') + html.count('<td>insert</td>'), 2)
+
+    def test_activity_log_written_once_per_flush(self):
+        self.add_clips(3)
+        logged = ActivityLog.query.count()
+        with capture_statements() as statements:
+            for clip in Clip.query.all():
+                clip.title_override = f'Renamed {clip.id}'
+            self.users[0].notes = 'Trusted'
+            self.users[0].access_token = 'secret'
+            # a quiet column only, not logged
+            self.users[1].contributions = 5
+            db.session.commit()
+        self.assertEqual(len([statement for statement in statements if statement.startswith('INSERT INTO activity_log')]), 1)
+
+        updates = ActivityLog.query.filter(ActivityLog.id > logged, ActivityLog.action == 'update').order_by(ActivityLog.table_name, ActivityLog.row_id).all()
+        self.assertEqual([(log.table_name, log.row_id) for log in updates],
+                         [('clip', 1), ('clip', 2), ('clip', 3), ('user', self.users[0].id)])
+        # the tokens are not tracked
+        self.assertEqual(json.loads(updates[-1].changes), {'notes': {'old': None, 'new': 'Trusted'}})
+
+        # a failed flush leaves nothing behind for the next one
+        db.session.add(Category(name='Action'))
+        with self.assertRaises(Exception):
+            db.session.commit()
+        db.session.rollback()
+        self.assertNotIn('activity_records', db.session.info)
+        self.assertEqual(ActivityLog.query.filter_by(table_name='category').count(), 1)
+
+    def test_activity_retention_archives_and_searches(self):
+        from app.audit import ingestion_audit
+        from app.retention import archive_activity, search_archive
+        self.add_clips(3)
+        with ingestion_audit('update_clips_job'):
+            db.session.get(Clip, 1).title = 'Retitled on Twitch'
+            db.session.commit()
+        db.session.delete(db.session.get(Clip, 3))
+        db.session.commit()
+        live = ActivityLog.query.count()
+        old = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=400)
+        db.session.execute(sa.update(ActivityLog).values(timestamp=old))
+        db.session.commit()
+
+        # the most specific policy wins, deletions of clips are kept
+        self.app.config['ACTIVITY_RETENTION'] = 'ingestion=30,clip.delete=0,*=365'
+        self.assertEqual(archive_activity(chunk_size=4), live - 1)
+        self.assertEqual([(log.table_name, log.action) for log in ActivityLog.query.all()], [('clip', 'delete')])
+        self.assertEqual(ActivityDetail.query.count(), 0)
+        self.assertEqual(sum(segment.row_count for segment in ActivityArchive.query.all()), live - 1)
+        self.assertGreater(ActivityArchive.query.count(), 1)
+        self.assertEqual(archive_activity(), 0)
+
+        activities, truncated = search_archive({'table_name': 'ingestion'})
+        self.assertEqual(len(activities), 1)
+        self.assertIn('Retitled on Twitch', json.dumps(activities[0]['diffs']))
+        activities, truncated = search_archive({'table_name': 'clip', 'since': old + timedelta(days=1)})
+        self.assertEqual(activities, [])
+        html = self.client.get('/dashboard/reports/activity/archive?search=clip2').get_data(as_text=True)
+        self.assertIn('<td>clip2</td>', html)
+        self.assertNotIn('<td>clip1</td>', html)
+
+    def test_async_audit_writer_spills_and_replays(self):
+        from sqlalchemy import create_engine
+        from app.audit import get_audit_writer
+        from app.audit_writer import AuditWriter
+        logged = ActivityLog.query.count()
+        self.app.config['AUDIT_WRITER'] = 'async'
+        self.add_clips(2)
+        writer = get_audit_writer()
+        writer.drain()
+        self.assertEqual(ActivityLog.query.filter_by(table_name='clip', action='insert').count(), 2)
+        self.assertEqual(writer.stats()['written'], 2)
+        self.assertEqual(writer.stats()['queued'], 0)
+        # a rolled back change never reaches the writer
+        db.session.get(Clip, 1).title_override = 'Discarded'
+        db.session.flush()
+        db.session.rollback()
+        writer.drain()
+        self.assertEqual(writer.stats()['written'], 2)
+
+        spill_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spill_dir)
+        record = {'table_name': 'clip', 'row_id': '1', 'row_name': 'None', 'row_twitch_id': 'clip1', 'action': 'update',
+                  'timestamp': datetime.now(timezone.utc), 'changes': None, 'admin_id': None}
+        # the database is unreachable, the rows wait on disk
+        offline = AuditWriter(create_engine(f'sqlite:///{spill_dir}/missing/audit.db'), spill_dir, self.app.logger)
+        offline.submit([record, dict(record, row_id='2')])
+        offline.close()
+        self.assertEqual(offline.stats()['spilled'], 2)
+        self.assertEqual(offline.stats()['spill_files'], 1)
+        # written back by the first writer that reaches the database
+        online = AuditWriter(db.engine, spill_dir, self.app.logger)
+        online.submit([dict(record, row_id='3')])
+        online.close()
+        self.assertEqual(online.stats()['replayed'], 2)
+        self.assertEqual(online.stats()['spill_files'], 0)
+        self.assertEqual(ActivityLog.query.filter(ActivityLog.id > logged, ActivityLog.action == 'update').count(), 3)
+
+        # a process died while replaying, the file it claimed is taken back
+        import subprocess, sys
+        offline.submit([dict(record, row_id='4')])
+        offline.close()
+        dead = subprocess.Popen([sys.executable, '-c', ''])
+        dead.wait()
+        path = glob.glob(os.path.join(spill_dir, '*.jsonl'))[0]
+        os.rename(path, f'{path}.{dead.pid}.claimed')
+        self.assertEqual(online.stats()['spill_files'], 1)
+        online.replay()
+        self.assertEqual(online.stats()['reclaimed'], 1)
+        self.assertEqual(online.stats()['spill_files'], 0)
+        self.assertEqual(ActivityLog.query.filter(ActivityLog.id > logged, ActivityLog.action == 'update').count(), 4)
+
+class SchedulerIngestionTestCase(ClipTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = Rank(name='ADMIN')
+        self.users[0].rank = self.admin
+        db.session.add(self.admin)
+        self.log_in(self.users[0])
+
+    def test_ingestion_runs_log_one_summary(self):
+        from app.audit import ingestion_audit
+        logged = ActivityLog.query.count()
+        with ingestion_audit('update_clips_job'):
+            self.add_clips(2)
+            for clip in Clip.query.all():
+                clip.view_count += 10
+            db.session.get(Clip, 1).title = 'Retitled on Twitch'
+            db.session.commit()
+            # rolled back work isn't counted
+            db.session.get(Clip, 2).title = 'Never saved'
+            db.session.flush()
+            db.session.rollback()
+        summaries = ActivityLog.query.filter(ActivityLog.id > logged).all()
+        self.assertEqual([(log.table_name, log.action, log.row_name) for log in summaries],
+                         [('ingestion', 'ingest', 'update_clips_job')])
+        summary = json.loads(summaries[0].changes)
+        self.assertEqual(summary['insert'], {'clip': 2})
+        self.assertEqual(summary['update'], {'clip': 2})
+        self.assertEqual(summary['fields'], {'view_count': 2, 'title': 1})
+        # the view count refreshes are counted but not kept
+        self.assertEqual(summary['diffs'], 3)
+        detail = db.session.scalars(select(ActivityDetail)).one()
+        self.assertEqual(detail.encoding, 'zlib')
+
+        # a run changing nothing leaves no row
+        with ingestion_audit('update_recent_clips_job'):
+            db.session.commit()
+        self.assertEqual(ActivityLog.query.filter(ActivityLog.id > logged).count(), 1)
+
+        html = self.client.get('/dashboard/reports/activity?table_name=ingestion&action=&admin_id=&since=&until=').get_data(as_text=True)
+        self.assertIn('of 1 rows', html)
+        self.assertIn('3 changed rows', html)
+        html = self.client.get(f'/dashboard/reports/activity/{summaries[0].id}/details').get_data(as_text=True)
+        self.assertIn('Retitled on Twitch', html)
+        self.assertEqual(html.count('<td>insert</td>'), 2)
+        self.assertEqual(self.client.get(f'/dashboard/reports/activity/{logged}/details').status_code, 404)
+
+    def test_large_ingestion_runs_split_their_diffs(self):
+        from unittest import mock
+        from app.audit import ingestion_audit, get_ingestion_diffs
+        self.app.config['AUDIT_DETAIL_COMPRESSION'] = False
+        logged = ActivityLog.query.count()
+        with mock.patch('app.audit.ENCODED_MAX_BYTES', 1024), ingestion_audit('update_clips_job'):
+            self.add_clips(20)
+        summary = ActivityLog.query.filter(ActivityLog.id > logged).one()
+        self.assertGreater(ActivityDetail.query.count(), 1)
+        self.assertTrue(all(len(detail.data) <= 1024 for detail in ActivityDetail.query))
+        self.assertEqual([diff['row_twitch_id'] for diff in get_ingestion_diffs(summary.id)],
+                         [f'clip{i}' for i in range(1, 21)])
+
+    def test_failed_ingestion_summary_keeps_the_job_error(self):
+        from unittest import mock
+        from app.audit import ingestion_audit
+        with mock.patch('app.audit.write_ingestion_summary', side_effect=RuntimeError('summary')):
+            with self.assertRaisesRegex(ValueError, 'job'):
+                with ingestion_audit('update_clips_job'):
+                    self.add_clips(1)
+                    raise ValueError('job')
+            # a job that went through still hears about its summary
+            with self.assertRaisesRegex(RuntimeError, 'summary'):
+                with ingestion_audit('update_clips_job'):
+                    self.add_clips(1)
+        self.assertEqual(Clip.query.count(), 2)
+
+    def test_update_clips_looks_up_each_page_once(self):
+        from unittest import mock
+        from app.scheduler.tasks import update_clips as task
+        self.add_clips(1)
+
+        def helix_clip(twitch_id, creator_id, creator_name, title):
+            return {'id': twitch_id, 'url': 'url', 'embed_url': 'https://clips.twitch.tv/embed?clip=x',
+                    'broadcaster_id': '1', 'broadcaster_name': 'broadcaster', 'creator_id': str(creator_id),
+                    'creator_name': creator_name, 'video_id': '', 'game_id': '1', 'language': 'en', 'title': title,
+                    'view_count': 1, 'created_at': '2025-01-01T00:00:00Z', 'thumbnail_url': 'thumbnail',
+                    'duration': 30, 'vod_offset': None, 'is_featured': False}
+        pages = {
+            None: {'data': [helix_clip('clip1', 100, 'renamed', 'Retitled on Twitch'),
+                            helix_clip('new1', 900, 'newcomer', 'First'),
+                            helix_clip('new2', 900, 'newcomer', 'Second')],
+                   'pagination': {'cursor': 'page2'}},
+            # pages overlap when clips are made while paginating
+            'page2': {'data': [helix_clip('new1', 900, 'newcomer', 'First'),
+                               helix_clip('new3', 900, 'newcomer', 'Third')],
+                      'pagination': {}}
+        }
+        with capture_statements() as statements, mock.patch.object(settings, 'broadcaster_id', '1'), \
+                mock.patch.object(task, 'get_clips_by_broadcaster_id', lambda broadcaster_id, started_at, after=None: pages[after]):
+            task.update_clips(started_at='2025-01-01T00:00:00Z', save_to_file=False)
+
+        self.assertEqual(len([statement for statement in statements if 'WHERE user.twitch_id IN' in statement]), 2)
+        self.assertEqual(len([statement for statement in statements if 'WHERE clip.twitch_id IN' in statement]), 2)
+        self.assertEqual(sorted(clip.twitch_id for clip in Clip.query.all()), ['clip1', 'new1', 'new2', 'new3'])
+        self.assertEqual(db.session.get(Clip, 1).title, 'Retitled on Twitch')
+        self.assertEqual(User.query.filter_by(twitch_id=900).count(), 1)
+        self.assertEqual(User.query.filter_by(twitch_id=100).one().display_name, 'renamed')
+
+class RuntimeSettingsTestCase(ClipTestCase):
+    def setUp(self):
+        super().setUp()
+        # tests change the environment, put it back and reload the settings from it
+        environ = dict(os.environ)
+        self.addCleanup(settings.reload)
+        self.addCleanup(lambda: (os.environ.clear(), os.environ.update(environ)))
+        settings.checked_at = 0
+
+    def test_runtime_settings_reload_on_request(self):
+        from unittest import mock
+        self.assertTrue(settings.clip_logos)
+        # requests pick logos from the list read at startup, not from the static folder
+        with mock.patch('os.listdir', side_effect=AssertionError('static folder listed in a request')):
+            html = self.client.get('/').get_data(as_text=True)
+            self.assertTrue(any(logo in html for logo in settings.clip_logos))
+            html = self.client.get('/about').get_data(as_text=True)
+            self.assertTrue(any(logo in html for logo in settings.clip_logos))
+        os.environ['EMBED_PARENT'] = 'example.com'
+        # another process asked for a reload, this one notices on its next check
+        self.client.get('/')
+        settings_generation.bump()
+        settings.checked_at = 0
+        self.client.get('/')
+        self.assertEqual(settings.embed_parent, 'example.com')
+
+    def test_scheduler_jobs_reload_settings(self):
+        from unittest import mock
+        from app.scheduler import scheduler
+        settings.reload_if_requested()
+        os.environ['BROADCASTER_ID'] = '999'
+        # the dashboard asked for a reload, the scheduler serves no requests and checks in its jobs
+        settings_generation.bump()
+        settings.checked_at = 0
+        with mock.patch.object(scheduler, 'app', self.app):
+            scheduler.archive_activity_job()
+        self.assertEqual(settings.broadcaster_id, '999')
+
+class LikeConcurrencyTestCase(unittest.TestCase):
+    """Parallel like toggles, on a database file since each toggle needs its own connection."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        config = type('FileTestConfig', (TestConfig,), {
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(self.directory, 'test.db')}"
+        })
+        self.app = create_app(config)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        now = datetime.now(timezone.utc)
+        self.users = [User(twitch_id=100 + i, display_name=f'user{i}', access_token='access',
+                           refresh_token='refresh', last_verified=now) for i in range(16)]
+        clip = Clip(twitch_id='clip1', url='url', embed_url='embed', broadcaster_id=1, broadcaster_name='broadcaster',
+                    creator_id=2, creator_name='creator', title='Clip 1', view_count=1,
+                    created_at=now.replace(tzinfo=None), thumbnail_url='thumbnail', duration=30, is_featured=False)
+        db.session.add_all(self.users + [clip])
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        shutil.rmtree(self.directory)
+
+    def toggle_in_parallel(self, users):
+        barrier = threading.Barrier(len(users))
+        statuses = []
+        def toggle(user_id):
+            client = self.app.test_client()
+            with client.session_transaction() as session:
+                session['_user_id'] = str(user_id)
+                session['_fresh'] = True
+            barrier.wait()
+            statuses.append(client.post('/like-clip/clip1').status_code)
+        threads = [threading.Thread(target=toggle, args=(user.id,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(statuses, [200] * len(users))
+
+    def assertLikes(self, count):
+        db.session.expire_all()
+        self.assertEqual(db.session.get(Clip, 1).upvote_count, count)
+        self.assertEqual(db.session.scalar(select(func.count()).select_from(upvotes)), count)
+
+    def test_parallel_toggles_keep_counts_consistent(self):
+        self.toggle_in_parallel(self.users)
+        self.assertLikes(16)
+        self.toggle_in_parallel(self.users[:10])
+        self.assertLikes(6)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)